@@ -0,0 +1,386 @@
+import os
+import shutil
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from typing import Iterator, Optional, Tuple
+
+# --- Configuration ---
+# "local" (sharded directory tree), "gridfs" (MongoDB) or "s3" (AWS S3 or
+# any S3-compatible store such as MinIO)
+BLOB_STORE = os.getenv("BLOB_STORE", "local").lower()
+UPLOADS_DIR = os.getenv("UPLOADS_DIR", "uploads")
+BLOB_ROOT = os.getenv("BLOB_ROOT", os.path.join(UPLOADS_DIR, "blobs"))
+# Uploads are written here first, hashed, then moved into the store.
+# Kept under UPLOADS_DIR so the local store can move them with a rename.
+STAGING_DIR = os.path.join(UPLOADS_DIR, ".incoming")
+# Workers download remote blobs here while they read them
+BLOB_CACHE_DIR = os.getenv("BLOB_CACHE_DIR", os.path.join(UPLOADS_DIR, ".blob-cache"))
+GRIDFS_BUCKET = os.getenv("GRIDFS_BUCKET", "pdf_blobs")
+S3_BUCKET = os.getenv("S3_BUCKET", "pactparser-uploads")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")  # e.g. http://minio:9000
+S3_PREFIX = os.getenv("S3_PREFIX", "")
+READ_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+class BlobNotFound(Exception):
+    """No blob is stored under this content hash."""
+
+
+def shard_path(file_hash: str) -> str:
+    """
+    ab/cd/abcd...ef.pdf: two levels of 256 directories keep every
+    directory small even with millions of documents.
+    """
+    return f"{file_hash[:2]}/{file_hash[2:4]}/{file_hash}.pdf"
+
+
+def _new_temp_path(directory: str) -> str:
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"{uuid.uuid4().hex}.part")
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def iter_file_range(path: str, start: int, end: int) -> Iterator[bytes]:
+    """
+    Yields bytes start..end (inclusive) of a local file.
+    """
+    remaining = end - start + 1
+    with open(path, "rb") as f:
+        f.seek(start)
+        while remaining > 0:
+            chunk = f.read(min(READ_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+class BlobStore(ABC):
+    """
+    Content-addressed storage for uploaded PDFs, keyed by SHA-256.
+    Storing bytes that are already present is a no-op, so identical
+    uploads share one blob. All methods block; call them from a
+    threadpool in the API.
+    """
+
+    def staging_path(self) -> str:
+        """A fresh temporary path to stream an upload into before put()."""
+        return _new_temp_path(STAGING_DIR)
+
+    @abstractmethod
+    def put(self, src_path: str, file_hash: str) -> str:
+        """
+        Moves a staged file into the store (consuming `src_path`) and
+        returns the locator to keep as the contract's storage_path.
+        """
+
+    @abstractmethod
+    def exists(self, file_hash: str) -> bool:
+        pass
+
+    @abstractmethod
+    def size(self, file_hash: str) -> int:
+        """Size in bytes; raises BlobNotFound."""
+
+    def local_path(self, file_hash: str) -> Optional[str]:
+        """The blob's path on local disk, if the store keeps one."""
+        return None
+
+    @abstractmethod
+    def iter_range(self, file_hash: str, start: int, end: int) -> Iterator[bytes]:
+        """
+        Bytes start..end (inclusive) of the blob. The blob is opened
+        before this returns, so a missing one raises BlobNotFound here
+        rather than halfway through a response.
+        """
+
+    @abstractmethod
+    def _download(self, file_hash: str, dest_path: str):
+        pass
+
+    def materialize(self, file_hash: str) -> str:
+        """
+        A local file with the blob's bytes, for readers that need a path
+        (pypdf, the extraction worker processes). Remote blobs are
+        downloaded into BLOB_CACHE_DIR; release it with discard_local_copy.
+        """
+        path = self.local_path(file_hash)
+        if path:
+            return path
+        # A private copy per caller: contracts sharing a blob can be read
+        # at the same time, and each one deletes its copy when done
+        os.makedirs(BLOB_CACHE_DIR, exist_ok=True)
+        dest = os.path.join(BLOB_CACHE_DIR, f"{file_hash[:16]}-{uuid.uuid4().hex}.pdf")
+        try:
+            self._download(file_hash, dest)
+        except BaseException:
+            _remove_quietly(dest)
+            raise
+        return dest
+
+    def discard_local_copy(self, path: str):
+        """Deletes a downloaded copy; blobs stored on local disk are kept."""
+        if os.path.abspath(path).startswith(os.path.abspath(BLOB_CACHE_DIR) + os.sep):
+            _remove_quietly(path)
+
+
+# --- 1. Local filesystem ---
+
+class LocalBlobStore(BlobStore):
+    """
+    Blobs live under BLOB_ROOT in a hash-sharded tree. Put is a rename
+    from the staging directory, so readers never see a partial file.
+    """
+
+    def __init__(self, root: str = BLOB_ROOT):
+        self.root = root
+
+    def _path(self, file_hash: str) -> str:
+        return os.path.join(self.root, shard_path(file_hash))
+
+    def put(self, src_path: str, file_hash: str) -> str:
+        dest = self._path(file_hash)
+        if os.path.exists(dest):
+            _remove_quietly(src_path)
+            return dest
+        try:
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            # A concurrent upload of the same bytes just replaces it with identical content
+            os.replace(src_path, dest)
+        except BaseException:
+            _remove_quietly(src_path)
+            raise
+        return dest
+
+    def exists(self, file_hash: str) -> bool:
+        return os.path.exists(self._path(file_hash))
+
+    def size(self, file_hash: str) -> int:
+        try:
+            return os.path.getsize(self._path(file_hash))
+        except FileNotFoundError:
+            raise BlobNotFound(file_hash)
+
+    def local_path(self, file_hash: str) -> Optional[str]:
+        path = self._path(file_hash)
+        return path if os.path.exists(path) else None
+
+    def iter_range(self, file_hash: str, start: int, end: int) -> Iterator[bytes]:
+        path = self._path(file_hash)
+        if not os.path.exists(path):
+            raise BlobNotFound(file_hash)
+        return iter_file_range(path, start, end)
+
+    def _download(self, file_hash: str, dest_path: str):
+        try:
+            shutil.copyfile(self._path(file_hash), dest_path)
+        except FileNotFoundError:
+            raise BlobNotFound(file_hash)
+
+    def materialize(self, file_hash: str) -> str:
+        path = self.local_path(file_hash)
+        if path is None:
+            raise BlobNotFound(file_hash)
+        return path
+
+
+# --- 2. GridFS ---
+
+class GridFSBlobStore(BlobStore):
+    """
+    Blobs are GridFS files whose _id is the content hash, so a second
+    upload of the same bytes is rejected by the unique _id.
+    """
+
+    def __init__(self, db, bucket_name: str = GRIDFS_BUCKET):
+        from gridfs import GridFSBucket
+        self.files = db[f"{bucket_name}.files"]
+        self.bucket = GridFSBucket(db, bucket_name=bucket_name)
+        self.bucket_name = bucket_name
+
+    def put(self, src_path: str, file_hash: str) -> str:
+        from pymongo.errors import DuplicateKeyError
+        locator = f"gridfs://{self.bucket_name}/{file_hash}"
+        try:
+            if not self.exists(file_hash):
+                with open(src_path, "rb") as f:
+                    self.bucket.upload_from_stream_with_id(
+                        file_hash, f"{file_hash}.pdf", f,
+                        metadata={"contentType": "application/pdf"}
+                    )
+        except DuplicateKeyError:
+            pass  # stored concurrently by another upload
+        finally:
+            _remove_quietly(src_path)
+        return locator
+
+    def exists(self, file_hash: str) -> bool:
+        return self.files.find_one({"_id": file_hash}, {"_id": 1}) is not None
+
+    def size(self, file_hash: str) -> int:
+        doc = self.files.find_one({"_id": file_hash}, {"length": 1})
+        if doc is None:
+            raise BlobNotFound(file_hash)
+        return doc["length"]
+
+    def iter_range(self, file_hash: str, start: int, end: int) -> Iterator[bytes]:
+        from gridfs.errors import NoFile
+        try:
+            grid_out = self.bucket.open_download_stream(file_hash)
+        except NoFile:
+            raise BlobNotFound(file_hash)
+        return self._iter_grid_out(grid_out, start, end)
+
+    @staticmethod
+    def _iter_grid_out(grid_out, start: int, end: int) -> Iterator[bytes]:
+        with grid_out:
+            grid_out.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = grid_out.read(min(READ_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def _download(self, file_hash: str, dest_path: str):
+        from gridfs.errors import NoFile
+        try:
+            with open(dest_path, "wb") as out:
+                self.bucket.download_to_stream(file_hash, out)
+        except NoFile:
+            raise BlobNotFound(file_hash)
+
+
+# --- 3. S3-compatible ---
+
+class S3BlobStore(BlobStore):
+    """
+    Blobs are objects under the same sharded keys as the local store.
+    Works with AWS S3 and with MinIO (set S3_ENDPOINT_URL). Credentials
+    come from the usual AWS_* environment variables.
+    """
+
+    def __init__(self, bucket: str = S3_BUCKET, endpoint_url: Optional[str] = S3_ENDPOINT_URL,
+                 prefix: str = S3_PREFIX):
+        # Imported lazily: only needed with BLOB_STORE=s3
+        import boto3
+        from botocore.exceptions import ClientError
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+        self.ClientError = ClientError
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def _key(self, file_hash: str) -> str:
+        return f"{self.prefix}{shard_path(file_hash)}"
+
+    def _head(self, file_hash: str) -> Optional[dict]:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._key(file_hash))
+        except self.ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def put(self, src_path: str, file_hash: str) -> str:
+        key = self._key(file_hash)
+        try:
+            if self._head(file_hash) is None:
+                # Multipart for large files, handled by the transfer manager
+                self.client.upload_file(
+                    src_path, self.bucket, key, ExtraArgs={"ContentType": "application/pdf"}
+                )
+        finally:
+            _remove_quietly(src_path)
+        return f"s3://{self.bucket}/{key}"
+
+    def exists(self, file_hash: str) -> bool:
+        return self._head(file_hash) is not None
+
+    def size(self, file_hash: str) -> int:
+        head = self._head(file_hash)
+        if head is None:
+            raise BlobNotFound(file_hash)
+        return head["ContentLength"]
+
+    def iter_range(self, file_hash: str, start: int, end: int) -> Iterator[bytes]:
+        if self._head(file_hash) is None:
+            raise BlobNotFound(file_hash)
+        try:
+            body = self.client.get_object(
+                Bucket=self.bucket, Key=self._key(file_hash), Range=f"bytes={start}-{end}"
+            )["Body"]
+        except self.client.exceptions.NoSuchKey:
+            raise BlobNotFound(file_hash)
+        return self._iter_body(body)
+
+    @staticmethod
+    def _iter_body(body) -> Iterator[bytes]:
+        try:
+            yield from body.iter_chunks(READ_CHUNK_SIZE)
+        finally:
+            body.close()
+
+    def _download(self, file_hash: str, dest_path: str):
+        if self._head(file_hash) is None:
+            raise BlobNotFound(file_hash)
+        self.client.download_file(self.bucket, self._key(file_hash), dest_path)
+
+
+# --- Process-wide store ---
+
+_store: Optional[BlobStore] = None
+_store_lock = threading.Lock()
+
+
+def _build_store() -> BlobStore:
+    if BLOB_STORE == "local":
+        return LocalBlobStore()
+    if BLOB_STORE == "gridfs":
+        from app.database import get_db_sync
+        return GridFSBlobStore(get_db_sync())
+    if BLOB_STORE == "s3":
+        return S3BlobStore()
+    raise ValueError(f"Unknown BLOB_STORE {BLOB_STORE!r}; use local, gridfs or s3.")
+
+
+def get_blob_store() -> BlobStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = _build_store()
+    return _store
+
+
+def locate(storage_path: str, file_hash: Optional[str]) -> Tuple[Optional[str], int]:
+    """
+    Returns (local path or None, size) for a stored contract file.
+    Files uploaded before the blob store (flat uploads/<uuid>.pdf) and
+    blobs in the local store are found on disk; anything else is looked
+    up in the configured store by hash.
+    """
+    if storage_path and os.path.exists(storage_path):
+        return storage_path, os.path.getsize(storage_path)
+    if not file_hash:
+        raise BlobNotFound(storage_path)
+    store = get_blob_store()
+    return store.local_path(file_hash), store.size(file_hash)
+
+
+def local_pdf_path(storage_path: str, file_hash: Optional[str]) -> str:
+    """
+    A readable local path for a contract's PDF (see materialize).
+    """
+    if storage_path and os.path.exists(storage_path):
+        return storage_path
+    if not file_hash:
+        raise BlobNotFound(storage_path)
+    return get_blob_store().materialize(file_hash)
@@ -1,12 +1,46 @@
 import sys
 
+
+def _cli_option(argv, short: str, long: str):
+    """
+    The value of a `celery worker` command line option, e.g. -P/--pool,
+    or None if it isn't given.
+    """
+    for i, arg in enumerate(argv):
+        if arg in (short, long) and i + 1 < len(argv):
+            return argv[i + 1]
+        if arg.startswith(f"{long}="):
+            return arg.split("=", 1)[1]
+        if arg.startswith(short) and len(arg) > len(short):
+            return arg[len(short):]
+    return None
+
+
+def _requested_pool(argv) -> str:
+    return _cli_option(argv, "-P", "--pool") or "prefork"
+
+
+def _requested_concurrency(argv):
+    value = _cli_option(argv, "-c", "--concurrency")
+    return int(value) if value and value.isdigit() else None
+
+
 IS_CELERY_WORKER = "celery" in sys.argv[0]
+WORKER_POOL = _requested_pool(sys.argv) if IS_CELERY_WORKER else None
+# Tasks (greenlets, for green pools) one worker runs at once, if -c was given
+WORKER_CONCURRENCY = _requested_concurrency(sys.argv) if IS_CELERY_WORKER else None
 
-if IS_CELERY_WORKER:
+# Green pools must patch before anything else is imported. Prefork
+# workers (the CPU-bound PDF stage) are left unpatched.
+if WORKER_POOL == "eventlet":
     import eventlet
     eventlet.monkey_patch()
+elif WORKER_POOL == "gevent":
+    from gevent import monkey
+    monkey.patch_all()
 
 from celery import Celery
+from kombu import Queue
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class CelerySettings(BaseSettings):
@@ -15,15 +49,35 @@ class CelerySettings(BaseSettings):
     Default value is for our local docker-compose setup.
     """
     REDIS_CONNECTION_STRING: str = "redis://localhost:6379/0"
+    # Overrides the broker only, e.g. "memory://" for the load tests,
+    # where tasks are published but nothing consumes them
+    CELERY_BROKER_URL: str | None = None
 
     model_config = SettingsConfigDict(env_file=".env", extra='ignore')
 
 # Initialize settings
 settings = CelerySettings()
 
+# --- Queue layout ---
+# One queue per pipeline stage pool and lane (see app.routing), e.g.
+# "pdf.interactive" or "llm.bulk". Each queue is split by the Redis
+# transport into PRIORITY_LEVELS sub-queues; 0 is served first.
+PRIORITY_LEVELS = 10
+QUEUE_PRIORITY_SEP = ":"
+TASK_LANES = ("interactive", "standard", "bulk")
+STAGE_POOLS = ("pdf", "llm")
+TASK_QUEUES = tuple(f"{pool}.{lane}" for pool in STAGE_POOLS for lane in TASK_LANES)
+# Rescoring and stats rebuilds get their own worker, so a long job never
+# holds up document processing in any lane
+MAINTENANCE_QUEUE = "maintenance"
+# Celery's default queue before the lanes existed. Still consumed (by the
+# maintenance worker) so messages queued before the upgrade are processed;
+# remove once it stays empty.
+LEGACY_QUEUE = "celery"
+
 celery_app = Celery(
     "pactparser_tasks",
-    broker=settings.REDIS_CONNECTION_STRING,
+    broker=settings.CELERY_BROKER_URL or settings.REDIS_CONNECTION_STRING,
     backend=settings.REDIS_CONNECTION_STRING,
     include=["app.celery_worker"]  
 )
@@ -34,6 +88,25 @@ celery_app.conf.update(
     accept_content=['json'],
     timezone='UTC',
     enable_utc=True,
+    task_queues=[Queue(name) for name in (*TASK_QUEUES, MAINTENANCE_QUEUE, LEGACY_QUEUE)],
+    task_default_queue="llm.standard",
+    task_default_priority=5,
+    task_routes={
+        "app.celery_worker.rescore_contracts": {"queue": MAINTENANCE_QUEUE},
+        "app.celery_worker.rebuild_contract_stats": {"queue": MAINTENANCE_QUEUE},
+        "app.celery_worker.purge_stale_extraction_cache": {"queue": MAINTENANCE_QUEUE},
+        # Single-task pipeline, only dispatched by single-worker setups
+        "app.celery_worker.process_contract": {"queue": "pdf.standard"},
+    },
+    broker_transport_options={
+        "priority_steps": list(range(PRIORITY_LEVELS)),
+        "sep": QUEUE_PRIORITY_SEP,
+        # Drain queues in the order the worker lists them (-Q), so a
+        # worker on "interactive,standard,bulk" always serves interactive first
+        "queue_order_strategy": "priority",
+    },
+    # Reserve one task at a time so priorities apply to what's still queued
+    worker_prefetch_multiplier=1,
 )
 
 if __name__ == "__main__":
@@ -1,70 +1,456 @@
+import os
 from datetime import datetime, timezone
+from celery.exceptions import Ignore
+from celery.signals import (
+    task_postrun,
+    task_prerun,
+    worker_init,
+    worker_process_shutdown,
+    worker_ready
+)
+from pymongo import ReturnDocument
 from app.celery_app import celery_app
 from app.database import get_db_sync
 from app.models import ContractStatus
 
-from app.llm_parser import read_pdf_text, parse_contract_text
-from app.scoring import calculate_score_and_gaps
+from app.llm_parser import (
+    read_pdf_pages,
+    join_pages,
+    parse_contract_text,
+    LLM_MODEL_NAME,
+    PROMPT_VERSION
+)
+from app.scoring import SCORING_VERSION, score_contract
+from app.extraction_cache import (
+    hash_file,
+    get_cached_extraction,
+    load_extraction,
+    store_extraction,
+    purge_stale_entries
+)
+from app.page_text_store import has_page_text, load_page_text, save_page_text
+from app.blob_store import get_blob_store, local_pdf_path
+from app.progress import publish_progress, publish_contracts_changed, ProgressCheckpointer
+from app.rescoring import rescore_all, RESCORE_BATCH_SIZE
+from app.routing import release_backlog
+from app.retries import (
+    LOCK_ACQUIRED,
+    LOCK_BUSY,
+    STAGE_DONE,
+    TASK_MAX_RETRIES,
+    StageLock,
+    backoff_delay,
+    is_retryable
+)
+from app.rollups import ROLLUP_PROJECTION, record_transition, rebuild_rollups
+from app.metrics import (
+    STAGE_DB_WRITE,
+    STAGE_LLM_CALL,
+    STAGE_PDF_READ,
+    STAGE_SCORING,
+    TASKS_IN_FLIGHT,
+    mark_process_dead,
+    record_failure,
+    record_retry,
+    reset_multiproc_dir,
+    start_worker_exporter,
+    time_stage
+)
+from app.tracing import setup_tracing, tracer
 
 
-@celery_app.task(bind=True, max_retries=3)
-def process_contract(self, contract_id: str, file_path: str):
+setup_tracing("pactparser-worker")
+
+
+# --- Metrics exporter ---
+
+@worker_init.connect
+def prepare_metrics(**kwargs):
+    reset_multiproc_dir()
+
+
+@worker_ready.connect
+def serve_metrics(**kwargs):
+    start_worker_exporter()
+
+
+@worker_process_shutdown.connect
+def retire_process_metrics(pid=None, **kwargs):
+    mark_process_dead(pid or os.getpid())
+
+
+def _task_label(task) -> str:
+    return task.name.rsplit(".", 1)[-1] if task is not None else "unknown"
+
+
+@task_prerun.connect
+def count_task_started(task=None, **kwargs):
+    TASKS_IN_FLIGHT.labels(task=_task_label(task)).inc()
+
+
+@task_postrun.connect
+def count_task_finished(task=None, **kwargs):
+    TASKS_IN_FLIGHT.labels(task=_task_label(task)).dec()
+
+
+# --- Pipeline helpers ---
+# A contract moves through three stages, each its own task so it can
+# run on the pool suited to its bottleneck:
+#   extract_contract_text      (CPU, prefork)   pdf.<lane> queues
+#   llm_extract_contract       (I/O, eventlet)  llm.<lane> queues
+#   score_and_persist_contract (I/O, eventlet)  llm.<lane> queues
+# Stages pass a small reference dict along the chain. The bulky outputs
+# live in MongoDB, keyed by file hash: page text in page_texts, the LLM
+# result in the extraction cache.
+
+# Terminal writes never overwrite a completed contract: a duplicate
+# delivery finishing late must not write its results a second time
+NOT_COMPLETED = {"status": {"$ne": ContractStatus.COMPLETED}}
+
+
+def _write_state(db, contract_id: str, fields: dict, only_if: dict = None) -> bool:
     """
-    The main background task for processing a single contract.
+    Writes contract fields and moves the stats rollups by the
+    difference between the old and new state. With `only_if`, the write
+    only happens if the contract also matches that filter; returns
+    whether anything was written (never for a missing contract, so a
+    deleted record is not counted in the rollups).
     """
-    db = get_db_sync()
-    
-    def update_progress(percentage: int, status: str = ContractStatus.PROCESSING):
-        """Helper to update MongoDB progress."""
-        db.contracts.update_one(
-            {"contract_id": contract_id},
-            {"$set": {"progress_percentage": percentage, "status": status}}
+    now = datetime.now(timezone.utc)
+    if fields.get("status") in (ContractStatus.COMPLETED, ContractStatus.FAILED):
+        fields = {**fields, "finished_at": now}
+    with time_stage(STAGE_DB_WRITE):
+        before = db.contracts.find_one_and_update(
+            {"contract_id": contract_id, **(only_if or {})},
+            {"$set": fields},
+            projection=ROLLUP_PROJECTION,
+            return_document=ReturnDocument.BEFORE
         )
+        if before is None:
+            return False
+        record_transition(db, before, {**before, **fields}, now)
+    return True
+
+
+def _is_completed(db, contract_id: str) -> bool:
+    doc = db.contracts.find_one({"contract_id": contract_id}, {"_id": 0, "status": 1})
+    return bool(doc) and doc.get("status") == ContractStatus.COMPLETED
 
+
+def _progress_updater(db, contract_id: str):
+    checkpoints = ProgressCheckpointer(contract_id)
+
+    def update_progress(percentage: int, status: str = ContractStatus.PROCESSING):
+        """
+        Helper to record transient progress. Redis gets every update;
+        MongoDB only gets periodic checkpoints.
+        """
+        publish_progress(contract_id, status, percentage)
+        if checkpoints.due():
+            _write_state(db, contract_id, {"progress_percentage": percentage, "status": status})
+
+    return update_progress
+
+
+def _mark_failed(db, ref: dict, e: Exception, stage: str = None):
+    contract_id = ref["contract_id"]
+    print(f"❌ Failed to process {contract_id}: {e}")
+    record_failure(stage, e)
+    written = _write_state(db, contract_id, {
+        "status": ContractStatus.FAILED,
+        "progress_percentage": 0,
+        "error_message": str(e),
+        "updated_at": datetime.now(timezone.utc)
+    }, only_if=NOT_COMPLETED)
+    if not written:
+        return
+    publish_progress(contract_id, ContractStatus.FAILED, 0, str(e))
+    if ref.get("tenant_id"):
+        release_backlog(ref["tenant_id"])
+
+
+def _schedule_retry(task, db, ref: dict, e: Exception):
+    """
+    Re-queues the task after a jittered exponential backoff. Completed
+    stages are skipped on the next attempt because their outputs are
+    already stored, so the retry resumes where this attempt stopped.
+    """
+    contract_id = ref["contract_id"]
+    attempt = task.request.retries + 1
+    delay = backoff_delay(task.request.retries)
+    message = f"Retry {attempt}/{task.max_retries} in {delay}s after transient error: {e}"
+    print(f"🔁 {contract_id}: {message}")
+    record_retry(ref.get("stage"), e)
+    db.contracts.update_one(
+        {"contract_id": contract_id, **NOT_COMPLETED},
+        {"$set": {"error_message": message, "updated_at": datetime.now(timezone.utc)}}
+    )
+    publish_progress(contract_id, ContractStatus.PROCESSING, STAGE_PROGRESS.get(ref.get("stage"), 0), message)
+    raise task.retry(exc=e, countdown=delay)
+
+
+# --- Pipeline stages ---
+
+def _read_pages(ref: dict):
+    """
+    Reads the contract's PDF. Blobs in a remote store (GridFS, S3) are
+    downloaded for the read and the local copy dropped right after;
+    later stages work from the stored page text.
+    """
+    path = local_pdf_path(ref["file_path"], ref.get("file_hash"))
     try:
-        # --- Step 1: Set status to 'processing' ---
-        print(f"Starting processing for {contract_id}")
-        update_progress(10)
-        
-        # --- Step 2: Read PDF to Text (REAL) ---
-        print(f"Reading PDF: {file_path}")
-        update_progress(30)
-        extracted_text = read_pdf_text(file_path)
-        
-        # --- Step 3: LLM Extraction (REAL) ---
-        print(f"Parsing text for {contract_id}")
-        update_progress(70)
-        extracted_data_json = parse_contract_text(extracted_text)
-        
-        # --- Step 4: Scoring & Gap Analysis (REAL) ---
-        print(f"Scoring data for {contract_id}")
-        update_progress(90)
-        score, gaps = calculate_score_and_gaps(extracted_data_json)
-
-        # --- Step 5: SUCCESS: Update DB with final data ---
-        db.contracts.update_one(
-            {"contract_id": contract_id},
-            {"$set": {
-                "status": ContractStatus.COMPLETED,
-                "progress_percentage": 100,
-                "extracted_data": extracted_data_json,
-                "confidence_score": score,
-                "gap_analysis": gaps,
-                "updated_at": datetime.now(timezone.utc)
-            }}
+        with time_stage(STAGE_PDF_READ):
+            return read_pdf_pages(path)
+    finally:
+        get_blob_store().discard_local_copy(path)
+
+
+def run_extract_text(db, ref: dict, update_progress) -> dict:
+    """
+    Stage 1: makes sure the page text of the PDF is stored. It is also
+    needed when the LLM result for these exact bytes is already cached:
+    GET /contracts/{id}/text serves it.
+    """
+    contract_id = ref["contract_id"]
+    print(f"Starting processing for {contract_id}")
+    update_progress(10)
+
+    # The API hashes while streaming the upload; only re-hash if it didn't
+    file_hash = ref.get("file_hash") or hash_file(ref["file_path"])
+    ref = {**ref, "file_hash": file_hash}
+
+    # Content-addressed cache lookup (counts the hit or miss)
+    cache_hit = get_cached_extraction(db, file_hash, LLM_MODEL_NAME, PROMPT_VERSION) is not None
+    if cache_hit:
+        print(f"♻️ Cache hit for {contract_id} ({file_hash[:12]})")
+
+    # Reuse the page text from an earlier run of the same document
+    if has_page_text(db, file_hash):
+        if not cache_hit:
+            print(f"Loaded stored page text for {file_hash[:12]}")
+        return ref
+
+    update_progress(30)
+    print(f"Reading PDF: {ref['file_path']}")
+    pages = _read_pages(ref)
+    if not save_page_text(db, file_hash, pages):
+        # Too large to hand over through Mongo; the LLM stage re-reads the PDF
+        ref["page_text_stored"] = False
+    return ref
+
+
+def run_llm_extract(db, ref: dict, update_progress) -> dict:
+    """
+    Stage 2: runs the LLM over the stored page text and stores the
+    result in the extraction cache.
+    """
+    contract_id, file_hash = ref["contract_id"], ref["file_hash"]
+    if load_extraction(db, file_hash, LLM_MODEL_NAME, PROMPT_VERSION) is not None:
+        return ref
+
+    pages = load_page_text(db, file_hash)
+    if pages is None:
+        pages = _read_pages(ref)
+
+    print(f"Parsing text for {contract_id}")
+    update_progress(70)
+    with time_stage(STAGE_LLM_CALL):
+        extracted_data_json = parse_contract_text(join_pages(pages))
+    store_extraction(db, file_hash, LLM_MODEL_NAME, PROMPT_VERSION, extracted_data_json)
+    return ref
+
+
+def run_score_and_persist(db, ref: dict, update_progress) -> dict:
+    """
+    Stage 3: scores the stored extraction and completes the contract.
+    """
+    contract_id, file_hash = ref["contract_id"], ref["file_hash"]
+    cached = load_extraction(db, file_hash, LLM_MODEL_NAME, PROMPT_VERSION)
+    if cached is None:
+        # DELETE /cache or POST /cache/purge-stale can drop the
+        # entry between stages: redo stage 2 rather than fail the contract
+        print(f"🔁 Extraction for {contract_id} vanished from the cache; re-running the LLM stage")
+        run_llm_extract(db, ref, update_progress)
+        cached = load_extraction(db, file_hash, LLM_MODEL_NAME, PROMPT_VERSION)
+    if cached is None:
+        raise Exception("Extraction result is missing; was the cache cleared mid-pipeline?")
+    extracted_data_json = cached.pop("extracted_data")
+
+    # Entries scored under older rules (or not yet at all) are scored now
+    print(f"Scoring data for {contract_id}")
+    update_progress(90)
+    scoring = cached
+    if cached.get("scoring_version") != SCORING_VERSION:
+        with time_stage(STAGE_SCORING):
+            scoring = score_contract(extracted_data_json)
+        store_extraction(
+            db, file_hash, LLM_MODEL_NAME, PROMPT_VERSION,
+            extracted_data_json, scoring
         )
-        print(f"✅ Successfully processed contract {contract_id}")
 
+    written = _write_state(db, contract_id, {
+        "status": ContractStatus.COMPLETED,
+        "progress_percentage": 100,
+        "file_hash": file_hash,
+        "extracted_data": extracted_data_json,
+        **scoring,
+        "error_message": None,
+        "updated_at": datetime.now(timezone.utc)
+    }, only_if=NOT_COMPLETED)
+    if not written:
+        print(f"⏭️ {contract_id} was already completed by another delivery")
+        return ref
+    publish_progress(contract_id, ContractStatus.COMPLETED, 100)
+    if ref.get("tenant_id"):
+        release_backlog(ref["tenant_id"])
+    print(f"✅ Successfully processed contract {contract_id}")
+    return ref
+
+
+PIPELINE_STAGES = (run_extract_text, run_llm_extract, run_score_and_persist)
+# Progress reported while a stage waits to be retried
+STAGE_PROGRESS = {"run_extract_text": 10, "run_llm_extract": 30, "run_score_and_persist": 70}
+
+
+def _call_stage(stage, db, ref: dict, update_progress) -> dict:
+    """
+    Runs a stage inside its own span, under the task's span.
+    """
+    with tracer.start_as_current_span(stage.__name__, attributes={"contract.id": ref["contract_id"]}):
+        return stage(db, ref, update_progress)
+
+
+def _run_stage(task, stage, ref: dict) -> dict:
+    """
+    Runs one stage as a task, guarded against duplicate work:
+    - a contract that is already completed is not processed again;
+    - a stage lock keyed by contract and stage lets only one execution
+      run at a time (a redelivered message is refused, a retry of the
+      task takes over);
+    - a stage this pipeline run already finished is skipped, and the
+      chain stops there: the first execution queued the next stage.
+    Transient errors are retried with backoff; anything else marks the
+    contract failed and stops the chain (Ignore: no result, no callbacks).
+    """
+    db = get_db_sync()
+    contract_id = ref["contract_id"]
+    if _is_completed(db, contract_id):
+        print(f"⏭️ Skipping {stage.__name__} for {contract_id}: already completed")
+        raise Ignore()
+
+    lock = StageLock(
+        contract_id, stage.__name__,
+        run_id=task.request.root_id or task.request.id,
+        task_id=task.request.id,
+        attempt=task.request.retries
+    )
+    state = lock.acquire()
+    if state == STAGE_DONE:
+        print(f"⏭️ Skipping {stage.__name__} for {contract_id}: already done in this run")
+        raise Ignore()
+    if state == LOCK_BUSY:
+        print(f"⏭️ Skipping {stage.__name__} for {contract_id}: already running in another delivery")
+        raise Ignore()
+
+    done = False
+    try:
+        result = _call_stage(stage, db, ref, _progress_updater(db, contract_id))
+        done = True
+        return result
     except Exception as e:
-        # --- Step 6: FAILURE: Catch-all error handler ---
-        print(f"❌ Failed to process {contract_id}: {e}")
-        
-        db.contracts.update_one(
-            {"contract_id": contract_id},
-            {"$set": {
-                "status": ContractStatus.FAILED,
-                "progress_percentage": 0,
-                "error_message": str(e),
-                "updated_at": datetime.now(timezone.utc)
-            }}
-        )
\ No newline at end of file
+        if is_retryable(e) and task.request.retries < task.max_retries:
+            _schedule_retry(task, db, {**ref, "stage": stage.__name__}, e)
+        _mark_failed(db, ref, e, stage.__name__)
+        raise Ignore()
+    finally:
+        lock.release(done)
+
+
+@celery_app.task(bind=True, max_retries=TASK_MAX_RETRIES)
+def extract_contract_text(self, ref: dict) -> dict:
+    return _run_stage(self, run_extract_text, ref)
+
+
+@celery_app.task(bind=True, max_retries=TASK_MAX_RETRIES)
+def llm_extract_contract(self, ref: dict) -> dict:
+    return _run_stage(self, run_llm_extract, ref)
+
+
+@celery_app.task(bind=True, max_retries=TASK_MAX_RETRIES)
+def score_and_persist_contract(self, ref: dict) -> dict:
+    return _run_stage(self, run_score_and_persist, ref)
+
+
+@celery_app.task(bind=True, max_retries=TASK_MAX_RETRIES)
+def process_contract(self, contract_id: str, file_path: str, file_hash: str = None, tenant_id: str = None):
+    """
+    Runs all pipeline stages inline in one task. Kept for messages
+    queued before the pipeline was split into stage tasks (the
+    maintenance worker drains the old "celery" queue they sit in), and
+    for single-worker setups. Retries resume from the last stored stage output.
+    """
+    db = get_db_sync()
+    ref = {"contract_id": contract_id, "file_path": file_path, "file_hash": file_hash, "tenant_id": tenant_id}
+    if _is_completed(db, contract_id):
+        print(f"⏭️ Skipping {contract_id}: already completed")
+        return
+
+    lock = StageLock(
+        contract_id, "process_contract",
+        run_id=self.request.id, task_id=self.request.id, attempt=self.request.retries
+    )
+    if lock.acquire() != LOCK_ACQUIRED:
+        print(f"⏭️ Skipping {contract_id}: already running or done in another delivery")
+        return
+
+    update_progress = _progress_updater(db, contract_id)
+    stage = None
+    done = False
+    try:
+        for stage in PIPELINE_STAGES:
+            ref = _call_stage(stage, db, ref, update_progress)
+        done = True
+    except Exception as e:
+        if is_retryable(e) and self.request.retries < self.max_retries:
+            _schedule_retry(self, db, {**ref, "stage": stage.__name__}, e)
+        _mark_failed(db, ref, e, stage.__name__ if stage else None)
+    finally:
+        lock.release(done)
+
+
+@celery_app.task
+def rescore_contracts(batch_size: int = RESCORE_BATCH_SIZE, only_outdated: bool = True):
+    """
+    Recomputes confidence_score and gap_analysis for completed contracts
+    from their stored extracted_data. Run after changing the scoring rules.
+    """
+    print("Starting bulk rescoring...")
+    db = get_db_sync()
+    result = rescore_all(db, batch_size, only_outdated)
+    # Scores changed underneath the rollups and any cached API responses
+    rebuild_rollups(db)
+    publish_contracts_changed()
+    print(f"✅ Rescored {result['processed']} contracts in {result['seconds']}s")
+    return result
+
+
+@celery_app.task
+def rebuild_contract_stats():
+    """
+    Recomputes the stats rollups from the contracts collection.
+    """
+    print("Rebuilding contract stats rollups...")
+    result = rebuild_rollups(get_db_sync())
+    print(f"✅ Rebuilt stats for {result['contracts']} contracts")
+    return result
+
+
+@celery_app.task
+def purge_stale_extraction_cache():
+    """
+    Drops cache entries left behind by another model or prompt/schema
+    version. Queued by POST /cache/purge-stale after a deploy.
+    """
+    deleted = purge_stale_entries(get_db_sync(), LLM_MODEL_NAME, PROMPT_VERSION)
+    print(f"🧹 Purged {deleted} stale extraction cache entries.")
+    return {"deleted_count": deleted}
@@ -0,0 +1,147 @@
+import json
+from typing import Callable, Dict, List, Optional
+
+# --- Configuration ---
+PAGE_SEPARATOR = "\n\n--- END OF PAGE ---\n\n"
+CHARS_PER_TOKEN = 4  # Rough average for English legal text
+
+
+# --- 1. Splitting Logic (Map input) ---
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate. Good enough to decide whether a contract fits
+    in one prompt; we don't need a real tokenizer for that.
+    """
+    return len(text) // CHARS_PER_TOKEN
+
+
+def _split_oversized(block: str, max_chars: int) -> List[str]:
+    """
+    Splits a single page that is bigger than the chunk budget, preferring
+    paragraph boundaries and falling back to a hard cut.
+    """
+    pieces = []
+    current = ""
+    for paragraph in block.split("\n\n"):
+        candidate = f"{current}\n\n{paragraph}" if current else paragraph
+        if len(candidate) <= max_chars:
+            current = candidate
+            continue
+        if current:
+            pieces.append(current)
+        while len(paragraph) > max_chars:
+            pieces.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars:]
+        current = paragraph
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_into_chunks(text: str, max_tokens: int) -> List[str]:
+    """
+    Packs whole pages into chunks of at most `max_tokens` (estimated).
+    Page order is preserved, so chunk N always covers earlier pages
+    than chunk N+1.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    pages = [p for p in text.split(PAGE_SEPARATOR) if p.strip()]
+
+    chunks = []
+    current: List[str] = []
+    current_len = 0
+    for page in pages:
+        if len(page) > max_chars:
+            if current:
+                chunks.append(PAGE_SEPARATOR.join(current))
+                current, current_len = [], 0
+            chunks.extend(_split_oversized(page, max_chars))
+            continue
+
+        added_len = len(page) + (len(PAGE_SEPARATOR) if current else 0)
+        if current and current_len + added_len > max_chars:
+            chunks.append(PAGE_SEPARATOR.join(current))
+            current, current_len = [], 0
+            added_len = len(page)
+        current.append(page)
+        current_len += added_len
+
+    if current:
+        chunks.append(PAGE_SEPARATOR.join(current))
+    return chunks
+
+
+# --- 2. Merge Logic (Reduce) ---
+
+def _norm(value) -> str:
+    if value is None:
+        return ""
+    return " ".join(str(value).lower().split())
+
+
+def _generic_key(item) -> str:
+    return json.dumps(item, sort_keys=True, default=str)
+
+
+# How list items are recognised as "the same thing" across chunks.
+# Lists not listed here are deduped on their full JSON content.
+LIST_ITEM_KEYS: Dict[str, Callable[[dict], str]] = {
+    "parties": lambda p: _norm(p.get("legal_name")) or _generic_key(p),
+    "signatories": lambda s: _norm(s.get("name")) or _generic_key(s),
+    "line_items": lambda li: "|".join(
+        _norm(li.get(k)) for k in ("description", "quantity", "unit_price", "total")
+    ),
+    "sla_details": lambda d: "|".join(_norm(d.get(k)) for k in ("metric", "commitment")),
+}
+
+
+def _is_empty(value) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def _merge_lists(field: str, left: list, right: list) -> list:
+    key_fn = LIST_ITEM_KEYS.get(field, _generic_key)
+    merged: List = []
+    index: Dict[str, int] = {}
+    for item in list(left) + list(right):
+        key = key_fn(item) if isinstance(item, dict) else _generic_key(item)
+        if key in index:
+            existing = merged[index[key]]
+            if isinstance(existing, dict) and isinstance(item, dict):
+                merged[index[key]] = _merge_values(existing, item)
+            continue
+        index[key] = len(merged)
+        merged.append(item)
+    return merged
+
+
+def _merge_values(left, right, field: Optional[str] = None):
+    """
+    Earlier chunks win for scalars; later chunks only fill in gaps.
+    Objects are merged field by field and lists are unioned with dedupe.
+    """
+    if _is_empty(left):
+        return right
+    if _is_empty(right):
+        return left
+    if isinstance(left, dict) and isinstance(right, dict):
+        merged = dict(left)
+        for key, value in right.items():
+            merged[key] = _merge_values(merged.get(key), value, key)
+        return merged
+    if isinstance(left, list) and isinstance(right, list):
+        return _merge_lists(field or "", left, right)
+    return left
+
+
+def merge_extractions(partials: List[dict]) -> dict:
+    """
+    Reduces per-chunk ExtractedContractData dicts into one. The result
+    only depends on chunk order, never on which chunk finished first.
+    """
+    merged: dict = {}
+    for partial in partials:
+        if isinstance(partial, dict):
+            merged = _merge_values(merged, partial)
+    return merged
@@ -1,28 +1,42 @@
-from pymongo import MongoClient
+from pymongo import AsyncMongoClient, MongoClient, UpdateOne, ASCENDING, DESCENDING, TEXT
+from pymongo.asynchronous.database import AsyncDatabase
 from pymongo.database import Database
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from starlette.concurrency import run_in_threadpool
 import os
 
+from app.search import TEXT_INDEX_NAME, TEXT_INDEX_WEIGHTS, normalize_filename
+from app.tracing import mongo_command_tracer
+
 class DatabaseSettings(BaseSettings):
     """
     Reads the MongoDB connection string from an environment variable.
-    
+
     We'll set MONGO_CONNECTION_STRING in our .env file locally,
     and it will be set by Docker/deployment environment later.
-    
+
     Default value is for our local docker-compose setup.
     """
     MONGO_CONNECTION_STRING: str = "mongodb://localhost:27017"
+    # Overridden by the benchmarks so they never touch real data
+    MONGO_DATABASE_NAME: str = "pactparser_db"
+
+    # Connection pool tuning for the API's async client
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 10
+    MONGO_MAX_IDLE_TIME_MS: int = 60000
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = 5000
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+
     model_config = SettingsConfigDict(env_file=".env", extra='ignore')
 
 # Initialize settings
 settings = DatabaseSettings()
+DATABASE_NAME = settings.MONGO_DATABASE_NAME
 
 # Create a single, reusable client instance
 # This is recommended by MongoDB docs
 try:
-    client = MongoClient(settings.MONGO_CONNECTION_STRING)
+    client = MongoClient(settings.MONGO_CONNECTION_STRING, event_listeners=[mongo_command_tracer])
     # Ping the server to confirm a successful connection
     client.admin.command('ping')
     print("✅ Successfully connected to MongoDB.")
@@ -31,16 +45,31 @@ except Exception as e:
     # In a real app, you might want to exit if the DB connection fails
     client = None
 
-async def get_db() -> Database:
+# --- THIS IS FOR FASTAPI (ASYNC) ---
+# Native asyncio driver: no threadpool hop per query. The client
+# connects lazily on first use, inside the running event loop.
+async_client = AsyncMongoClient(
+    settings.MONGO_CONNECTION_STRING,
+    maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+    minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+    maxIdleTimeMS=settings.MONGO_MAX_IDLE_TIME_MS,
+    waitQueueTimeoutMS=settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    event_listeners=[mongo_command_tracer]
+)
+
+async def get_db() -> AsyncDatabase:
     """
     Dependency injector function to get the database instance.
-    This is now an async function.
+    Returns the async database used by the API.
     """
-    if client is None:
-        raise Exception("MongoDB client is not initialized. Check connection.")
-    
-    db = client["pactparser_db"]
-    return db
+    return async_client[DATABASE_NAME]
+
+async def close_async_client():
+    """
+    Closes the async client's connection pool on API shutdown.
+    """
+    await async_client.close()
 
 # --- THIS IS FOR CELERY (SYNC) ---
 def get_db_sync() -> Database:
@@ -50,24 +79,77 @@ def get_db_sync() -> Database:
     """
     if client is None:
         raise Exception("MongoDB client is not initialized. Check connection.")
-        
-    db = client["pactparser_db"]
+
+    db = client[DATABASE_NAME]
     return db
 # --- END ADDITION ---
 
+BACKFILL_BATCH_SIZE = 1000
+
+
+async def backfill_filename_lower(db: AsyncDatabase) -> int:
+    """
+    Sets filename_lower on contracts created before it existed, and
+    fixes non-ASCII names an earlier $toLower backfill left uppercase.
+    Runs in Python with normalize_filename, the same function new
+    records use: $toLower only lowercases ASCII.
+    """
+    cursor = db.contracts.find(
+        {"$or": [
+            {"filename_lower": {"$exists": False}},
+            {"filename": {"$regex": "[^\\x00-\\x7F]"}}
+        ]},
+        {"_id": 1, "filename": 1, "filename_lower": 1}
+    )
+    updated = 0
+    batch = []
+    async for doc in cursor:
+        normalized = normalize_filename(doc.get("filename"))
+        if "filename_lower" in doc and doc["filename_lower"] == normalized:
+            continue
+        batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"filename_lower": normalized}}))
+        if len(batch) >= BACKFILL_BATCH_SIZE:
+            updated += (await db.contracts.bulk_write(batch, ordered=False)).modified_count
+            batch = []
+    if batch:
+        updated += (await db.contracts.bulk_write(batch, ordered=False)).modified_count
+    return updated
+
 async def create_indexes():
     """
     Ensures that the critical indexes are created in MongoDB.
     """
-    if client:
-        try:
-            db = await get_db() # Use await
-            # Run the blocking I/O in a threadpool
-            await run_in_threadpool(db.contracts.create_index, "contract_id", unique=True)
-            await run_in_threadpool(db.contracts.create_index, "status")
-            await run_in_threadpool(db.contracts.create_index, "confidence_score")
-            await run_in_threadpool(db.contracts.create_index, "created_at")
-            
-            print("✅ MongoDB indexes ensured.")
-        except Exception as e:
-            print(f"⚠️ Warning: Failed to create indexes. {e}")
\ No newline at end of file
+    try:
+        db = await get_db()
+        await db.contracts.create_index("contract_id", unique=True)
+        await db.contracts.create_index("status")
+        await db.contracts.create_index("confidence_score")
+        await db.contracts.create_index("created_at")
+        await db.contracts.create_index("batch_id", sparse=True)
+        await db.contracts.create_index("scoring_version")
+        # Compound indexes matching the list endpoint's keyset sort,
+        # with and without the status filter
+        await db.contracts.create_index(
+            [("created_at", DESCENDING), ("contract_id", DESCENDING)]
+        )
+        await db.contracts.create_index(
+            [("status", ASCENDING), ("created_at", DESCENDING), ("contract_id", DESCENDING)]
+        )
+        # Indexed search: normalized prefix field plus one text index
+        # over filenames and party legal names
+        await db.contracts.create_index("filename_lower")
+        await db.contracts.create_index(
+            [(field, TEXT) for field in TEXT_INDEX_WEIGHTS],
+            weights=TEXT_INDEX_WEIGHTS,
+            name=TEXT_INDEX_NAME
+        )
+        await db.extraction_cache.create_index("file_hash")
+        await db.extraction_cache.create_index("prompt_version")
+
+        print("✅ MongoDB indexes ensured.")
+
+        backfilled = await backfill_filename_lower(db)
+        if backfilled:
+            print(f"✅ Backfilled filename_lower on {backfilled} contracts.")
+    except Exception as e:
+        print(f"⚠️ Warning: Failed to create indexes. {e}")
@@ -0,0 +1,192 @@
+import hashlib
+from datetime import datetime, timezone
+from typing import Optional
+
+import redis
+import redis.asyncio as aioredis
+from pymongo.database import Database
+
+from app.celery_app import settings
+
+# --- Configuration ---
+CACHE_COLLECTION = "extraction_cache"
+# Hit/miss counters live in Redis: a lookup costs an INCR, not a Mongo write
+STATS_KEY_PREFIX = "extraction-cache-stats:"
+HASH_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+def hash_file(file_path: str) -> str:
+    """
+    Computes the SHA-256 of a file without loading it fully into memory.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_cache_key(file_hash: str, model: str, prompt_version: str) -> str:
+    """
+    A cache entry is only valid for the exact same PDF bytes, LLM model
+    and prompt/schema version. Changing any of them is a guaranteed miss.
+    """
+    return f"{file_hash}:{model}:{prompt_version}"
+
+
+def stats_key(counter: str) -> str:
+    return f"{STATS_KEY_PREFIX}{counter}"
+
+
+_async_client: Optional[aioredis.Redis] = None
+_sync_client: Optional[redis.Redis] = None
+
+
+def _get_async_client() -> aioredis.Redis:
+    global _async_client
+    if _async_client is None:
+        _async_client = aioredis.Redis.from_url(settings.REDIS_CONNECTION_STRING, decode_responses=True)
+    return _async_client
+
+
+def _get_sync_client() -> redis.Redis:
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = redis.Redis.from_url(settings.REDIS_CONNECTION_STRING)
+    return _sync_client
+
+
+def _record(counter: str):
+    """
+    Counts a hit or a miss. Best effort: stats must not fail a lookup.
+    """
+    try:
+        _get_sync_client().incr(stats_key(counter))
+    except Exception as e:
+        print(f"⚠️ Warning: Failed to count extraction cache {counter}. {e}")
+
+
+def get_cached_extraction(
+    db: Database, file_hash: str, model: str, prompt_version: str
+) -> Optional[dict]:
+    """
+    Looks up a previous extraction result and records a hit or a miss.
+    Returns a dict with 'extracted_data' plus the scoring fields it was
+    stored with ('confidence_score', 'gap_analysis', 'scoring_version',
+    optionally 'segment_scores'), or None on a miss.
+    """
+    entry = db[CACHE_COLLECTION].find_one(
+        {"_id": make_cache_key(file_hash, model, prompt_version)},
+        {"extracted_data": 1, "confidence_score": 1, "gap_analysis": 1,
+         "scoring_version": 1, "segment_scores": 1}
+    )
+    if entry is None:
+        _record("misses")
+        return None
+
+    _record("hits")
+    entry.pop("_id", None)
+    return entry
+
+
+def load_extraction(
+    db: Database, file_hash: str, model: str, prompt_version: str
+) -> Optional[dict]:
+    """
+    Reads a stored extraction without touching the hit/miss counters.
+    Used by pipeline stages that hand the LLM output over by reference.
+    """
+    entry = db[CACHE_COLLECTION].find_one(
+        {"_id": make_cache_key(file_hash, model, prompt_version)},
+        {"extracted_data": 1, "confidence_score": 1, "gap_analysis": 1,
+         "scoring_version": 1, "segment_scores": 1}
+    )
+    if entry is not None:
+        entry.pop("_id", None)
+    return entry
+
+
+def store_extraction(
+    db: Database,
+    file_hash: str,
+    model: str,
+    prompt_version: str,
+    extracted_data: dict,
+    scoring: Optional[dict] = None,
+):
+    """
+    Saves a successful extraction so identical uploads can reuse it.
+    `scoring` holds the fields produced by app.scoring.score_contract;
+    it is added later when the extraction is stored before scoring.
+    """
+    db[CACHE_COLLECTION].update_one(
+        {"_id": make_cache_key(file_hash, model, prompt_version)},
+        {"$set": {
+            "file_hash": file_hash,
+            "model": model,
+            "prompt_version": prompt_version,
+            "extracted_data": extracted_data,
+            **(scoring or {}),
+            "created_at": datetime.now(timezone.utc)
+        }},
+        upsert=True
+    )
+
+
+def purge_stale_entries(db: Database, model: str, prompt_version: str) -> int:
+    """
+    Deletes every entry produced by a different model or prompt/schema
+    version. Workers still running another version (during a rolling
+    deploy) do hit those entries, so this is an admin task to run once
+    every worker is on the new version, not a startup hook.
+    """
+    result = db[CACHE_COLLECTION].delete_many({
+        "$or": [
+            {"model": {"$ne": model}},
+            {"prompt_version": {"$ne": prompt_version}}
+        ]
+    })
+    return result.deleted_count
+
+
+def build_invalidation_filter(
+    file_hash: Optional[str] = None, prompt_version: Optional[str] = None
+) -> dict:
+    """
+    Builds the delete filter used by the manual invalidation endpoint.
+    An empty filter clears the whole cache.
+    """
+    query = {}
+    if file_hash:
+        query["file_hash"] = file_hash
+    if prompt_version:
+        query["prompt_version"] = prompt_version
+    return query
+
+
+def summarize_cache_stats(counters: Optional[dict], entries: int) -> dict:
+    """
+    Turns the raw counters into the stats payload.
+    """
+    counters = counters or {}
+    hits = int(counters.get("hits") or 0)
+    misses = int(counters.get("misses") or 0)
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        "entries": entries
+    }
+
+
+async def get_cache_counters() -> dict:
+    """
+    Reads the hit/miss counters (API, async). Redis errors read as zero.
+    """
+    try:
+        hits, misses = await _get_async_client().mget(stats_key("hits"), stats_key("misses"))
+    except Exception as e:
+        print(f"⚠️ Warning: Failed to read extraction cache counters. {e}")
+        return {}
+    return {"hits": hits, "misses": misses}
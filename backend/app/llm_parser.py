@@ -1,11 +1,28 @@
 import os
-from pypdf import PdfReader
+import json
+import hashlib
+import threading
+import httpx
+from typing import List
 from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.runnables import RunnableLambda
+from opentelemetry.trace import SpanKind
 from dotenv import load_dotenv
 
+from app.celery_app import WORKER_CONCURRENCY
 from app.models import ExtractedContractData
+from app.chunking import (
+    PAGE_SEPARATOR,
+    estimate_tokens,
+    split_into_chunks,
+    merge_extractions
+)
+from app.rate_limiter import RedisRateLimiter
+from app.pdf_extraction import extract_pages
+from app.metrics import LLM_RATE_LIMIT_WAIT, record_llm_usage
+from app.tracing import tracer
 
 # --- Configuration ---
 
@@ -17,46 +34,59 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
     raise ValueError("GROQ_API_KEY not found in .env file. Please add it.")
 
+# Contracts estimated above this size are extracted chunk by chunk
+LLM_CHUNK_THRESHOLD_TOKENS = int(os.getenv("LLM_CHUNK_THRESHOLD_TOKENS", "24000"))
+LLM_CHUNK_TOKENS = int(os.getenv("LLM_CHUNK_TOKENS", "8000"))
+LLM_MAP_CONCURRENCY = int(os.getenv("LLM_MAP_CONCURRENCY", "4"))
+
+# Cluster-wide provider budget, shared by every worker through Redis
+GROQ_RPM_LIMIT = int(os.getenv("GROQ_RPM_LIMIT", "30"))
+GROQ_TPM_LIMIT = int(os.getenv("GROQ_TPM_LIMIT", "12000"))
+LLM_COMPLETION_TOKEN_ESTIMATE = int(os.getenv("LLM_COMPLETION_TOKEN_ESTIMATE", "1500"))
+LLM_RATE_LIMIT_MAX_WAIT = float(os.getenv("LLM_RATE_LIMIT_MAX_WAIT", "300"))
+# One pooled connection per task the worker runs at once (-c), so 200
+# greenlets don't queue on a handful of sockets
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", str(max(20, WORKER_CONCURRENCY or 0))))
+# Seconds a call may wait for a free pooled connection, and for the reply
+LLM_HTTP_POOL_TIMEOUT = float(os.getenv("LLM_HTTP_POOL_TIMEOUT", "120"))
+LLM_HTTP_READ_TIMEOUT = float(os.getenv("LLM_HTTP_READ_TIMEOUT", "120"))
+
 
 # --- 1. PDF Reading Logic ---
 
-def read_pdf_text(file_path: str) -> str:
+def read_pdf_pages(file_path: str) -> List[str]:
     """
-    Reads a PDF file and extracts its text content page by page.
+    Reads a PDF file and returns the text of each page, in order.
+    Large documents are extracted in parallel across processes.
     """
     try:
-        reader = PdfReader(file_path)
-        full_text = ""
-        for page in reader.pages:
-            full_text += page.extract_text() + "\n\n--- END OF PAGE ---\n\n"
+        pages = extract_pages(file_path)
         
-        if not full_text.strip():
+        if not any(page.strip() for page in pages):
             raise ValueError("PDF is empty or text extraction failed.")
             
-        return full_text
+        return pages
     except Exception as e:
         print(f"Error reading PDF {file_path}: {e}")
         raise ValueError(f"Could not read PDF: {e}")
 
-# --- 2. LangChain Parsing Logic ---
+def read_pdf_text(file_path: str) -> str:
+    """
+    Reads a PDF file and extracts its text content page by page.
+    """
+    return join_pages(read_pdf_pages(file_path))
 
-def get_extraction_chain():
+def join_pages(pages: List[str]) -> str:
     """
-    Initializes the LangChain extraction chain using ChatGroq.
+    Joins page texts with the page separator the chunker splits on.
     """
-    # Initialize the LLM
-    llm = ChatGroq(
-        api_key=GROQ_API_KEY,
-        model="llama-3.3-70b-versatile",
-        temperature=0  # Set to 0 for deterministic JSON output
-    )
-    
-    # Get the Pydantic JSON schema
-    parser = JsonOutputParser(pydantic_object=ExtractedContractData)
-    json_schema = parser.get_format_instructions()
-    
-    # Define the prompt template
-    prompt_template = """
+    return "".join(f"{page}{PAGE_SEPARATOR}" for page in pages)
+
+# --- 2. LangChain Parsing Logic ---
+
+LLM_MODEL_NAME = "llama-3.3-70b-versatile"
+
+PROMPT_TEMPLATE = """
     You are an expert legal and financial analyst AI. Your task is to
     parse the provided contract text and extract critical information.
     
@@ -80,36 +110,184 @@ def get_extraction_chain():
     {contract_text}
     ---
     """
+
+def get_prompt_version() -> str:
+    """
+    Returns a short fingerprint of the prompt template and the
+    ExtractedContractData schema. Any edit to either one produces a
+    new version, which is what the extraction cache keys on.
+    """
+    schema = json.dumps(ExtractedContractData.model_json_schema(), sort_keys=True)
+    digest = hashlib.sha256((PROMPT_TEMPLATE + schema).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+PROMPT_VERSION = get_prompt_version()
+
+def get_format_instructions() -> str:
+    """
+    The schema instructions the prompt is rendered with.
+    """
+    return JsonOutputParser(pydantic_object=ExtractedContractData).get_format_instructions()
+
+# Every single call must fit the per-minute token budget: the rate
+# limiter admits an oversized call at the cost of the full bucket, but
+# the provider still rejects it. Prompts and chunks are capped to what
+# is left of GROQ_TPM_LIMIT after the rendered prompt and completion.
+PROMPT_OVERHEAD_TOKENS = estimate_tokens(
+    ChatPromptTemplate.from_template(PROMPT_TEMPLATE).format(
+        schema=get_format_instructions(), contract_text=""
+    )
+)
+MAX_CONTRACT_TEXT_TOKENS = GROQ_TPM_LIMIT - PROMPT_OVERHEAD_TOKENS - LLM_COMPLETION_TOKEN_ESTIMATE
+if MAX_CONTRACT_TEXT_TOKENS <= 0:
+    raise ValueError(
+        f"GROQ_TPM_LIMIT={GROQ_TPM_LIMIT} leaves no room for contract text "
+        f"(prompt ~{PROMPT_OVERHEAD_TOKENS} + completion {LLM_COMPLETION_TOKEN_ESTIMATE} tokens)."
+    )
+CHUNK_THRESHOLD_TOKENS = min(LLM_CHUNK_THRESHOLD_TOKENS, MAX_CONTRACT_TEXT_TOKENS)
+CHUNK_TOKENS = min(LLM_CHUNK_TOKENS, MAX_CONTRACT_TEXT_TOKENS)
+
+# --- Process-wide shared client and chain ---
+_chain = None
+_chain_lock = threading.Lock()
+
+rate_limiter = RedisRateLimiter(
+    name=f"groq:{LLM_MODEL_NAME}",
+    requests_per_minute=GROQ_RPM_LIMIT,
+    tokens_per_minute=GROQ_TPM_LIMIT,
+    max_wait_seconds=LLM_RATE_LIMIT_MAX_WAIT
+)
+
+def _throttle(prompt_value):
+    """
+    Chain step that sits between the prompt and the LLM. Every call,
+    including each Map-Reduce chunk, waits here for RPM/TPM capacity.
+    """
+    cost = estimate_tokens(prompt_value.to_string()) + LLM_COMPLETION_TOKEN_ESTIMATE
+    with tracer.start_as_current_span("llm rate limit wait", attributes={"llm.token_cost": cost}):
+        waited = rate_limiter.acquire(cost)
+    LLM_RATE_LIMIT_WAIT.observe(waited)
+    if waited > 0:
+        print(f"Waited {waited:.1f}s for LLM rate limit capacity.")
+    return prompt_value
+
+def _traced(llm):
+    """
+    Wraps the LLM so every request, including each Map-Reduce chunk,
+    gets its own client span with the provider's token counts.
+    """
+    def request(prompt_value):
+        with tracer.start_as_current_span(
+            "llm request", kind=SpanKind.CLIENT, attributes={"llm.model": LLM_MODEL_NAME}
+        ) as span:
+            message = llm.invoke(prompt_value)
+            usage = getattr(message, "usage_metadata", None) or {}
+            span.set_attribute("llm.prompt_tokens", usage.get("input_tokens") or 0)
+            span.set_attribute("llm.completion_tokens", usage.get("output_tokens") or 0)
+            return message
+
+    return RunnableLambda(request)
+
+def _count_tokens(message):
+    """
+    Chain step between the LLM and the JSON parser, which would
+    otherwise drop the provider's token usage.
+    """
+    record_llm_usage(message)
+    return message
+
+def _build_extraction_chain():
+    """
+    Builds the LangChain extraction chain using ChatGroq.
+    """
+    # One pooled HTTP client reused by every call in this process
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_HTTP_MAX_CONNECTIONS
+        )
+    )
+
+    # Initialize the LLM. The timeout is passed here, not on the client:
+    # ChatGroq would otherwise hand the Groq SDK no timeout at all.
+    llm = ChatGroq(
+        api_key=GROQ_API_KEY,
+        model=LLM_MODEL_NAME,
+        temperature=0,  # Set to 0 for deterministic JSON output
+        http_client=http_client,
+        timeout=httpx.Timeout(LLM_HTTP_READ_TIMEOUT, connect=5.0, pool=LLM_HTTP_POOL_TIMEOUT)
+    )
+    
+    # Get the Pydantic JSON schema
+    parser = JsonOutputParser(pydantic_object=ExtractedContractData)
+    json_schema = get_format_instructions()
     
     prompt = ChatPromptTemplate.from_template(
-        prompt_template,
+        PROMPT_TEMPLATE,
         partial_variables={"schema": json_schema}
     )
     
-    # Create the chain: Prompt -> LLM -> JSON Parser
-    chain = prompt | llm | parser
+    # Create the chain: Prompt -> Rate limit -> LLM -> Token usage -> JSON Parser
+    chain = prompt | RunnableLambda(_throttle) | _traced(llm) | RunnableLambda(_count_tokens) | parser
     return chain
 
+def get_extraction_chain():
+    """
+    Returns the process-wide extraction chain, building it on first use.
+    The chain is stateless, so every greenlet can share it.
+    """
+    global _chain
+    if _chain is None:
+        with _chain_lock:
+            if _chain is None:
+                _chain = _build_extraction_chain()
+    return _chain
+
+def _parse_chunked(chain, text: str) -> dict:
+    """
+    Map-Reduce extraction: each chunk is sent to the LLM independently
+    (at most LLM_MAP_CONCURRENCY at a time) and the partial results are
+    merged in chunk order.
+    """
+    chunks = split_into_chunks(text, CHUNK_TOKENS)
+    print(f"Contract too large for one prompt, extracting {len(chunks)} chunks "
+          f"with concurrency {LLM_MAP_CONCURRENCY}...")
+
+    results = chain.batch(
+        [{"contract_text": chunk} for chunk in chunks],
+        config={"max_concurrency": LLM_MAP_CONCURRENCY},
+        return_exceptions=True
+    )
+    failures = [r for r in results if isinstance(r, Exception)]
+    if failures:
+        # A partial merge would silently under-score the contract
+        raise Exception(f"{len(failures)} of {len(chunks)} chunks failed: {failures[0]}") from failures[0]
+
+    return merge_extractions(results)
+
 def parse_contract_text(text: str) -> dict:
     """
     Parses the full text of a contract using the LangChain extraction chain.
     
-    NOTE: For very large contracts (50MB+), the text may exceed the
-    LLM's context window. A more complex "Map-Reduce" or "Refine"
-    strategy would be needed. For this assignment, we'll assume
-    the extracted text fits in a single prompt.
+    Contracts whose estimated size exceeds LLM_CHUNK_THRESHOLD_TOKENS
+    would overflow the LLM's context window, so they are split on page
+    boundaries and extracted with a Map-Reduce strategy instead. Both
+    limits are capped to the GROQ_TPM_LIMIT budget of a single call.
     """
     try:
-        print("Initializing LLM extraction chain...")
         chain = get_extraction_chain()
-        print("Calling Groq LLM to parse contract... This may take a moment.")
-        
-        # Invoke the chain with the contract text
-        result_json = chain.invoke({"contract_text": text})
+
+        if estimate_tokens(text) > CHUNK_THRESHOLD_TOKENS:
+            result_json = _parse_chunked(chain, text)
+        else:
+            print("Calling Groq LLM to parse contract... This may take a moment.")
+            # Invoke the chain with the contract text
+            result_json = chain.invoke({"contract_text": text})
         
         print("LLM parsing complete.")
         return result_json
         
     except Exception as e:
         print(f"Error during LLM parsing: {e}")
-        raise Exception(f"Failed to parse text with LLM: {e}")
\ No newline at end of file
+        # Chained so callers can tell transient failures (timeouts, rate limits) apart
+        raise Exception(f"Failed to parse text with LLM: {e}") from e
@@ -1,33 +1,129 @@
 import os
+import json
+import time
+import uuid
+import asyncio
+import zipfile
 import mimetypes
+from datetime import datetime, timezone
+from typing import List
+from urllib.parse import quote
+from celery import group
 from fastapi import (
     FastAPI, 
     UploadFile, 
+    File,
+    Header,
     HTTPException, 
     Depends,
-    Query
+    Query,
+    Request
 )
-from fastapi.responses import FileResponse
-from pymongo.database import Database
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from pymongo import ReturnDocument
+from pymongo.asynchronous.database import AsyncDatabase
 from contextlib import asynccontextmanager
 
-# --- ADD THIS IMPORT ---
+# Only used for blocking file I/O; database calls are natively async
 from starlette.concurrency import run_in_threadpool
 
-from app.database import get_db, create_indexes
+from app.database import get_db, create_indexes, close_async_client
 from app.models import (
     ContractDB,
     UploadResponse,
     StatusResponse,
     ContractListResponse,
     PaginatedContractList,
-    ContractStatus
+    ContractStatus,
+    CacheStatsResponse,
+    CacheInvalidationResponse,
+    CachePurgeResponse,
+    ContractTextResponse,
+    RejectedFile,
+    BatchUploadResponse,
+    BatchStatusResponse,
+    RescoreResponse,
+    ContractStatsResponse,
+    StatsRebuildResponse,
+    QueueDepthResponse
 )
 from app.celery_app import celery_app
+from app.progress import (
+    progress_broker,
+    get_live_progress,
+    get_live_progress_many,
+    publish_progress,
+    TERMINAL_STATUSES,
+    ALL_CONTRACTS
+)
+from app.pagination import LIST_SORT, InvalidCursor, after_cursor_filter, encode_cursor
+from app.response_cache import completed_contract_cache, make_etag, etag_matches
+from app.projections import (
+    LIST_PROJECTION,
+    STATUS_PROJECTION,
+    DOWNLOAD_PROJECTION,
+    InvalidFieldSelection,
+    build_field_projection
+)
+from app.search import (
+    filename_prefix_filter,
+    text_search_filter,
+    TEXT_SCORE_PROJECTION,
+    TEXT_SCORE_SORT
+)
+from app.page_text_store import PAGE_TEXT_COLLECTION, decode_pages
+from app.routing import (
+    DEFAULT_TENANT,
+    choose_lane,
+    route_for,
+    pipeline_signature,
+    reserve_backlog,
+    get_queue_depths,
+    lane_totals
+)
+from app.rollups import (
+    ROLLUP_COLLECTION,
+    HOURLY_COLLECTION,
+    TOTALS_DOC_ID,
+    ROLLUP_PROJECTION,
+    new_contracts_update,
+    rollup_update,
+    summarize_rollups,
+    throughput_window_start
+)
+from app.uploads import (
+    save_upload_stream,
+    save_zip_member,
+    list_zip_pdfs,
+    is_zip_upload,
+    UploadTooLarge,
+    InvalidPdf,
+    UploadSizeLimit,
+    MAX_BATCH_FILES,
+    MAX_BATCH_UPLOAD_BYTES,
+    MAX_UPLOAD_BYTES,
+    MULTIPART_OVERHEAD_BYTES,
+    ZIP_MEMBER_ERRORS
+)
+from app.extraction_cache import (
+    CACHE_COLLECTION,
+    get_cache_counters,
+    summarize_cache_stats,
+    build_invalidation_filter
+)
+from app.metrics import (
+    CONTENT_TYPE_LATEST,
+    HTTP_REQUEST_DURATION,
+    record_queue_depths,
+    render_latest
+)
+from app.tracing import current_trace_id, name_server_span, server_span, setup_tracing
+from app.blob_store import BlobNotFound, get_blob_store, iter_file_range, locate
+from app.byte_ranges import RangeNotSatisfiable, parse_byte_range
 
 # --- Configuration ---
-UPLOADS_DIR = "uploads"
-os.makedirs(UPLOADS_DIR, exist_ok=True)
+setup_tracing("pactparser-api")
 
 
 # --- App Lifespan (FIXED) ---
@@ -39,10 +135,22 @@ async def lifespan(app: FastAPI):
     print("🚀 PactParser API is starting up...")
     # --- FIX: Added 'await' ---
     await create_indexes()
+    # Any worker event for a contract may change it: drop its cached copy
+    progress_broker.add_listener(_evict_cached_contract)
+    await progress_broker.start()
     yield
+    await progress_broker.stop()
+    await close_async_client()
     print("👋 PactParser API is shutting down...")
 
 
+def _evict_cached_contract(event: dict):
+    if event["contract_id"] == ALL_CONTRACTS:
+        completed_contract_cache.clear()
+    else:
+        completed_contract_cache.invalidate(event["contract_id"])
+
+
 # --- FastAPI App Initialization ---
 app = FastAPI(
     title="PactParser API",
@@ -51,51 +159,123 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Oversized uploads are refused before the multipart body is spooled
+app.add_middleware(UploadSizeLimit, limits={
+    "/contracts/upload": MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES,
+    "/contracts/batch": MAX_BATCH_UPLOAD_BYTES
+})
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """
+    Times every request, labelled by route template (/contracts/{contract_id})
+    rather than the raw path, so ids don't explode the label set.
+    """
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    HTTP_REQUEST_DURATION.labels(
+        method=request.method,
+        route=route.path if route else "unmatched",
+        status=response.status_code
+    ).observe(time.perf_counter() - started)
+    return response
+
+
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    """
+    Opens the root span of the request. Tasks queued by the handler
+    carry it in their headers, so worker spans join the same trace.
+    """
+    with server_span(request.method, dict(request.headers)) as span:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        name_server_span(span, request.method, route.path if route else "unmatched", response.status_code)
+    return response
+
 
 # --- API Endpoints (FIXED) ---
 
+def _pipeline_ref(contract: ContractDB) -> dict:
+    """
+    The reference handed from stage to stage of the processing chain.
+    """
+    return {
+        "contract_id": contract.contract_id,
+        "file_path": contract.storage_path,
+        "file_hash": contract.file_hash,
+        "tenant_id": contract.tenant_id
+    }
+
+async def _count_new_contracts(db: AsyncDatabase, count: int):
+    """
+    Adds freshly inserted contracts to the stats rollups. Best effort:
+    the rebuild repairs any drift.
+    """
+    try:
+        await db[ROLLUP_COLLECTION].update_one(
+            {"_id": TOTALS_DOC_ID}, new_contracts_update(count), upsert=True
+        )
+    except Exception as e:
+        print(f"⚠️ Warning: Failed to update stats rollups. {e}")
+
 @app.post("/contracts/upload", response_model=UploadResponse)
 async def upload_contract(
     file: UploadFile, 
-    db: Database = Depends(get_db)
+    x_tenant_id: str | None = Header(default=None),
+    db: AsyncDatabase = Depends(get_db)
 ):
-    if file.content_type != "application/pdf":
-        raise HTTPException(
-            status_code=400, 
-            detail="Invalid file type. Only PDFs are accepted."
-        )
-
+    tenant_id = x_tenant_id or DEFAULT_TENANT
     new_contract = ContractDB(
         filename=file.filename,
-        storage_path="" 
-    )
-    file_extension = ".pdf"
-    storage_path = os.path.join(
-        UPLOADS_DIR, f"{new_contract.contract_id}{file_extension}"
+        storage_path="",
+        tenant_id=tenant_id,
+        trace_id=current_trace_id()
     )
+    blob_store = get_blob_store()
+    staging_path = blob_store.staging_path()
     
-    # --- FIX: Non-blocking file save ---
+    # --- Streamed, bounded-memory file save ---
+    # The %PDF magic bytes are checked on the first chunk instead of
+    # trusting the client-supplied content_type.
     try:
-        file_content = await file.read()
-        with open(storage_path, "wb") as buffer:
-            await run_in_threadpool(buffer.write, file_content)
+        file_hash, file_size = await save_upload_stream(file, staging_path)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidPdf as e:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Invalid file type. Only PDFs are accepted. {e}"
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save file: {e}")
 
-    # --- FIX: Non-blocking database insert ---
+    # --- Content-addressed storage: identical PDFs are stored once ---
+    try:
+        storage_path = await run_in_threadpool(blob_store.put, staging_path, file_hash)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to store file: {e}")
+
+    # --- Native async database insert ---
     new_contract.storage_path = storage_path
+    new_contract.file_hash = file_hash
+    new_contract.file_size = file_size
     try:
-        await run_in_threadpool(db.contracts.insert_one, new_contract.model_dump())
+        await db.contracts.insert_one(new_contract.model_dump())
         print(f"✅ Successfully inserted {new_contract.contract_id} into DB.")
     except Exception as e:
         print(f"❌ DB Insert FAILED: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to create contract entry in database: {e}")
+    await _count_new_contracts(db, 1)
 
-    # 3. Dispatch the background task
-    celery_app.send_task(
-        "app.celery_worker.process_contract",
-        args=[new_contract.contract_id, storage_path]
-    )
+    # 3. Dispatch the processing pipeline to its lane
+    backlog = await reserve_backlog(tenant_id)
+    pipeline_signature(
+        _pipeline_ref(new_contract),
+        **route_for(choose_lane(file_size, interactive=True), backlog)
+    ).apply_async()
     
     return UploadResponse(
         contract_id=new_contract.contract_id,
@@ -103,43 +283,301 @@ async def upload_contract(
         status=new_contract.status
     )
 
+@app.post("/contracts/batch", response_model=BatchUploadResponse)
+async def upload_contract_batch(
+    files: List[UploadFile] = File(...),
+    x_tenant_id: str | None = Header(default=None),
+    db: AsyncDatabase = Depends(get_db)
+):
+    """
+    Accepts many PDFs and/or zip archives of PDFs in one request. All
+    contract records are written with a single insert_many and the
+    processing tasks are dispatched as one Celery group.
+    """
+    batch_id = str(uuid.uuid4())
+    tenant_id = x_tenant_id or DEFAULT_TENANT
+    contracts: List[ContractDB] = []
+    rejected: List[RejectedFile] = []
+    blob_store = get_blob_store()
+
+    def new_record(filename: str) -> ContractDB:
+        return ContractDB(
+            filename=filename, storage_path="", batch_id=batch_id,
+            tenant_id=tenant_id, trace_id=current_trace_id()
+        )
+
+    for file in files:
+        if len(contracts) >= MAX_BATCH_FILES:
+            rejected.append(RejectedFile(filename=file.filename, reason="Batch file limit reached."))
+            continue
+
+        if await is_zip_upload(file):
+            try:
+                # Reads the central directory: blocking I/O on the spooled upload
+                archive = await run_in_threadpool(zipfile.ZipFile, file.file)
+            except zipfile.BadZipFile as e:
+                rejected.append(RejectedFile(filename=file.filename, reason=f"Invalid zip archive: {e}"))
+                continue
+            with archive:
+                for member in list_zip_pdfs(archive):
+                    if len(contracts) >= MAX_BATCH_FILES:
+                        rejected.append(RejectedFile(filename=member.filename, reason="Batch file limit reached."))
+                        continue
+                    record = new_record(os.path.basename(member.filename))
+                    staging_path = blob_store.staging_path()
+                    try:
+                        record.file_hash, record.file_size = await run_in_threadpool(
+                            save_zip_member, archive, member, staging_path
+                        )
+                    except (UploadTooLarge, InvalidPdf) as e:
+                        rejected.append(RejectedFile(filename=member.filename, reason=str(e)))
+                        continue
+                    except ZIP_MEMBER_ERRORS as e:
+                        # One bad member must not fail the batch (and orphan the blobs already stored)
+                        rejected.append(RejectedFile(filename=member.filename, reason=f"Unreadable zip member: {e}"))
+                        continue
+                    except Exception as e:
+                        rejected.append(RejectedFile(filename=member.filename, reason=f"Failed to save file: {e}"))
+                        continue
+                    try:
+                        record.storage_path = await run_in_threadpool(
+                            blob_store.put, staging_path, record.file_hash
+                        )
+                    except Exception as e:
+                        rejected.append(RejectedFile(filename=member.filename, reason=f"Failed to store file: {e}"))
+                        continue
+                    contracts.append(record)
+            continue
+
+        record = new_record(file.filename)
+        staging_path = blob_store.staging_path()
+        try:
+            record.file_hash, record.file_size = await save_upload_stream(file, staging_path)
+        except (UploadTooLarge, InvalidPdf) as e:
+            rejected.append(RejectedFile(filename=file.filename, reason=str(e)))
+            continue
+        except Exception as e:
+            rejected.append(RejectedFile(filename=file.filename, reason=f"Failed to save file: {e}"))
+            continue
+        try:
+            record.storage_path = await run_in_threadpool(
+                blob_store.put, staging_path, record.file_hash
+            )
+        except Exception as e:
+            rejected.append(RejectedFile(filename=file.filename, reason=f"Failed to store file: {e}"))
+            continue
+        contracts.append(record)
+
+    if not contracts:
+        raise HTTPException(status_code=400, detail="No valid PDF files found in the batch.")
+
+    # --- One round-trip for all records ---
+    try:
+        await db.contracts.insert_many(
+            [c.model_dump() for c in contracts],
+            ordered=False
+        )
+        print(f"✅ Inserted batch {batch_id} with {len(contracts)} contracts.")
+    except Exception as e:
+        print(f"❌ Batch Insert FAILED: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to create contract entries in database: {e}")
+    await _count_new_contracts(db, len(contracts))
+
+    # --- One Celery group for all tasks ---
+    # Each task sees the tenant backlog ahead of it, so a large batch
+    # sinks in priority as it goes and other tenants' work overtakes it
+    backlog = await reserve_backlog(tenant_id, len(contracts))
+    group(
+        pipeline_signature(
+            _pipeline_ref(c),
+            **route_for(choose_lane(c.file_size, interactive=False), backlog + i)
+        )
+        for i, c in enumerate(contracts)
+    ).apply_async()
+
+    return BatchUploadResponse(
+        batch_id=batch_id,
+        accepted_count=len(contracts),
+        rejected=rejected,
+        contracts=[
+            UploadResponse(contract_id=c.contract_id, filename=c.filename, status=c.status)
+            for c in contracts
+        ]
+    )
+
+@app.get("/batches/{batch_id}", response_model=BatchStatusResponse)
+async def get_batch_status(
+    batch_id: str,
+    db: AsyncDatabase = Depends(get_db)
+):
+    """
+    Aggregate progress of a batch, computed server-side in one query.
+    """
+    pipeline = [
+        {"$match": {"batch_id": batch_id}},
+        {"$group": {
+            "_id": "$status",
+            "count": {"$sum": 1},
+            "progress": {"$sum": "$progress_percentage"}
+        }}
+    ]
+    cursor = await db.contracts.aggregate(pipeline)
+    groups = await cursor.to_list()
+    if not groups:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    status_counts = {g["_id"]: g["count"] for g in groups}
+    progress = sum(g["progress"] for g in groups)
+
+    # Mongo only holds periodic checkpoints for running contracts:
+    # overlay their live state from Redis (one MGET)
+    if any(status not in TERMINAL_STATUSES for status in status_counts):
+        active = await db.contracts.find(
+            {"batch_id": batch_id, "status": {"$nin": list(TERMINAL_STATUSES)}},
+            {"_id": 0, "contract_id": 1, "status": 1, "progress_percentage": 1}
+        ).to_list()
+        live = await get_live_progress_many([c["contract_id"] for c in active])
+        for contract in active:
+            state = live.get(contract["contract_id"])
+            if state is None:
+                continue
+            status_counts[contract["status"]] -= 1
+            status_counts[state["status"]] = status_counts.get(state["status"], 0) + 1
+            progress += (state["progress_percentage"] or 0) - (contract.get("progress_percentage") or 0)
+        status_counts = {status: count for status, count in status_counts.items() if count}
+
+    total_count = sum(status_counts.values())
+    finished = status_counts.get(ContractStatus.COMPLETED, 0) + status_counts.get(ContractStatus.FAILED, 0)
+
+    return BatchStatusResponse(
+        batch_id=batch_id,
+        total_count=total_count,
+        status_counts=status_counts,
+        progress_percentage=round(progress / total_count, 2),
+        is_finished=finished == total_count
+    )
+
 @app.get("/contracts", response_model=PaginatedContractList)
 async def get_contract_list(
     status: str | None = Query(default=None),
-    filename: str | None = Query(default=None), 
+    filename: str | None = Query(default=None, description="Case-insensitive filename prefix"), 
+    q: str | None = Query(default=None, description="Full-text search over filenames and party names, ranked by relevance"),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=10, ge=1, le=100),
-    db: Database = Depends(get_db)
+    cursor: str | None = Query(default=None, description="Opaque next_cursor from the previous page"),
+    include_total: bool = Query(default=False, description="Run an exact count instead of an estimate"),
+    db: AsyncDatabase = Depends(get_db)
 ):
+    """
+    Lists contracts newest first. Pass `cursor` (the previous page's
+    next_cursor) for keyset pagination, whose cost does not depend on how
+    deep you page. `page` is still honoured without a cursor, but deep
+    pages fall back to a skip.
+
+    `q` results are ranked by relevance and paged with `page` only.
+    """
     query = {}
     if status:
         query["status"] = status
     if filename:
-        query["filename"] = {"$regex": filename, "$options": "i"}
-        
-    skip = (page - 1) * page_size
+        query.update(filename_prefix_filter(filename))
+    if q:
+        query.update(text_search_filter(q))
+
+    find_query = query
+    projection = {**LIST_PROJECTION, **TEXT_SCORE_PROJECTION} if q else LIST_PROJECTION
+    sort = TEXT_SCORE_SORT + LIST_SORT if q else LIST_SORT
+    skip = 0
+    if cursor and q:
+        raise HTTPException(status_code=400, detail="Cursor pagination is not supported for relevance-ranked searches.")
+    if cursor:
+        try:
+            find_query = {**query, **after_cursor_filter(cursor)}
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        skip = (page - 1) * page_size
     
-    # --- FIX: Non-blocking database calls ---
-    total_count = await run_in_threadpool(db.contracts.count_documents, query)
-    cursor = db.contracts.find(query).skip(skip).limit(page_size).sort("created_at", -1)
-    items = [
-        ContractListResponse(**doc) for doc in await run_in_threadpool(list, cursor)
-    ]
+    # --- Native async database calls ---
+    # Fetch one extra document to learn whether another page exists
+    db_cursor = db.contracts.find(find_query, projection).sort(sort).skip(skip).limit(page_size + 1)
+    docs = await db_cursor.to_list(length=page_size + 1)
+    has_more = len(docs) > page_size
+    docs = docs[:page_size]
+    items = [ContractListResponse(**doc) for doc in docs]
+
+    # Exact counts are a scan of the matching index range; only pay
+    # for them on request. Unfiltered lists get the O(1) estimate.
+    total_count = None
+    total_is_estimate = False
+    if include_total:
+        total_count = await db.contracts.count_documents(query)
+    elif not query:
+        total_count = await db.contracts.estimated_document_count()
+        total_is_estimate = True
     
     return PaginatedContractList(
         total_count=total_count,
+        total_is_estimate=total_is_estimate,
         page=page,
         page_size=page_size,
+        next_cursor=encode_cursor(docs[-1]) if has_more and not q else None,
         items=items
     )
     
+# Declared before /contracts/{contract_id} so "stats" isn't taken for an id
+@app.get("/contracts/stats", response_model=ContractStatsResponse)
+async def get_contract_stats(
+    hours: int = Query(default=24, ge=1, le=24 * 14, description="Throughput window in hours"),
+    db: AsyncDatabase = Depends(get_db)
+):
+    """
+    Dashboard statistics served from pre-aggregated rollups: one
+    document read plus at most `hours` hourly buckets, independent of
+    how many contracts exist.
+    """
+    totals = await db[ROLLUP_COLLECTION].find_one({"_id": TOTALS_DOC_ID})
+    hourly = await db[HOURLY_COLLECTION].find(
+        {"_id": {"$gte": throughput_window_start(hours)}}
+    ).to_list()
+    return ContractStatsResponse(**summarize_rollups(totals, hourly))
+
+@app.post("/contracts/stats/rebuild", response_model=StatsRebuildResponse)
+async def rebuild_contract_stats():
+    """
+    Queues a full recomputation of the stats rollups from the contracts
+    collection (aggregation pipelines). Use after restores or manual edits.
+    """
+    task = celery_app.send_task("app.celery_worker.rebuild_contract_stats")
+    return StatsRebuildResponse(task_id=task.id)
+
 @app.get("/contracts/{contract_id}", response_model=ContractDB)
 async def get_contract_data(
     contract_id: str, 
-    db: Database = Depends(get_db)
+    fields: str | None = Query(
+        default=None,
+        description="Comma-separated fields to return, e.g. 'financial_details,confidence_score'"
+    ),
+    if_none_match: str | None = Header(default=None),
+    db: AsyncDatabase = Depends(get_db)
 ):
-    # --- FIX: Non-blocking database call ---
-    contract = await run_in_threadpool(db.contracts.find_one, {"contract_id": contract_id})
+    # Completed contracts are immutable until reprocessed, so full
+    # responses are served from the in-process LRU with a strong ETag.
+    if not fields:
+        cached = completed_contract_cache.get(contract_id)
+        if cached is not None:
+            return _etagged_response(*cached, if_none_match)
+    # Taken before the read: an eviction during it must win over our put
+    generation = completed_contract_cache.generation
+
+    projection = None
+    if fields:
+        try:
+            projection = build_field_projection(fields)
+        except InvalidFieldSelection as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    contract = await db.contracts.find_one({"contract_id": contract_id}, projection)
     if not contract:
         raise HTTPException(status_code=404, detail="Contract not found")
     
@@ -148,15 +586,88 @@ async def get_contract_data(
             status_code=400, 
             detail=f"Contract is still {contract['status']}. Data not available."
         )
-    return contract
+
+    # A sparse document can't satisfy the full ContractDB response_model,
+    # so it is serialized directly and skips that validation pass.
+    if projection is not None:
+        return JSONResponse(jsonable_encoder(contract))
+
+    body = ContractDB.model_validate(contract).model_dump_json().encode("utf-8")
+    etag = make_etag(body)
+    completed_contract_cache.put(contract_id, body, etag, generation)
+    return _etagged_response(body, etag, if_none_match)
+
+def _etagged_response(body: bytes, etag: str, if_none_match: str | None) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.post("/contracts/{contract_id}/retry", response_model=UploadResponse)
+async def retry_failed_contract(
+    contract_id: str,
+    db: AsyncDatabase = Depends(get_db)
+):
+    """
+    Re-queues a failed contract. Stages whose output is already stored
+    (page text, LLM extraction) are skipped, so a contract that failed
+    in the LLM call does not parse its PDF again.
+    """
+    before = await db.contracts.find_one_and_update(
+        {"contract_id": contract_id, "status": ContractStatus.FAILED},
+        {"$set": {
+            "status": ContractStatus.PENDING,
+            "progress_percentage": 0,
+            "error_message": None,
+            "trace_id": current_trace_id(),
+            "updated_at": datetime.now(timezone.utc)
+        }},
+        projection={**ROLLUP_PROJECTION, "filename": 1, "storage_path": 1,
+                    "file_hash": 1, "file_size": 1, "tenant_id": 1},
+        return_document=ReturnDocument.BEFORE
+    )
+    if before is None:
+        exists = await db.contracts.find_one({"contract_id": contract_id}, {"_id": 1})
+        if not exists:
+            raise HTTPException(status_code=404, detail="Contract not found")
+        raise HTTPException(status_code=409, detail="Only failed contracts can be retried")
+
+    # /status and /events read Redis first: replace the stale "failed"
+    # state now instead of waiting for the worker's first update. The
+    # same event evicts the contract from every API's detail cache.
+    await run_in_threadpool(publish_progress, contract_id, ContractStatus.PENDING, 0)
+
+    update = rollup_update(before, {**before, "status": ContractStatus.PENDING})
+    if update:
+        try:
+            await db[ROLLUP_COLLECTION].update_one({"_id": TOTALS_DOC_ID}, update, upsert=True)
+        except Exception as e:
+            print(f"⚠️ Warning: Failed to update stats rollups. {e}")
+
+    tenant_id = before.get("tenant_id") or DEFAULT_TENANT
+    backlog = await reserve_backlog(tenant_id)
+    ref = {
+        "contract_id": contract_id,
+        "file_path": before["storage_path"],
+        "file_hash": before.get("file_hash"),
+        "tenant_id": tenant_id
+    }
+    pipeline_signature(
+        ref, **route_for(choose_lane(before.get("file_size"), interactive=True), backlog)
+    ).apply_async()
+    return UploadResponse(contract_id=contract_id, filename=before["filename"], status=ContractStatus.PENDING)
 
 @app.get("/contracts/{contract_id}/status", response_model=StatusResponse)
 async def get_processing_status(
     contract_id: str, 
-    db: Database = Depends(get_db)
+    db: AsyncDatabase = Depends(get_db)
 ):
-    # --- FIX: Non-blocking database call ---
-    contract = await run_in_threadpool(db.contracts.find_one, {"contract_id": contract_id})
+    # Read-through: live progress lives in Redis, Mongo only has checkpoints
+    live = await get_live_progress(contract_id)
+    if live is not None:
+        return StatusResponse(**live)
+
+    contract = await db.contracts.find_one({"contract_id": contract_id}, STATUS_PROJECTION)
     if not contract:
         raise HTTPException(status_code=404, detail="Contract not found")
     
@@ -167,29 +678,231 @@ async def get_processing_status(
         error_message=contract["error_message"]
     )
 
+SSE_KEEPALIVE_SECONDS = 15
+
+@app.get("/contracts/{contract_id}/events")
+async def stream_processing_status(
+    contract_id: str,
+    db: AsyncDatabase = Depends(get_db)
+):
+    """
+    Server-Sent Events stream of status updates, pushed from the worker
+    through Redis pub/sub. The current state is read once on connect
+    (Redis first, Mongo only if it has expired); after that no reads
+    happen until the stream closes on 'completed' or 'failed'.
+    """
+    # Subscribe BEFORE the initial read so no transition can slip between them
+    queue = progress_broker.subscribe(contract_id)
+
+    contract = await get_live_progress(contract_id)
+    if contract is None:
+        contract = await db.contracts.find_one({"contract_id": contract_id}, STATUS_PROJECTION)
+    if not contract:
+        progress_broker.unsubscribe(contract_id, queue)
+        raise HTTPException(status_code=404, detail="Contract not found")
+
+    initial = StatusResponse(**contract).model_dump()
+
+    async def event_stream():
+        try:
+            yield f"data: {json.dumps(initial)}\n\n"
+            if initial["status"] in TERMINAL_STATUSES:
+                return
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"data: {json.dumps(event)}\n\n"
+                if event["status"] in TERMINAL_STATUSES:
+                    return
+        finally:
+            progress_broker.unsubscribe(contract_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/contracts/{contract_id}/text", response_model=ContractTextResponse)
+async def get_contract_text(
+    contract_id: str,
+    page: int | None = Query(default=None, ge=1),
+    db: AsyncDatabase = Depends(get_db)
+):
+    """
+    Returns the stored per-page text of the original PDF, so clients can
+    show the source without the server re-running pypdf.
+    """
+    contract = await db.contracts.find_one({"contract_id": contract_id}, {"file_hash": 1})
+    if not contract:
+        raise HTTPException(status_code=404, detail="Contract not found")
+
+    artifact = None
+    if contract.get("file_hash"):
+        artifact = await db[PAGE_TEXT_COLLECTION].find_one({"_id": contract["file_hash"]})
+    if not artifact:
+        raise HTTPException(status_code=404, detail="Text has not been extracted for this contract yet.")
+
+    pages = decode_pages(artifact)
+    if page is not None:
+        if page > len(pages):
+            raise HTTPException(status_code=404, detail=f"Page {page} does not exist.")
+        pages = [pages[page - 1]]
+
+    return ContractTextResponse(
+        contract_id=contract_id,
+        page_count=artifact["page_count"],
+        pages=pages
+    )
+
+def _attachment_disposition(filename: str) -> str:
+    """
+    Same Content-Disposition FileResponse sends, for streamed downloads.
+    """
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
 @app.get("/contracts/{contract_id}/download")
 async def download_contract_file(
     contract_id: str, 
-    db: Database = Depends(get_db)
+    range_header: str | None = Header(default=None, alias="Range"),
+    if_range: str | None = Header(default=None),
+    if_none_match: str | None = Header(default=None),
+    db: AsyncDatabase = Depends(get_db)
 ):
-    # --- FIX: Non-blocking database call ---
-    contract = await run_in_threadpool(db.contracts.find_one, {"contract_id": contract_id})
+    """
+    Streams the original PDF. Supports single-range requests (206), so
+    viewers can fetch pages lazily and interrupted downloads can resume.
+    """
+    contract = await db.contracts.find_one({"contract_id": contract_id}, DOWNLOAD_PROJECTION)
     if not contract:
         raise HTTPException(status_code=404, detail="Contract not found")
 
-    file_path = contract["storage_path"]
-    if not os.path.exists(file_path):
+    file_hash = contract.get("file_hash")
+    try:
+        local_path, size = await run_in_threadpool(locate, contract["storage_path"], file_hash)
+    except BlobNotFound:
         raise HTTPException(
             status_code=404, 
             detail="File not found on server."
         )
 
-    media_type, _ = mimetypes.guess_type(file_path)
+    media_type, _ = mimetypes.guess_type(contract["filename"] or "")
     if media_type is None:
-        media_type = "application/octet-stream"
+        media_type = "application/pdf"
 
-    return FileResponse(
-        file_path,
-        media_type=media_type,
-        filename=contract["filename"]
-    )
\ No newline at end of file
+    # Stored bytes never change for a hash, so it is a strong validator
+    headers = {"Accept-Ranges": "bytes"}
+    etag = f'"{file_hash}"' if file_hash else None
+    if etag:
+        headers["ETag"] = etag
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    # If-Range: only honour the Range if the client's copy is still current
+    if range_header and (if_range is None or if_range.strip() == etag):
+        try:
+            byte_range = parse_byte_range(range_header, size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range is None and local_path:
+        # Servers implementing the ASGI pathsend extension send the file
+        # with sendfile(); others fall back to chunked reads
+        return FileResponse(
+            local_path,
+            media_type=media_type,
+            filename=contract["filename"],
+            headers=headers
+        )
+
+    start, end = byte_range or (0, size - 1)
+    if local_path:
+        body = iter_file_range(local_path, start, end)
+    else:
+        # Opened before the status line goes out, so a vanished blob is a 404
+        try:
+            body = await run_in_threadpool(get_blob_store().iter_range, file_hash, start, end)
+        except BlobNotFound:
+            raise HTTPException(status_code=404, detail="File not found on server.")
+    headers["Content-Length"] = str(end - start + 1)
+    headers["Content-Disposition"] = _attachment_disposition(contract["filename"])
+    if byte_range is None:
+        return StreamingResponse(body, media_type=media_type, headers=headers)
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return StreamingResponse(body, status_code=206, media_type=media_type, headers=headers)
+
+@app.post("/contracts/rescore", response_model=RescoreResponse)
+async def rescore_all_contracts(
+    full: bool = Query(False, description="Rescore every contract, not only those scored by an older rule-set version")
+):
+    """
+    Queues a bulk rescoring job that refreshes confidence_score and
+    gap_analysis from stored extracted_data (no LLM calls).
+    """
+    task = celery_app.send_task(
+        "app.celery_worker.rescore_contracts",
+        kwargs={"only_outdated": not full}
+    )
+    return RescoreResponse(task_id=task.id)
+
+@app.get("/queues", response_model=QueueDepthResponse)
+async def get_queue_depth():
+    """
+    Tasks waiting in each processing lane (interactive, standard, bulk)
+    and in each stage queue behind it (pdf.<lane>, llm.<lane>).
+    """
+    try:
+        depths = await get_queue_depths()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Broker unavailable: {e}")
+    return QueueDepthResponse(lanes=lane_totals(depths), queues=depths, total=sum(depths.values()))
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """
+    Prometheus scrape endpoint. Queue depths are sampled from the broker
+    on each scrape; pipeline stage metrics are exported by the workers.
+    """
+    try:
+        record_queue_depths(await get_queue_depths())
+    except Exception as e:
+        print(f"⚠️ Warning: Failed to read queue depths for metrics. {e}")
+    return Response(content=render_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/cache/stats", response_model=CacheStatsResponse)
+async def get_extraction_cache_stats(db: AsyncDatabase = Depends(get_db)):
+    counters = await get_cache_counters()
+    entries = await db[CACHE_COLLECTION].estimated_document_count()
+    return CacheStatsResponse(**summarize_cache_stats(counters, entries))
+
+@app.post("/cache/purge-stale", response_model=CachePurgeResponse)
+async def purge_stale_extraction_cache():
+    """
+    Queues deletion of cache entries written by another LLM model or
+    prompt version. Run once a deploy has finished rolling out: workers
+    still on the old version keep using their entries until then.
+    """
+    task = celery_app.send_task("app.celery_worker.purge_stale_extraction_cache")
+    return CachePurgeResponse(task_id=task.id)
+
+@app.delete("/cache", response_model=CacheInvalidationResponse)
+async def invalidate_extraction_cache(
+    file_hash: str | None = Query(default=None),
+    prompt_version: str | None = Query(default=None),
+    db: AsyncDatabase = Depends(get_db)
+):
+    """
+    Drops cached extractions. Without filters the whole cache is cleared,
+    which is what you want after changing the prompt or the schema.
+    """
+    query = build_invalidation_filter(file_hash, prompt_version)
+    result = await db[CACHE_COLLECTION].delete_many(query)
+    return CacheInvalidationResponse(deleted_count=result.deleted_count)
@@ -0,0 +1,180 @@
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server
+)
+
+# --- Configuration ---
+# Celery workers serve their metrics on this port (0 disables it)
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "9808"))
+# Set for prefork workers: every child process writes its samples
+# here and the parent's exporter aggregates them
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+TOKEN_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000)
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Pipeline stages timed by STAGE_DURATION
+STAGE_PDF_READ = "pdf_read"
+STAGE_LLM_CALL = "llm_call"
+STAGE_SCORING = "scoring"
+STAGE_DB_WRITE = "db_write"
+
+
+# --- Metrics ---
+
+STAGE_DURATION = Histogram(
+    "pactparser_stage_duration_seconds",
+    "Time spent in each processing stage",
+    ["stage"], buckets=STAGE_BUCKETS
+)
+LLM_TOKENS = Counter(
+    "pactparser_llm_tokens_total",
+    "LLM tokens used, as reported by the provider",
+    ["kind"]
+)
+LLM_CALL_TOKENS = Histogram(
+    "pactparser_llm_call_tokens",
+    "Tokens per LLM call (each Map-Reduce chunk is one call)",
+    ["kind"], buckets=TOKEN_BUCKETS
+)
+LLM_RATE_LIMIT_WAIT = Histogram(
+    "pactparser_llm_rate_limit_wait_seconds",
+    "Time LLM calls waited for rate limit capacity",
+    buckets=STAGE_BUCKETS
+)
+CONTRACT_FAILURES = Counter(
+    "pactparser_contract_failures_total",
+    "Contracts marked failed, by stage and root cause",
+    ["stage", "reason"]
+)
+TASK_RETRIES = Counter(
+    "pactparser_task_retries_total",
+    "Transient stage failures scheduled for retry",
+    ["stage", "reason"]
+)
+TASKS_IN_FLIGHT = Gauge(
+    "pactparser_tasks_in_flight",
+    "Celery tasks currently executing",
+    ["task"], multiprocess_mode="livesum"
+)
+QUEUE_DEPTH = Gauge(
+    "pactparser_queue_depth",
+    "Tasks waiting in each broker queue, sampled at scrape time",
+    ["queue"], multiprocess_mode="max"
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "pactparser_http_request_duration_seconds",
+    "API request latency by route",
+    ["method", "route", "status"], buckets=HTTP_BUCKETS
+)
+
+
+# --- Recording helpers ---
+
+@contextmanager
+def time_stage(stage: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_DURATION.labels(stage=stage).observe(time.perf_counter() - started)
+
+
+def failure_reason(exc: BaseException) -> str:
+    """
+    The class name of the innermost exception in the cause chain, so a
+    wrapped Groq timeout counts as APITimeoutError, not Exception.
+    """
+    seen = set()
+    while id(exc) not in seen:
+        seen.add(id(exc))
+        inner = exc.__cause__ or exc.__context__
+        if inner is None:
+            break
+        exc = inner
+    return type(exc).__name__
+
+
+def record_failure(stage: Optional[str], exc: BaseException):
+    CONTRACT_FAILURES.labels(stage=stage or "unknown", reason=failure_reason(exc)).inc()
+
+
+def record_retry(stage: Optional[str], exc: BaseException):
+    TASK_RETRIES.labels(stage=stage or "unknown", reason=failure_reason(exc)).inc()
+
+
+def record_llm_usage(message) -> None:
+    """
+    Counts prompt and completion tokens from an LLM response message.
+    """
+    usage = getattr(message, "usage_metadata", None) or {}
+    prompt = usage.get("input_tokens")
+    completion = usage.get("output_tokens")
+    if prompt is None:
+        token_usage = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+        prompt = token_usage.get("prompt_tokens")
+        completion = token_usage.get("completion_tokens")
+    for kind, count in (("prompt", prompt), ("completion", completion)):
+        if count:
+            LLM_TOKENS.labels(kind=kind).inc(count)
+            LLM_CALL_TOKENS.labels(kind=kind).observe(count)
+
+
+def record_queue_depths(depths: Dict[str, int]):
+    for queue, depth in depths.items():
+        QUEUE_DEPTH.labels(queue=queue).set(depth)
+
+
+# --- Exposition ---
+
+def _registry() -> CollectorRegistry:
+    if not MULTIPROC_DIR:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def render_latest() -> bytes:
+    return generate_latest(_registry())
+
+
+def reset_multiproc_dir():
+    """
+    Clears samples left by a previous run. Must happen before any worker
+    process starts writing.
+    """
+    if MULTIPROC_DIR:
+        shutil.rmtree(MULTIPROC_DIR, ignore_errors=True)
+        os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+
+def mark_process_dead(pid: int):
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
+
+
+def start_worker_exporter(port: int = WORKER_METRICS_PORT):
+    if port <= 0:
+        return
+    try:
+        start_http_server(port, registry=_registry())
+        print(f"📈 Serving worker metrics on :{port}/metrics")
+    except OSError as e:
+        # e.g. another worker on the same host already holds the port
+        print(f"⚠️ Warning: Worker metrics exporter not started. {e}")
+
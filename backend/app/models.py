@@ -1,8 +1,10 @@
 import uuid
 from datetime import datetime, timezone
-from typing import List, Literal, Optional
+from typing import Dict, List, Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
+
+from app.search import normalize_filename
 
 # --- Helper Classes ---
 
@@ -91,10 +93,18 @@ class ExtractedContractData(BaseModel):
 
 # --- 2. Database Schema ---
 
+class SegmentScore(BaseModel):
+    version: str
+    score: float
+    gaps: List[str] = Field(default_factory=list)
+
 class ContractDB(BaseModel):
     contract_id: str = Field(default_factory=lambda: str(uuid.uuid4()), unique=True, index=True)
     filename: str
-    storage_path: str = Field(description="Internal path where the original PDF is stored")
+    filename_lower: Optional[str] = Field(default=None, index=True, description="Normalized filename for indexed prefix search")
+    storage_path: str = Field(description="Where the original PDF is stored: a local path, or a gridfs:// or s3:// locator")
+    file_hash: Optional[str] = Field(default=None, description="SHA-256 of the uploaded PDF bytes")
+    file_size: Optional[int] = Field(default=None, description="Size of the uploaded PDF in bytes")
     
     status: str = Field(default=ContractStatus.PENDING, index=True)
     progress_percentage: int = Field(default=0)
@@ -103,11 +113,22 @@ class ContractDB(BaseModel):
     
     confidence_score: Optional[float] = Field(default=None, index=True)
     gap_analysis: Optional[List[str]] = Field(default_factory=list, description="List of missing critical fields")
+    scoring_version: Optional[str] = Field(default=None, index=True, description="Rule-set version that produced the score")
+    segment_scores: Optional[Dict[str, SegmentScore]] = Field(default=None, description="Scores under additional per-segment rule sets")
     
     error_message: Optional[str] = Field(default=None)
+    batch_id: Optional[str] = Field(default=None, index=True, description="Set when uploaded through the batch endpoint")
+    tenant_id: Optional[str] = Field(default=None, description="From the X-Tenant-ID header; used for fair scheduling")
+    trace_id: Optional[str] = Field(default=None, description="Trace of the request that last queued processing, when tracing is on")
     
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), index=True)
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = Field(default=None, description="When the contract last reached a terminal status")
+
+    @model_validator(mode="after")
+    def fill_filename_lower(self):
+        self.filename_lower = normalize_filename(self.filename)
+        return self
 
 # --- 3. API Schemas ---
 
@@ -128,10 +149,80 @@ class ContractListResponse(BaseModel):
     status: str
     confidence_score: Optional[float] = None
     created_at: datetime
+    relevance: Optional[float] = Field(default=None, description="Text search score, only set for `q` searches")
 
 class PaginatedContractList(BaseModel):
-    total_count: int
+    total_count: Optional[int] = Field(default=None, description="Null unless requested or cheaply estimable")
+    total_is_estimate: bool = False
     page: int
     page_size: int
+    next_cursor: Optional[str] = Field(default=None, description="Pass as `cursor` to fetch the next page")
     items: List[ContractListResponse]
 
+class CacheStatsResponse(BaseModel):
+    hits: int
+    misses: int
+    hit_ratio: float
+    entries: int
+
+class CacheInvalidationResponse(BaseModel):
+    deleted_count: int
+
+class CachePurgeResponse(BaseModel):
+    task_id: str
+
+class ContractTextResponse(BaseModel):
+    contract_id: str
+    page_count: int
+    pages: List[str]
+
+class RejectedFile(BaseModel):
+    filename: str
+    reason: str
+
+class BatchUploadResponse(BaseModel):
+    batch_id: str
+    accepted_count: int
+    rejected: List[RejectedFile]
+    contracts: List[UploadResponse]
+
+class BatchStatusResponse(BaseModel):
+    batch_id: str
+    total_count: int
+    status_counts: Dict[str, int]
+    progress_percentage: float
+    is_finished: bool
+
+class RescoreResponse(BaseModel):
+    task_id: str
+
+class ScoreBucket(BaseModel):
+    lower: int
+    upper: int
+    count: int
+
+class GapFrequency(BaseModel):
+    message: str
+    count: int
+
+class HourlyThroughput(BaseModel):
+    hour: datetime
+    completed: int
+    failed: int
+
+class ContractStatsResponse(BaseModel):
+    total_count: int
+    status_counts: Dict[str, int] = Field(description="Queued and processing contracts are counted as 'in_progress'")
+    average_score: Optional[float] = None
+    score_histogram: List[ScoreBucket]
+    gap_counts: List[GapFrequency] = Field(description="Completed contracts reporting each gap, most frequent first")
+    throughput: List[HourlyThroughput]
+    rebuilt_at: Optional[datetime] = None
+
+class StatsRebuildResponse(BaseModel):
+    task_id: str
+
+class QueueDepthResponse(BaseModel):
+    lanes: Dict[str, int] = Field(description="Tasks waiting per lane, not counting those already reserved by a worker")
+    queues: Dict[str, int] = Field(default_factory=dict, description="Tasks waiting per stage queue, e.g. 'pdf.bulk'")
+    total: int
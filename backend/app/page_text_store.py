@@ -0,0 +1,64 @@
+import json
+import zlib
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from bson.binary import Binary
+from pymongo.database import Database
+
+# --- Configuration ---
+PAGE_TEXT_COLLECTION = "page_texts"
+# Stay well clear of MongoDB's 16MB document limit
+MAX_COMPRESSED_BYTES = 15 * 1024 * 1024
+
+
+def encode_pages(pages: List[str]) -> bytes:
+    return zlib.compress(json.dumps(pages).encode("utf-8"), 6)
+
+
+def decode_pages(doc: dict) -> List[str]:
+    """
+    Turns a stored page_texts document back into the list of page texts.
+    """
+    return json.loads(zlib.decompress(doc["data"]).decode("utf-8"))
+
+
+def load_page_text(db: Database, file_hash: str) -> Optional[List[str]]:
+    """
+    Returns the previously extracted pages for a PDF, or None if this
+    document has never been parsed.
+    """
+    doc = db[PAGE_TEXT_COLLECTION].find_one({"_id": file_hash}, {"data": 1})
+    if doc is None:
+        return None
+    return decode_pages(doc)
+
+
+def has_page_text(db: Database, file_hash: str) -> bool:
+    """
+    Whether the page text of a PDF is stored, without loading it.
+    """
+    return db[PAGE_TEXT_COLLECTION].find_one({"_id": file_hash}, {"_id": 1}) is not None
+
+
+def save_page_text(db: Database, file_hash: str, pages: List[str]) -> bool:
+    """
+    Stores the per-page text once per document hash, zlib-compressed.
+    Returns False if the artifact was too large to keep.
+    """
+    data = encode_pages(pages)
+    if len(data) > MAX_COMPRESSED_BYTES:
+        print(f"⚠️ Page text for {file_hash[:12]} is {len(data)} bytes compressed, not persisting.")
+        return False
+
+    db[PAGE_TEXT_COLLECTION].update_one(
+        {"_id": file_hash},
+        {"$setOnInsert": {
+            "data": Binary(data),
+            "page_count": len(pages),
+            "compressed_size": len(data),
+            "created_at": datetime.now(timezone.utc)
+        }},
+        upsert=True
+    )
+    return True
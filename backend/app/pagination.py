@@ -0,0 +1,43 @@
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+# Sort order shared by the list endpoint and its compound indexes.
+# contract_id breaks ties between contracts created in the same millisecond.
+LIST_SORT = [("created_at", -1), ("contract_id", -1)]
+
+
+class InvalidCursor(Exception):
+    """The next-page token could not be decoded."""
+
+
+def encode_cursor(doc: dict) -> str:
+    """
+    Builds an opaque next-page token from the last document of a page.
+    """
+    payload = {"t": doc["created_at"].isoformat(), "id": doc["contract_id"]}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[datetime, str]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(payload["t"]), str(payload["id"])
+    except Exception as e:
+        raise InvalidCursor(f"Invalid pagination cursor: {e}")
+
+
+def after_cursor_filter(token: str) -> dict:
+    """
+    Keyset condition selecting everything strictly after the cursor in
+    LIST_SORT order. Served directly by the (created_at, contract_id)
+    indexes, so its cost does not grow with the page number.
+    """
+    created_at, contract_id = decode_cursor(token)
+    return {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "contract_id": {"$lt": contract_id}}
+    ]}
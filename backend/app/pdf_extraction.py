@@ -0,0 +1,141 @@
+import os
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
+
+from pypdf import PdfReader
+
+from app.celery_app import WORKER_POOL
+
+# --- Configuration ---
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+# Below this page count, starting worker processes costs more than it saves
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "32"))
+GREEN_POOLS = ("eventlet", "gevent")
+
+# "spawn" gives every worker a clean interpreter: no inherited Mongo
+# client or Celery state from the parent.
+_mp_context = multiprocessing.get_context("spawn")
+
+# One pool per worker process, started on first use and kept for its
+# lifetime, so a document doesn't pay for starting interpreters
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+# Child-side: the reader of the document this process last worked on
+_child_reader: Optional[Tuple[str, PdfReader]] = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=PDF_EXTRACT_WORKERS, mp_context=_mp_context)
+    return _pool
+
+
+def _reset_pool():
+    """
+    Drops a pool whose processes died, so the next document starts a new one.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _extract_range(file_path: str, start: int, stop: int) -> List[str]:
+    """
+    Runs in a pool process. Keeps the reader between calls, so ranges of
+    the same document handled by one process share a single parse.
+    """
+    global _child_reader
+    if _child_reader is None or _child_reader[0] != file_path:
+        _child_reader = (file_path, PdfReader(file_path))
+    return _extract_reader_range(_child_reader[1], start, stop)
+
+
+def _extract_reader_range(reader: PdfReader, start: int, stop: int) -> List[str]:
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def count_pages(reader: PdfReader) -> int:
+    """
+    Reads the page count from the document catalog (/Root /Pages /Count)
+    instead of walking the whole page tree; falls back to the walk for
+    files whose catalog is missing or wrong.
+    """
+    try:
+        count = int(reader.trailer["/Root"]["/Pages"]["/Count"])
+        if count > 0:
+            return count
+    except Exception:
+        pass
+    return len(reader.pages)
+
+
+def split_page_ranges(page_count: int, parts: int) -> List[Tuple[int, int]]:
+    """
+    Splits [0, page_count) into at most `parts` contiguous, near-equal ranges.
+    """
+    parts = max(1, min(parts, page_count))
+    base, extra = divmod(page_count, parts)
+    ranges = []
+    start = 0
+    for i in range(parts):
+        stop = start + base + (1 if i < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def _extract_parallel(file_path: str, ranges: List[Tuple[int, int]]) -> List[str]:
+    """
+    Hands one page range to each pool process and collects results in order.
+    """
+    futures = [_get_pool().submit(_extract_range, file_path, start, stop) for start, stop in ranges]
+    pages: List[str] = []
+    try:
+        for future in futures:
+            pages.extend(future.result())
+    except BrokenProcessPool:
+        _reset_pool()
+        raise
+    finally:
+        for future in futures:
+            future.cancel()
+    return pages
+
+
+def _can_start_processes() -> bool:
+    """
+    Daemonic processes (Celery prefork children) may not start their
+    own, and the pool's helper threads deadlock under a green pool's
+    monkey-patching. Large documents go to the solo-pool pdf.bulk worker.
+    """
+    return not multiprocessing.current_process().daemon and WORKER_POOL not in GREEN_POOLS
+
+
+def extract_pages(file_path: str, workers: int = PDF_EXTRACT_WORKERS,
+                  page_count: Optional[int] = None) -> List[str]:
+    """
+    Extracts the text of every page, in page order. Large documents are
+    split across the worker's process pool; small ones are read
+    in-process. Pass `page_count` when it's already known.
+    """
+    reader = PdfReader(file_path)
+    if page_count is None:
+        page_count = count_pages(reader)
+    if workers <= 1 or page_count < PDF_PARALLEL_MIN_PAGES or not _can_start_processes():
+        return _extract_reader_range(reader, 0, len(reader.pages))
+
+    ranges = split_page_ranges(page_count, min(workers, PDF_EXTRACT_WORKERS))
+    try:
+        return _extract_parallel(file_path, ranges)
+    except (BrokenProcessPool, OSError, IndexError) as e:
+        print(f"⚠️ Parallel PDF extraction unavailable ({e}), reading in-process.")
+        return _extract_reader_range(reader, 0, len(reader.pages))
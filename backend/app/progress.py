@@ -0,0 +1,243 @@
+import os
+import asyncio
+import json
+import time
+from typing import Callable, Dict, List, Optional, Set
+
+import redis
+import redis.asyncio as aioredis
+
+from app.celery_app import settings
+from app.models import ContractStatus
+
+# --- Configuration ---
+PROGRESS_CHANNEL_PREFIX = "contract-progress:"
+PROGRESS_STATE_PREFIX = "contract-progress-state:"
+PROGRESS_CHECKPOINT_PREFIX = "contract-progress-checkpoint:"
+PROGRESS_TTL_SECONDS = int(os.getenv("PROGRESS_TTL_SECONDS", "3600"))
+# Minimum gap between non-terminal progress writes to MongoDB
+PROGRESS_CHECKPOINT_SECONDS = float(os.getenv("PROGRESS_CHECKPOINT_SECONDS", "30"))
+TERMINAL_STATUSES = {ContractStatus.COMPLETED, ContractStatus.FAILED}
+# contract_id used by events that concern every contract (e.g. rescoring)
+ALL_CONTRACTS = "*"
+
+
+def progress_channel(contract_id: str) -> str:
+    return f"{PROGRESS_CHANNEL_PREFIX}{contract_id}"
+
+
+def progress_state_key(contract_id: str) -> str:
+    return f"{PROGRESS_STATE_PREFIX}{contract_id}"
+
+
+def progress_checkpoint_key(contract_id: str) -> str:
+    return f"{PROGRESS_CHECKPOINT_PREFIX}{contract_id}"
+
+
+# --- 1. Publisher (Celery worker, sync) ---
+
+_publisher: Optional[redis.Redis] = None
+
+
+def _get_publisher() -> redis.Redis:
+    global _publisher
+    if _publisher is None:
+        _publisher = redis.Redis.from_url(settings.REDIS_CONNECTION_STRING)
+    return _publisher
+
+
+def publish_progress(
+    contract_id: str,
+    status: str,
+    progress_percentage: int,
+    error_message: Optional[str] = None
+):
+    """
+    Records the latest progress in Redis (with a TTL) and announces the
+    transition to every API process, in one round-trip. This is the fast
+    store for transient progress; MongoDB only receives checkpoints and
+    terminal states. Best effort: a Redis hiccup must never fail the
+    contract itself.
+    """
+    event = json.dumps({
+        "contract_id": contract_id,
+        "status": status,
+        "progress_percentage": progress_percentage,
+        "error_message": error_message
+    })
+    try:
+        pipe = _get_publisher().pipeline(transaction=False)
+        pipe.set(progress_state_key(contract_id), event, ex=PROGRESS_TTL_SECONDS)
+        pipe.publish(progress_channel(contract_id), event)
+        pipe.execute()
+    except Exception as e:
+        print(f"⚠️ Warning: Failed to publish progress for {contract_id}. {e}")
+
+
+def publish_contracts_changed():
+    """
+    Tells every API process that stored contracts changed in bulk, so
+    per-contract caches must be dropped wholesale.
+    """
+    event = json.dumps({"contract_id": ALL_CONTRACTS, "status": None, "progress_percentage": None})
+    try:
+        _get_publisher().publish(progress_channel(ALL_CONTRACTS), event)
+    except Exception as e:
+        print(f"⚠️ Warning: Failed to publish bulk change. {e}")
+
+
+class ProgressCheckpointer:
+    """
+    Decides when a non-terminal progress update is also written to
+    MongoDB: the first one (so the record leaves 'pending') and then at
+    most once every PROGRESS_CHECKPOINT_SECONDS.
+
+    The schedule is per contract, not per task: a Redis key set with NX
+    and the interval as its TTL, so each stage task of the chain doesn't
+    checkpoint again on its first update.
+    """
+
+    def __init__(self, contract_id: str, interval: float = PROGRESS_CHECKPOINT_SECONDS,
+                 client: Optional[redis.Redis] = None):
+        self.key = progress_checkpoint_key(contract_id)
+        self.interval = interval
+        self._client = client
+        self._last = None
+
+    def due(self) -> bool:
+        try:
+            client = self._client or _get_publisher()
+            return bool(client.set(self.key, 1, nx=True, px=max(1, int(self.interval * 1000))))
+        except Exception as e:
+            print(f"⚠️ Warning: Progress checkpoint lookup failed, using this task's clock. {e}")
+        now = time.monotonic()
+        if self._last is None or now - self._last >= self.interval:
+            self._last = now
+            return True
+        return False
+
+
+# --- 2. Fast-store reads (FastAPI, async) ---
+
+_reader: Optional[aioredis.Redis] = None
+
+
+def _get_reader() -> aioredis.Redis:
+    global _reader
+    if _reader is None:
+        _reader = aioredis.Redis.from_url(settings.REDIS_CONNECTION_STRING, decode_responses=True)
+    return _reader
+
+
+async def get_live_progress(contract_id: str) -> Optional[dict]:
+    """
+    Returns the latest progress event from Redis, or None if it expired,
+    was never written, or Redis is unavailable (callers fall back to Mongo).
+    """
+    try:
+        raw = await _get_reader().get(progress_state_key(contract_id))
+    except Exception as e:
+        print(f"⚠️ Warning: Progress lookup failed for {contract_id}. {e}")
+        return None
+    return json.loads(raw) if raw else None
+
+
+async def get_live_progress_many(contract_ids: List[str]) -> Dict[str, dict]:
+    """
+    Latest progress events for many contracts in one MGET, keyed by
+    contract_id. Contracts without a live state are left out.
+    """
+    if not contract_ids:
+        return {}
+    try:
+        raws = await _get_reader().mget([progress_state_key(cid) for cid in contract_ids])
+    except Exception as e:
+        print(f"⚠️ Warning: Progress lookup failed for {len(contract_ids)} contracts. {e}")
+        return {}
+    return {cid: json.loads(raw) for cid, raw in zip(contract_ids, raws) if raw}
+
+
+# --- 3. Broker (FastAPI, async) ---
+
+class ProgressBroker:
+    """
+    Holds ONE pattern subscription per API process and fans events out
+    to in-process subscriber queues, so a thousand open dashboards cost
+    one Redis connection rather than a thousand.
+    """
+
+    def __init__(self, redis_url: str = settings.REDIS_CONNECTION_STRING):
+        self._redis_url = redis_url
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._listeners: List[Callable[[dict], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def add_listener(self, callback: Callable[[dict], None]):
+        """
+        Registers a callback run for EVERY progress event, e.g. to evict
+        per-contract caches when a worker touches that contract.
+        """
+        self._listeners.append(callback)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _listen(self):
+        while True:
+            client = aioredis.Redis.from_url(self._redis_url, decode_responses=True)
+            pubsub = client.pubsub()
+            try:
+                await pubsub.psubscribe(f"{PROGRESS_CHANNEL_PREFIX}*")
+                # Events published while we were not subscribed are lost:
+                # have listeners drop everything they cached
+                self._notify_listeners({"contract_id": ALL_CONTRACTS, "status": None, "progress_percentage": None})
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    self._dispatch(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Progress subscription dropped, reconnecting. {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+                await client.aclose()
+
+    def _notify_listeners(self, event: dict):
+        for callback in self._listeners:
+            callback(event)
+
+    def _dispatch(self, event: dict):
+        self._notify_listeners(event)
+        for queue in self._subscribers.get(event["contract_id"], ()):
+            queue.put_nowait(event)
+
+    def subscribe(self, contract_id: str) -> asyncio.Queue:
+        """
+        Returns a queue receiving every progress event for one contract.
+        Always pair with unsubscribe().
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(contract_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, contract_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(contract_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[contract_id]
+
+
+progress_broker = ProgressBroker()
@@ -0,0 +1,59 @@
+from typing import Dict
+
+from app.models import (
+    ContractDB,
+    ExtractedContractData,
+    ContractListResponse,
+    StatusResponse
+)
+
+# --- Fixed projections for the read endpoints ---
+# Only the fields each response actually uses leave MongoDB, which keeps
+# extracted_data and gap_analysis off the wire for list-heavy traffic.
+
+def _projection_for(model, exclude=()) -> Dict[str, int]:
+    projection = {name: 1 for name in model.model_fields if name not in exclude}
+    projection["_id"] = 0
+    return projection
+
+LIST_PROJECTION = _projection_for(ContractListResponse, exclude=("relevance",))
+STATUS_PROJECTION = _projection_for(StatusResponse)
+DOWNLOAD_PROJECTION = {"_id": 0, "storage_path": 1, "filename": 1, "file_hash": 1}
+DETAIL_GUARD_FIELDS = ("contract_id", "status")
+
+
+class InvalidFieldSelection(Exception):
+    """A requested field is not part of the contract schema."""
+
+
+def build_field_projection(fields: str) -> Dict[str, int]:
+    """
+    Turns a `fields=` query value into a MongoDB projection.
+
+    Top-level ContractDB fields are used as-is; sections of
+    ExtractedContractData (e.g. `financial_details`) may be named
+    directly or as `extracted_data.financial_details`. contract_id and
+    status are always included because the endpoint needs them.
+    """
+    projection = {name: 1 for name in DETAIL_GUARD_FIELDS}
+    for raw in fields.split(","):
+        name = raw.strip()
+        if not name:
+            continue
+        if name.startswith("extracted_data."):
+            name = name[len("extracted_data."):]
+            if name not in ExtractedContractData.model_fields:
+                raise InvalidFieldSelection(f"Unknown field: extracted_data.{name}")
+            projection[f"extracted_data.{name}"] = 1
+        elif name in ContractDB.model_fields:
+            projection[name] = 1
+        elif name in ExtractedContractData.model_fields:
+            projection[f"extracted_data.{name}"] = 1
+        else:
+            raise InvalidFieldSelection(f"Unknown field: {name}")
+
+    # A parent and its child in one projection is a MongoDB path collision
+    if "extracted_data" in projection:
+        projection = {k: v for k, v in projection.items() if not k.startswith("extracted_data.")}
+    projection["_id"] = 0
+    return projection
@@ -0,0 +1,107 @@
+import time
+
+import redis
+
+from app.celery_app import settings
+
+# --- Token Bucket (runs atomically inside Redis) ---
+#
+# KEYS[1] = request bucket, KEYS[2] = token bucket
+# ARGV    = rpm, tpm, token cost
+# Both buckets refill continuously at limit/60 per second and hold at most
+# one minute of budget. A call is admitted only if BOTH buckets can pay for
+# it; otherwise nothing is deducted and the script returns how many
+# milliseconds the caller should wait before trying again.
+TOKEN_BUCKET_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+
+local function refill(key, capacity)
+    local state = redis.call('HMGET', key, 'level', 'ts')
+    local level = tonumber(state[1])
+    local ts = tonumber(state[2])
+    if level == nil then
+        return capacity
+    end
+    local elapsed = math.max(0, now - ts)
+    return math.min(capacity, level + elapsed * capacity / 60000)
+end
+
+local rpm = tonumber(ARGV[1])
+local tpm = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+
+local requests = refill(KEYS[1], rpm)
+local tokens = refill(KEYS[2], tpm)
+
+if requests >= 1 and tokens >= cost then
+    redis.call('HSET', KEYS[1], 'level', requests - 1, 'ts', now)
+    redis.call('HSET', KEYS[2], 'level', tokens - cost, 'ts', now)
+    redis.call('PEXPIRE', KEYS[1], 120000)
+    redis.call('PEXPIRE', KEYS[2], 120000)
+    return 0
+end
+
+local wait_requests = 0
+if requests < 1 then
+    wait_requests = (1 - requests) * 60000 / rpm
+end
+local wait_tokens = 0
+if tokens < cost then
+    wait_tokens = (cost - tokens) * 60000 / tpm
+end
+return math.ceil(math.max(wait_requests, wait_tokens))
+"""
+
+
+class RateLimitTimeout(Exception):
+    """Raised when capacity did not free up within the allowed wait."""
+
+
+class RedisRateLimiter:
+    """
+    Cluster-wide limiter shared by every worker process and greenlet.
+    Budgets requests per minute and tokens per minute for one provider
+    and model, and blocks the caller until both budgets allow the call.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_wait_seconds: float = 300.0,
+        redis_url: str = settings.REDIS_CONNECTION_STRING,
+    ):
+        self.requests_key = f"ratelimit:{name}:rpm"
+        self.tokens_key = f"ratelimit:{name}:tpm"
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_wait_seconds = max_wait_seconds
+        self._redis = redis.Redis.from_url(redis_url)
+        self._script = self._redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def acquire(self, tokens: int) -> float:
+        """
+        Waits until the call fits in both budgets. Returns the number of
+        seconds spent waiting.
+        """
+        # A single request larger than the whole minute budget could never
+        # be admitted, so it is charged the full bucket instead.
+        cost = max(1, min(tokens, self.tokens_per_minute))
+        started = time.monotonic()
+        while True:
+            wait_ms = int(self._script(
+                keys=[self.requests_key, self.tokens_key],
+                args=[self.requests_per_minute, self.tokens_per_minute, cost]
+            ))
+            waited = time.monotonic() - started
+            if wait_ms == 0:
+                return waited
+            if waited + wait_ms / 1000 > self.max_wait_seconds:
+                raise RateLimitTimeout(
+                    f"No LLM capacity after waiting {waited:.1f}s "
+                    f"({self.requests_per_minute} RPM / {self.tokens_per_minute} TPM)."
+                )
+            # Under eventlet this yields to other greenlets
+            time.sleep(wait_ms / 1000)
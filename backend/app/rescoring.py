@@ -0,0 +1,127 @@
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List
+
+import numpy as np
+from pymongo import UpdateOne
+from pymongo.database import Database
+
+from app.models import ContractStatus
+from app.scoring import (
+    PRIMARY_RULE_SET,
+    RULE_SETS,
+    RULES_EXTRACTOR,
+    SCORING_VERSION,
+    score_contract,
+    validate_extracted_data
+)
+
+# --- Configuration ---
+RESCORE_BATCH_SIZE = 5000
+
+
+def score_batch(extracted: List[dict]) -> Dict[str, tuple]:
+    """
+    Scores a batch of extracted_data dicts column-wise under every
+    loaded rule set, sharing one feature pass per document.
+
+    Returns {rule set name: (scores, gap_matrix)}: a float array of shape
+    (n,) and a boolean array of shape (len(gap_messages), n). Documents
+    must already be normalized by validate_extracted_data, as
+    score_contract does; then the results match score_contract.
+    """
+    features = RULES_EXTRACTOR.matrix(extracted)
+    return {rs.name: rs.evaluate_matrix(features, RULES_EXTRACTOR) for rs in RULE_SETS}
+
+
+def _iter_batches(db: Database, batch_size: int, only_outdated: bool) -> Iterator[List[dict]]:
+    query = {"status": ContractStatus.COMPLETED, "extracted_data": {"$ne": None}}
+    if only_outdated:
+        query["scoring_version"] = {"$ne": SCORING_VERSION}
+    cursor = db.contracts.find(
+        query,
+        {"_id": 0, "contract_id": 1, "extracted_data": 1}
+    ).batch_size(batch_size)
+
+    batch = []
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _vectorized_fields(normalized: List[dict]) -> List[dict]:
+    results = score_batch(normalized)
+    messages = {rs.name: np.array(rs.gap_messages, dtype=object) for rs in RULE_SETS}
+
+    def unpack(name, i):
+        scores, gap_matrix = results[name]
+        return float(scores[i]), list(messages[name][gap_matrix[:, i]])
+
+    fields = []
+    for i in range(len(normalized)):
+        score, gaps = unpack(PRIMARY_RULE_SET.name, i)
+        update = {"confidence_score": score, "gap_analysis": gaps, "scoring_version": SCORING_VERSION}
+        if len(RULE_SETS) > 1:
+            update["segment_scores"] = {}
+            for rs in RULE_SETS:
+                seg_score, seg_gaps = unpack(rs.name, i)
+                update["segment_scores"][rs.name] = {"version": rs.version, "score": seg_score, "gaps": seg_gaps}
+        fields.append(update)
+    return fields
+
+
+def rescore_all(
+    db: Database,
+    batch_size: int = RESCORE_BATCH_SIZE,
+    only_outdated: bool = True
+) -> Dict[str, float]:
+    """
+    Recomputes the scoring fields of completed contracts from their
+    stored extracted_data, without calling the LLM. By default only
+    contracts whose scoring_version differs from the current primary
+    rule set are touched.
+
+    Every document is validated through ExtractedContractData first,
+    exactly as score_contract does; only the scoring arithmetic is
+    vectorized. Documents that fail validation go through score_contract
+    for their critical parse error. Results are written back with
+    unordered bulk_writes.
+    """
+    started = time.monotonic()
+    processed = 0
+
+    for batch in _iter_batches(db, batch_size, only_outdated):
+        now = datetime.now(timezone.utc)
+        fast, normalized, slow = [], [], []
+        for doc in batch:
+            data, error = validate_extracted_data(doc["extracted_data"])
+            if error:
+                slow.append(doc)
+            else:
+                fast.append(doc)
+                normalized.append(data)
+
+        ops = []
+        if fast:
+            for doc, fields in zip(fast, _vectorized_fields(normalized)):
+                ops.append(UpdateOne(
+                    {"contract_id": doc["contract_id"]},
+                    {"$set": {**fields, "updated_at": now}}
+                ))
+        for doc in slow:
+            ops.append(UpdateOne(
+                {"contract_id": doc["contract_id"]},
+                {"$set": {**score_contract(doc["extracted_data"]), "updated_at": now}}
+            ))
+
+        if ops:
+            db.contracts.bulk_write(ops, ordered=False)
+        processed += len(batch)
+        print(f"Rescored {processed} contracts...")
+
+    elapsed = time.monotonic() - started
+    return {"processed": processed, "seconds": round(elapsed, 2), "scoring_version": SCORING_VERSION}
@@ -0,0 +1,87 @@
+import os
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+# --- Configuration ---
+CONTRACT_CACHE_SIZE = int(os.getenv("CONTRACT_CACHE_SIZE", "1024"))
+# Backstop for a missed eviction event: entries are never served older than this
+CONTRACT_CACHE_MAX_AGE_SECONDS = float(os.getenv("CONTRACT_CACHE_MAX_AGE_SECONDS", "60"))
+
+
+def make_etag(body: bytes) -> str:
+    """
+    Strong ETag derived from the exact response bytes.
+    """
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Implements the If-None-Match comparison (weak comparison, as
+    RFC 9110 requires for this header).
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+class CompletedContractCache:
+    """
+    Bounded LRU of serialized completed contracts, keyed by contract_id.
+
+    A completed contract only changes when it is reprocessed, and every
+    reprocessing run publishes progress events; the API evicts on each
+    of them. Entries also expire after max_age seconds, in case an event
+    was missed. Accessed only from the event loop, so no lock is needed.
+
+    Every eviction bumps `generation`. A reader takes it before its
+    database read and passes it to put(), which drops the entry if an
+    eviction happened in between: the document read may predate it.
+    """
+
+    def __init__(self, max_entries: int = CONTRACT_CACHE_SIZE,
+                 max_age: float = CONTRACT_CACHE_MAX_AGE_SECONDS):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries: "OrderedDict[str, Tuple[bytes, str, float]]" = OrderedDict()
+        self.generation = 0
+
+    def get(self, contract_id: str) -> Optional[Tuple[bytes, str]]:
+        entry = self._entries.get(contract_id)
+        if entry is None:
+            return None
+        body, etag, stored_at = entry
+        if time.monotonic() - stored_at > self.max_age:
+            del self._entries[contract_id]
+            return None
+        self._entries.move_to_end(contract_id)
+        return body, etag
+
+    def put(self, contract_id: str, body: bytes, etag: str, generation: Optional[int] = None):
+        if self.max_entries <= 0:
+            return
+        if generation is not None and generation != self.generation:
+            return
+        self._entries[contract_id] = (body, etag, time.monotonic())
+        self._entries.move_to_end(contract_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, contract_id: str):
+        self.generation += 1
+        self._entries.pop(contract_id, None)
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+completed_contract_cache = CompletedContractCache()
@@ -0,0 +1,178 @@
+import os
+import random
+import socket
+import uuid
+from typing import Optional, Tuple, Type
+
+import httpx
+import redis
+from pymongo.errors import AutoReconnect, NetworkTimeout
+
+from app.celery_app import settings
+from app.rate_limiter import RateLimitTimeout
+
+# --- Configuration ---
+TASK_MAX_RETRIES = int(os.getenv("TASK_MAX_RETRIES", "5"))
+RETRY_BACKOFF_BASE_SECONDS = float(os.getenv("RETRY_BACKOFF_BASE_SECONDS", "2"))
+RETRY_BACKOFF_MAX_SECONDS = float(os.getenv("RETRY_BACKOFF_MAX_SECONDS", "120"))
+# Must outlast the slowest stage (LLM call plus rate-limit waits)
+STAGE_LOCK_TTL_SECONDS = int(os.getenv("STAGE_LOCK_TTL_SECONDS", "900"))
+# How long a finished stage is remembered, to drop late duplicate deliveries
+STAGE_DONE_TTL_SECONDS = int(os.getenv("STAGE_DONE_TTL_SECONDS", str(24 * 3600)))
+STAGE_LOCK_PREFIX = "stage-lock:"
+STAGE_DONE_PREFIX = "stage-done:"
+
+
+# --- 1. Retry policy ---
+
+def _transient_errors() -> Tuple[Type[BaseException], ...]:
+    errors = [
+        RateLimitTimeout,
+        TimeoutError,
+        ConnectionError,  # includes ConnectionResetError / ConnectionRefusedError
+        socket.timeout,
+        httpx.TimeoutException,
+        httpx.TransportError,
+        AutoReconnect,
+        NetworkTimeout,
+        redis.exceptions.ConnectionError,
+        redis.exceptions.TimeoutError,
+    ]
+    try:
+        import groq
+        errors += [
+            groq.RateLimitError,
+            groq.APITimeoutError,
+            groq.APIConnectionError,
+            groq.InternalServerError,
+        ]
+    except ImportError:
+        pass
+    return tuple(errors)
+
+
+TRANSIENT_ERRORS = _transient_errors()
+
+
+def is_retryable(exc: Optional[BaseException]) -> bool:
+    """
+    True if the error, or anything it was raised from, is transient:
+    rate limits, timeouts, connection resets, 5xx from the LLM API.
+    Wrapper exceptions (e.g. "Failed to parse text with LLM") are
+    unwrapped through __cause__ / __context__.
+    """
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        if isinstance(exc, TRANSIENT_ERRORS):
+            return True
+        seen.add(id(exc))
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def backoff_delay(retries: int) -> float:
+    """
+    Exponential backoff with full jitter: uniform in
+    [0, min(max, base * 2^retries)], so retries of many contracts that
+    failed together don't hit the API again in lockstep.
+    """
+    ceiling = min(RETRY_BACKOFF_MAX_SECONDS, RETRY_BACKOFF_BASE_SECONDS * (2 ** retries))
+    return round(random.uniform(0, ceiling), 2)
+
+
+# --- 2. Idempotency guard ---
+
+# Outcomes of StageLock.acquire()
+LOCK_ACQUIRED = "acquired"
+LOCK_BUSY = "busy"
+STAGE_DONE = "done"
+
+# Lock values are "<token>|<task id>|<attempt>". The lock is free to take
+# unless this run already finished the stage, or it is held by anything
+# other than an EARLIER attempt of the same task (a retry supersedes the
+# attempt that scheduled it; a redelivered message has the same attempt).
+ACQUIRE_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    return 2
+end
+local current = redis.call('GET', KEYS[1])
+if current then
+    local task_id, attempt = string.match(current, '^[^|]*|(.*)|(%d+)$')
+    if task_id ~= ARGV[2] or tonumber(attempt) >= tonumber(ARGV[3]) then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[4])
+return 1
+"""
+
+# Records the stage as done (on success) and deletes the lock if we still own it
+RELEASE_SCRIPT = """
+if ARGV[2] == '1' then
+    redis.call('SET', KEYS[2], '1', 'EX', ARGV[3])
+end
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_client: Optional[redis.Redis] = None
+
+
+def _get_client() -> redis.Redis:
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.REDIS_CONNECTION_STRING, decode_responses=True)
+    return _client
+
+
+class StageLock:
+    """
+    Ensures a pipeline stage runs at most once per pipeline run.
+
+    Every execution holds the lock under its own token, so a redelivered
+    message (same task id, same attempt) can't run alongside the
+    original; only a later retry of the task may take over. A stage that
+    finished is remembered per run (`run_id`, the chain's root task id),
+    so a late duplicate is dropped instead of re-enqueuing the stages
+    after it.
+    """
+
+    def __init__(self, contract_id: str, stage: str, run_id: str, task_id: str, attempt: int = 0,
+                 ttl: int = STAGE_LOCK_TTL_SECONDS, client: Optional[redis.Redis] = None):
+        self.key = f"{STAGE_LOCK_PREFIX}{contract_id}:{stage}"
+        self.done_key = f"{STAGE_DONE_PREFIX}{contract_id}:{run_id}:{stage}"
+        self.task_id = task_id or ""
+        self.attempt = attempt or 0
+        self.token = f"{uuid.uuid4().hex}|{self.task_id}|{self.attempt}"
+        self.ttl = ttl
+        self._client = client
+
+    def _redis(self) -> redis.Redis:
+        return self._client or _get_client()
+
+    def acquire(self) -> str:
+        """
+        Returns LOCK_ACQUIRED, LOCK_BUSY (another execution holds it) or
+        STAGE_DONE (this run already finished the stage).
+        """
+        try:
+            result = int(self._redis().eval(
+                ACQUIRE_SCRIPT, 2, self.key, self.done_key,
+                self.token, self.task_id, self.attempt, self.ttl
+            ))
+        except redis.exceptions.RedisError as e:
+            # Without Redis we can't coordinate; running beats stalling
+            print(f"⚠️ Warning: Stage lock unavailable for {self.key}. {e}")
+            return LOCK_ACQUIRED
+        return {1: LOCK_ACQUIRED, 2: STAGE_DONE}.get(result, LOCK_BUSY)
+
+    def release(self, done: bool = False):
+        try:
+            self._redis().eval(
+                RELEASE_SCRIPT, 2, self.key, self.done_key,
+                self.token, "1" if done else "0", STAGE_DONE_TTL_SECONDS
+            )
+        except redis.exceptions.RedisError as e:
+            print(f"⚠️ Warning: Failed to release stage lock {self.key}. {e}")
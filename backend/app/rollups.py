@@ -0,0 +1,263 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from pymongo.database import Database
+
+from app.models import ContractStatus
+
+# --- Configuration ---
+ROLLUP_COLLECTION = "contract_stats"
+HOURLY_COLLECTION = "contract_stats_hourly"
+TOTALS_DOC_ID = "totals"
+SCORE_BUCKET_WIDTH = 10
+CRITICAL_GAP_PREFIX = "Critical parse error"
+# Queued and processing contracts are counted together: the worker only
+# checkpoints 'processing' to Mongo, so it is not a reliable state to count
+IN_PROGRESS = "in_progress"
+TERMINAL_STATUSES = (ContractStatus.COMPLETED, ContractStatus.FAILED)
+
+# Fields of a contract that contribute to the rollups
+ROLLUP_PROJECTION = {"_id": 0, "status": 1, "confidence_score": 1, "gap_analysis": 1}
+
+# Rollup layout
+# contract_stats  {_id: "totals",
+#                  status_counts: {in_progress, completed, failed},
+#                  score_histogram: {"b00": n, ..., "b90": n},
+#                  score_sum, scored_count,
+#                  gap_counts: {<key>: n}, gap_labels: {<key>: message}}
+# contract_stats_hourly  {_id: <hour start>, completed: n, failed: n}
+#
+# Every write to a contract's rollup fields applies
+# contribution(after) - contribution(before) with one $inc, so reading
+# the stats is a single-document fetch regardless of collection size.
+
+
+def _status_bucket(status: Optional[str]) -> str:
+    return status if status in TERMINAL_STATUSES else IN_PROGRESS
+
+
+def score_bucket(score: float) -> str:
+    """
+    Histogram key for a 0-100 score: b00 covers [0, 10), ..., b90 covers [90, 100].
+    """
+    lower = min(int(score // SCORE_BUCKET_WIDTH) * SCORE_BUCKET_WIDTH, 100 - SCORE_BUCKET_WIDTH)
+    return f"b{max(lower, 0):02d}"
+
+
+def normalize_gap(message: str) -> str:
+    # Critical parse errors embed the validation details; count them as one
+    if message.startswith(CRITICAL_GAP_PREFIX):
+        return CRITICAL_GAP_PREFIX
+    return message
+
+
+def gap_key(message: str) -> str:
+    """
+    Gap messages contain dots, which can't appear in an update path,
+    so they are counted under a short hash and labelled separately.
+    """
+    return hashlib.sha1(message.encode("utf-8")).hexdigest()[:12]
+
+
+def contribution(doc: Optional[dict]) -> Dict[str, float]:
+    """
+    The counters one contract adds to the totals document.
+    """
+    if not doc:
+        return {}
+    status = doc.get("status")
+    counters = {f"status_counts.{_status_bucket(status)}": 1}
+    score = doc.get("confidence_score")
+    if status == ContractStatus.COMPLETED and score is not None:
+        counters[f"score_histogram.{score_bucket(score)}"] = 1
+        counters["score_sum"] = score
+        counters["scored_count"] = 1
+        for message in {normalize_gap(g) for g in doc.get("gap_analysis") or []}:
+            counters[f"gap_counts.{gap_key(message)}"] = 1
+    return counters
+
+
+def _labels(doc: Optional[dict]) -> Dict[str, str]:
+    if not doc or doc.get("status") != ContractStatus.COMPLETED:
+        return {}
+    return {
+        f"gap_labels.{gap_key(m)}": m
+        for m in {normalize_gap(g) for g in doc.get("gap_analysis") or []}
+    }
+
+
+def rollup_update(before: Optional[dict], after: Optional[dict]) -> Optional[dict]:
+    """
+    The update document moving the totals from `before` to `after`, or
+    None if nothing changes.
+    """
+    old, new = contribution(before), contribution(after)
+    delta = {}
+    for key in old.keys() | new.keys():
+        change = new.get(key, 0) - old.get(key, 0)
+        if change:
+            delta[key] = change
+    labels = _labels(after)
+    if not delta and not labels:
+        return None
+    update = {"$inc": delta} if delta else {}
+    if labels:
+        update["$set"] = labels
+    return update
+
+
+def hour_start(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def record_transition(db: Database, before: Optional[dict], after: dict, now: datetime):
+    """
+    Applies a contract's state change to the rollups (sync, Celery).
+    A move into a terminal state also counts towards that hour's
+    throughput. Best effort: the rebuild repairs any drift.
+    """
+    try:
+        update = rollup_update(before, after)
+        if update:
+            db[ROLLUP_COLLECTION].update_one({"_id": TOTALS_DOC_ID}, update, upsert=True)
+
+        status = after.get("status")
+        if status in TERMINAL_STATUSES and _status_bucket((before or {}).get("status")) == IN_PROGRESS:
+            db[HOURLY_COLLECTION].update_one(
+                {"_id": hour_start(now)},
+                {"$inc": {status: 1}},
+                upsert=True
+            )
+    except Exception as e:
+        print(f"⚠️ Warning: Failed to update stats rollups. {e}")
+
+
+def new_contracts_update(count: int) -> dict:
+    """
+    Update document for `count` freshly inserted (pending) contracts.
+    """
+    return {"$inc": {f"status_counts.{IN_PROGRESS}": count}}
+
+
+# --- Full rebuild (fallback) ---
+
+def rebuild_rollups(db: Database) -> dict:
+    """
+    Recomputes every rollup from the contracts collection with
+    aggregation pipelines and replaces the stored documents. O(n); meant
+    for first deployment, drift repair and after bulk rescoring.
+    """
+    contracts = db.contracts
+    totals: dict = {
+        "_id": TOTALS_DOC_ID,
+        "status_counts": {},
+        "score_histogram": {},
+        "score_sum": 0.0,
+        "scored_count": 0,
+        "gap_counts": {},
+        "gap_labels": {},
+    }
+
+    for row in contracts.aggregate([
+        {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+    ]):
+        bucket = _status_bucket(row["_id"])
+        totals["status_counts"][bucket] = totals["status_counts"].get(bucket, 0) + row["count"]
+
+    scored = {"status": ContractStatus.COMPLETED, "confidence_score": {"$ne": None}}
+    for row in contracts.aggregate([
+        {"$match": scored},
+        {"$group": {
+            "_id": {"$min": [
+                {"$multiply": [{"$floor": {"$divide": ["$confidence_score", SCORE_BUCKET_WIDTH]}}, SCORE_BUCKET_WIDTH]},
+                100 - SCORE_BUCKET_WIDTH
+            ]},
+            "count": {"$sum": 1},
+            "total": {"$sum": "$confidence_score"}
+        }}
+    ]):
+        totals["score_histogram"][score_bucket(row["_id"])] = row["count"]
+        totals["score_sum"] += row["total"]
+        totals["scored_count"] += row["count"]
+
+    # A contract's gaps are distinct, so counting messages counts contracts
+    for row in contracts.aggregate([
+        {"$match": scored},
+        {"$unwind": "$gap_analysis"},
+        {"$group": {"_id": "$gap_analysis", "count": {"$sum": 1}}}
+    ]):
+        message = normalize_gap(row["_id"])
+        key = gap_key(message)
+        totals["gap_counts"][key] = totals["gap_counts"].get(key, 0) + row["count"]
+        totals["gap_labels"][key] = message
+
+    hourly = list(contracts.aggregate([
+        {"$match": {"status": {"$in": list(TERMINAL_STATUSES)}, "finished_at": {"$ne": None}}},
+        {"$group": {
+            "_id": {"hour": {"$dateTrunc": {"date": "$finished_at", "unit": "hour"}}, "status": "$status"},
+            "count": {"$sum": 1}
+        }}
+    ]))
+
+    now = datetime.now(timezone.utc)
+    totals["rebuilt_at"] = now
+    db[ROLLUP_COLLECTION].replace_one({"_id": TOTALS_DOC_ID}, totals, upsert=True)
+
+    hours: Dict[datetime, dict] = {}
+    for row in hourly:
+        hours.setdefault(row["_id"]["hour"], {})[row["_id"]["status"]] = row["count"]
+    db[HOURLY_COLLECTION].delete_many({})
+    if hours:
+        db[HOURLY_COLLECTION].insert_many([{"_id": hour, **counts} for hour, counts in hours.items()])
+
+    return {"contracts": sum(totals["status_counts"].values()), "hours": len(hours)}
+
+
+# --- Reading ---
+
+def throughput_window_start(hours: int, now: Optional[datetime] = None) -> datetime:
+    now = now or datetime.now(timezone.utc)
+    return hour_start(now) - timedelta(hours=hours - 1)
+
+
+def summarize_rollups(totals: Optional[dict], hourly: List[dict]) -> dict:
+    """
+    Shapes the stored rollup documents into the stats response.
+    """
+    totals = totals or {}
+    status_counts = {bucket: 0 for bucket in (IN_PROGRESS, *TERMINAL_STATUSES)}
+    status_counts.update({k: int(v) for k, v in (totals.get("status_counts") or {}).items()})
+    histogram = totals.get("score_histogram") or {}
+    labels = totals.get("gap_labels") or {}
+    scored = totals.get("scored_count") or 0
+
+    return {
+        "total_count": sum(status_counts.values()),
+        "status_counts": status_counts,
+        "average_score": round(totals.get("score_sum", 0.0) / scored, 2) if scored else None,
+        "score_histogram": [
+            {
+                "lower": lower,
+                "upper": lower + SCORE_BUCKET_WIDTH,
+                "count": int(histogram.get(f"b{lower:02d}", 0))
+            }
+            for lower in range(0, 100, SCORE_BUCKET_WIDTH)
+        ],
+        "gap_counts": sorted(
+            (
+                {"message": labels.get(key, key), "count": int(count)}
+                for key, count in (totals.get("gap_counts") or {}).items() if count > 0
+            ),
+            key=lambda g: (-g["count"], g["message"])
+        ),
+        "throughput": [
+            {
+                "hour": row["_id"],
+                "completed": int(row.get(ContractStatus.COMPLETED, 0)),
+                "failed": int(row.get(ContractStatus.FAILED, 0))
+            }
+            for row in sorted(hourly, key=lambda r: r["_id"])
+        ],
+        "rebuilt_at": totals.get("rebuilt_at"),
+    }
@@ -0,0 +1,178 @@
+import os
+from typing import Dict, List, Optional
+
+import redis
+import redis.asyncio as aioredis
+
+from celery import chain
+
+from app.celery_app import (
+    celery_app,
+    settings,
+    PRIORITY_LEVELS,
+    QUEUE_PRIORITY_SEP,
+    TASK_LANES,
+    TASK_QUEUES
+)
+
+# --- Configuration ---
+LANE_INTERACTIVE, LANE_STANDARD, LANE_BULK = TASK_LANES
+LANES = list(TASK_LANES)
+
+# Single uploads at or below this size go to the interactive lane
+INTERACTIVE_MAX_BYTES = int(os.getenv("INTERACTIVE_MAX_BYTES", str(2 * 1024 * 1024)))
+# Anything above this size goes to the bulk lane, however it was uploaded
+BULK_MIN_BYTES = int(os.getenv("BULK_MIN_BYTES", str(10 * 1024 * 1024)))
+
+# Per-tenant fairness: every TENANT_PRIORITY_STEP contracts a tenant
+# already has in flight cost one priority level, and past
+# TENANT_BACKLOG_LIMIT its new work is demoted one lane.
+DEFAULT_TENANT = "default"
+TENANT_PRIORITY_STEP = int(os.getenv("TENANT_PRIORITY_STEP", "20"))
+TENANT_BACKLOG_LIMIT = int(os.getenv("TENANT_BACKLOG_LIMIT", "100"))
+TENANT_BACKLOG_PREFIX = "tenant-backlog:"
+# Self-heals counters leaked by lost tasks
+TENANT_BACKLOG_TTL_SECONDS = 24 * 3600
+
+LANE_BASE_PRIORITY = {LANE_INTERACTIVE: 0, LANE_STANDARD: 3, LANE_BULK: 6}
+
+
+def tenant_backlog_key(tenant_id: str) -> str:
+    return f"{TENANT_BACKLOG_PREFIX}{tenant_id}"
+
+
+def choose_lane(file_size: Optional[int], interactive: bool) -> str:
+    """
+    Picks a lane from the upload size known at upload time. Interactive
+    means a user is waiting on this one document (single upload).
+    """
+    size = file_size or 0
+    if size > BULK_MIN_BYTES:
+        return LANE_BULK
+    if interactive and size <= INTERACTIVE_MAX_BYTES:
+        return LANE_INTERACTIVE
+    return LANE_STANDARD
+
+
+def _demote(lane: str) -> str:
+    index = LANES.index(lane)
+    return LANES[min(index + 1, len(LANES) - 1)]
+
+
+def route_for(lane: str, backlog: int) -> Dict[str, object]:
+    """
+    Lane and priority for a contract given the tenant's backlog ahead
+    of it. Lower numbers are served first on the Redis transport.
+    """
+    if backlog >= TENANT_BACKLOG_LIMIT:
+        lane = _demote(lane)
+    priority = LANE_BASE_PRIORITY[lane] + backlog // TENANT_PRIORITY_STEP
+    return {"lane": lane, "priority": min(priority, PRIORITY_LEVELS - 1)}
+
+
+def pipeline_signature(ref: dict, lane: str, priority: int):
+    """
+    The processing chain for one contract. The PDF stage runs on the
+    prefork pool's queue, the LLM and persistence stages on the green
+    pool's; every stage keeps the contract's lane and priority.
+    """
+    def stage(task: str, pool: str, args=()):
+        return celery_app.signature(
+            f"app.celery_worker.{task}",
+            args=list(args),
+            queue=f"{pool}.{lane}",
+            priority=priority
+        )
+
+    return chain(
+        stage("extract_contract_text", "pdf", args=[ref]),
+        stage("llm_extract_contract", "llm"),
+        stage("score_and_persist_contract", "llm"),
+    )
+
+
+# --- Tenant backlog counters ---
+
+_async_client: Optional[aioredis.Redis] = None
+_sync_client: Optional[redis.Redis] = None
+
+
+def _get_async_client() -> aioredis.Redis:
+    global _async_client
+    if _async_client is None:
+        _async_client = aioredis.Redis.from_url(settings.REDIS_CONNECTION_STRING, decode_responses=True)
+    return _async_client
+
+
+def _get_sync_client() -> redis.Redis:
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = redis.Redis.from_url(settings.REDIS_CONNECTION_STRING)
+    return _sync_client
+
+
+async def reserve_backlog(tenant_id: str, count: int = 1) -> int:
+    """
+    Adds `count` contracts to a tenant's in-flight counter (API, async)
+    and returns the backlog that was ahead of them. Redis errors count
+    as an empty backlog: fairness is best effort, uploads must not fail.
+
+    The TTL is only set when the counter is created (INCRBY keeps it),
+    so a tenant uploading steadily can't keep leaked counts alive forever.
+    """
+    key = tenant_backlog_key(tenant_id)
+    try:
+        pipe = _get_async_client().pipeline(transaction=True)
+        pipe.set(key, 0, ex=TENANT_BACKLOG_TTL_SECONDS, nx=True)
+        pipe.incrby(key, count)
+        _, total = await pipe.execute()
+        return max(int(total) - count, 0)
+    except Exception as e:
+        print(f"⚠️ Warning: Failed to update backlog for tenant {tenant_id}. {e}")
+        return 0
+
+
+def release_backlog(tenant_id: str):
+    """
+    Removes one finished contract from a tenant's counter (worker, sync).
+    """
+    key = tenant_backlog_key(tenant_id)
+    try:
+        client = _get_sync_client()
+        if client.decr(key) <= 0:
+            client.delete(key)
+    except Exception as e:
+        print(f"⚠️ Warning: Failed to release backlog for tenant {tenant_id}. {e}")
+
+
+# --- Queue depth ---
+
+def _priority_keys(queue: str) -> List[str]:
+    # kombu stores priority level N of a queue under "<queue><sep><N>"
+    # (level 0 uses the bare queue name)
+    return [queue] + [f"{queue}{QUEUE_PRIORITY_SEP}{level}" for level in range(1, PRIORITY_LEVELS)]
+
+
+async def get_queue_depths() -> Dict[str, int]:
+    """
+    Number of tasks waiting (not yet reserved by a worker) in each
+    stage queue, e.g. {"pdf.interactive": 0, "llm.bulk": 12, ...}.
+    """
+    client = _get_async_client()
+    pipe = client.pipeline(transaction=False)
+    for queue in TASK_QUEUES:
+        for key in _priority_keys(queue):
+            pipe.llen(key)
+    lengths = await pipe.execute()
+
+    return {
+        queue: sum(lengths[i * PRIORITY_LEVELS:(i + 1) * PRIORITY_LEVELS])
+        for i, queue in enumerate(TASK_QUEUES)
+    }
+
+
+def lane_totals(queue_depths: Dict[str, int]) -> Dict[str, int]:
+    totals = {lane: 0 for lane in LANES}
+    for queue, depth in queue_depths.items():
+        totals[queue.split(".", 1)[1]] += depth
+    return totals
@@ -1,4 +1,12 @@
+import os
+
 from app.models import ExtractedContractData
+from app.scoring_rules import (
+    compile_rule_set,
+    evaluate_rule_sets,
+    load_rule_sets,
+    shared_extractor
+)
 
 # --- Configuration ---
 WEIGHTS = {
@@ -9,97 +17,139 @@ WEIGHTS = {
     "contact": 10
 }
 
+# Optional JSON file holding one rule set or a list of them (e.g. one per
+# customer segment). The first one is primary: it produces the stored
+# confidence_score and gap_analysis.
+SCORING_RULES_PATH = os.getenv("SCORING_RULES_PATH")
+
+# --- Default rule set ---
+# The built-in rules. They only check the *existence* of key fields,
+# never their content. Section order is the order gaps are reported in.
+DEFAULT_RULE_SET = {
+    "name": "default",
+    "sections": [
+        {
+            # 1. Financial Completeness (30 points)
+            "path": "financial_details",
+            "weight": WEIGHTS["financial"],
+            "missing_gap": "Missing all financial details.",
+            "checks": [
+                {"any": ["total_contract_value", "monthly_recurring_revenue"], "share": 0.5,
+                 "gap": "Missing Total Contract Value or MRR."},
+                {"any": ["line_items"], "share": 0.5,
+                 "gap": "Missing detailed line items."},
+            ],
+        },
+        {
+            # 2. Party Identification (25 points)
+            # Only parties with a legal_name count; the 'role' string is ignored.
+            "path": "parties",
+            "weight": WEIGHTS["party"],
+            "missing_gap": "Failed to identify any contract parties.",
+            "checks": [
+                {"count": "legal_name",
+                 "tiers": [
+                     {"min": 2, "share": 1.0},
+                     {"min": 1, "share": 0.5,
+                      "gap": "Only one party was clearly identified with a legal name."},
+                 ],
+                 "gap": "Failed to identify any parties with a legal name."},
+            ],
+        },
+        {
+            # 3. Payment Terms Clarity (20 points)
+            "path": "payment_structure",
+            "weight": WEIGHTS["payment"],
+            "missing_gap": "Missing all payment structure details.",
+            "checks": [
+                {"any": ["payment_terms"], "share": 0.5,
+                 "gap": "Missing payment terms (e.g., Net 30)."},
+                {"any": ["payment_schedule", "due_dates"], "share": 0.5,
+                 "gap": "Missing payment schedule or due dates."},
+            ],
+        },
+        {
+            # 4. SLA Definition (15 points)
+            "path": "service_level_agreements",
+            "weight": WEIGHTS["sla"],
+            "missing_gap": "Missing Service Level Agreement (SLA) section.",
+            "checks": [
+                {"any": ["sla_details", "penalty_clauses"],
+                 "gap": "SLA section found, but no specific metrics or penalties defined."},
+            ],
+        },
+        {
+            # 5. Contact Information (10 points)
+            "path": "account_info",
+            "weight": WEIGHTS["contact"],
+            "missing_gap": "Missing all account and contact information.",
+            "checks": [
+                {"any": ["billing_contact_name", "billing_contact_email"],
+                 "gap": "Missing billing contact details (name or email)."},
+            ],
+        },
+    ],
+}
+
+# Compiled once at import time
+RULE_SETS = [
+    compile_rule_set(spec)
+    for spec in (load_rule_sets(SCORING_RULES_PATH) if SCORING_RULES_PATH else [DEFAULT_RULE_SET])
+]
+PRIMARY_RULE_SET = RULE_SETS[0]
+SCORING_VERSION = PRIMARY_RULE_SET.version
+RULES_EXTRACTOR = shared_extractor(RULE_SETS)
+
+
+def validate_extracted_data(data: dict):
+    """
+    Pydantic validation: our first check. If the LLM output is
+    structurally invalid, scoring stops with a critical parse error.
+    Returns (normalized dict, None) or (None, gap message).
+    """
+    try:
+        return ExtractedContractData(**data).model_dump(), None
+    except Exception as e:
+        return None, f"Critical parse error: Invalid data structure from LLM. {e}"
+
+
 def calculate_score_and_gaps(data: dict) -> (float, list):
     """
     Calculates a "completeness" score (0-100) and identifies
-    data gaps based on the extracted contract data.
+    data gaps based on the extracted contract data, using the
+    primary rule set.
     
     This script is robust: it does NOT validate the content,
     only the *existence* of key fields.
     """
-    
-    score = 0.0
-    gaps = []
+    normalized, error = validate_extracted_data(data)
+    if error:
+        return 0.0, [error]
+    return PRIMARY_RULE_SET.evaluate(normalized)
 
-    try:
-        # 1. Pydantic validation: This is our first check.
-        # If the LLM output is structurally invalid, this fails.
-        parsed_data = ExtractedContractData(**data)
-    except Exception as e:
-        return 0.0, [f"Critical parse error: Invalid data structure from LLM. {e}"]
-
-    # --- 1. Financial Completeness (30 points) ---
-    # Check if the 'financial_details' object exists AND
-    # if its key values are not None/empty.
-    if parsed_data.financial_details:
-        fin = parsed_data.financial_details
-        if fin.total_contract_value or fin.monthly_recurring_revenue:
-            score += WEIGHTS["financial"] * 0.5  # 15 pts
-        else:
-            gaps.append("Missing Total Contract Value or MRR.")
-            
-        if fin.line_items: # Checks if the list is not empty
-            score += WEIGHTS["financial"] * 0.5  # 15 pts
-        else:
-            gaps.append("Missing detailed line items.")
-    else:
-        gaps.append("Missing all financial details.")
-
-    # --- 2. Party Identification (25 points) ---
-    # This is the robust fix. We no longer check the 'role' string.
-    # We only check if at least two parties with 'legal_name's were found.
-    if parsed_data.parties:
-        # This list comprehension filters out any "blah blah" entries
-        # that might have a null 'legal_name'.
-        valid_parties = [p for p in parsed_data.parties if p.legal_name]
-        
-        if len(valid_parties) >= 2:
-            score += WEIGHTS["party"] # 25 pts
-        elif len(valid_parties) == 1:
-            score += WEIGHTS["party"] * 0.5 # 12.5 pts
-            gaps.append("Only one party was clearly identified with a legal name.")
-        else:
-            gaps.append("Failed to identify any parties with a legal name.")
-    else:
-        gaps.append("Failed to identify any contract parties.")
 
-    # --- 3. Payment Terms Clarity (20 points) ---
-    # Check if the 'payment_structure' object exists AND
-    # if its key values are not None.
-    if parsed_data.payment_structure:
-        pay = parsed_data.payment_structure
-        if pay.payment_terms: # e.g., "Net 30" (is not None)
-            score += WEIGHTS["payment"] * 0.5 # 10 pts
-        else:
-            gaps.append("Missing payment terms (e.g., Net 30).")
-            
-        if pay.payment_schedule or pay.due_dates:
-            score += WEIGHTS["payment"] * 0.5 # 10 pts
-        else:
-            gaps.append("Missing payment schedule or due dates.")
-    else:
-        gaps.append("Missing all payment structure details.")
-
-    # --- 4. SLA Definition (15 points) ---
-    # Check if 'sla_details' list is not empty OR 'penalty_clauses' is not None
-    if parsed_data.service_level_agreements:
-        sla = parsed_data.service_level_agreements
-        if sla.sla_details or sla.penalty_clauses:
-            score += WEIGHTS["sla"] # 15 pts
-        else:
-            gaps.append("SLA section found, but no specific metrics or penalties defined.")
-    else:
-        gaps.append("Missing Service Level Agreement (SLA) section.")
-
-    # --- 5. Contact Information (10 points) ---
-    # This will correctly fail your screenshot
-    if parsed_data.account_info:
-        acct = parsed_data.account_info
-        if acct.billing_contact_name or acct.billing_contact_email:
-            score += WEIGHTS["contact"] # 10 pts
-        else:
-            gaps.append("Missing billing contact details (name or email).")
+def score_contract(data: dict) -> dict:
+    """
+    Scores extracted data under every loaded rule set in one pass and
+    returns the fields to $set on the contract: the primary score and
+    gaps, the rule-set version that produced them and, when segment
+    rule sets are configured, a per-segment breakdown.
+    """
+    normalized, error = validate_extracted_data(data)
+    if error:
+        results = {rs.name: (rs.version, 0.0, [error]) for rs in RULE_SETS}
     else:
-        gaps.append("Missing all account and contact information.")
+        results = evaluate_rule_sets(normalized, RULE_SETS, RULES_EXTRACTOR)
 
-    return round(score, 2), gaps
\ No newline at end of file
+    _, score, gaps = results[PRIMARY_RULE_SET.name]
+    fields = {
+        "confidence_score": score,
+        "gap_analysis": gaps,
+        "scoring_version": SCORING_VERSION
+    }
+    if len(RULE_SETS) > 1:
+        fields["segment_scores"] = {
+            name: {"version": version, "score": score, "gaps": gaps}
+            for name, (version, score, gaps) in results.items()
+        }
+    return fields
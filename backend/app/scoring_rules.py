@@ -0,0 +1,253 @@
+import json
+import hashlib
+import operator
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# A rule set is plain data (a dict, usually loaded from JSON):
+#
+# {
+#   "name": "default",
+#   "sections": [
+#     {
+#       "path": "financial_details",          # dotted path into extracted_data
+#       "weight": 30,
+#       "missing_gap": "Missing all financial details.",
+#       "checks": [
+#         # Boolean check: `any` or `all` of the listed fields are truthy
+#         {"any": ["total_contract_value", "monthly_recurring_revenue"],
+#          "share": 0.5, "gap": "Missing Total Contract Value or MRR."},
+#         # Count check: items of a list section whose `field` is truthy
+#         {"count": "legal_name",
+#          "tiers": [{"min": 2, "share": 1.0},
+#                    {"min": 1, "share": 0.5, "gap": "Only one party ..."}],
+#          "gap": "Failed to identify any parties with a legal name."}
+#       ]
+#     }
+#   ]
+# }
+#
+# A section is "present" when its value is neither null nor an empty
+# list. Rule sets are compiled once into feature extractors plus scoring
+# terms, which can be evaluated per document or column-wise with NumPy.
+
+FeatureSpec = Tuple  # e.g. ("present", "parties") or ("any", "financial_details", ("a", "b"))
+
+
+class RuleSetError(ValueError):
+    """The rule set definition is malformed."""
+
+
+# --- 1. Feature extraction ---
+
+def _split(path: str) -> Tuple[str, ...]:
+    return tuple(part for part in path.split(".") if part)
+
+
+def _get(data: Any, parts: Sequence[str]) -> Any:
+    value = data
+    for part in parts:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+        if value is None:
+            return None
+    return value
+
+
+def _is_present(value: Any) -> bool:
+    return value is not None and value != []
+
+
+def _compile_feature(spec: FeatureSpec) -> Callable[[dict], int]:
+    kind, section = spec[0], _split(spec[1])
+
+    if kind == "present":
+        return lambda data: int(_is_present(_get(data, section)))
+
+    if kind in ("any", "all"):
+        fields = [_split(f) for f in spec[2]]
+        combine = any if kind == "any" else all
+        return lambda data: int(combine(bool(_get(_get(data, section), f)) for f in fields))
+
+    if kind == "count":
+        field = _split(spec[2])
+        def count(data):
+            items = _get(data, section)
+            if not isinstance(items, list):
+                return 0
+            return sum(1 for item in items if isinstance(item, dict) and _get(item, field))
+        return count
+
+    raise RuleSetError(f"Unknown feature kind: {kind}")
+
+
+class FeatureExtractor:
+    """
+    Computes a fixed list of features for a document. Several rule sets
+    can share one extractor, so a document is walked once no matter how
+    many rule sets score it.
+    """
+
+    def __init__(self, specs: Sequence[FeatureSpec]):
+        self.specs: List[FeatureSpec] = list(dict.fromkeys(specs))
+        self.index: Dict[FeatureSpec, int] = {spec: i for i, spec in enumerate(self.specs)}
+        self._functions = [_compile_feature(spec) for spec in self.specs]
+
+    def row(self, data: dict) -> List[int]:
+        return [fn(data) for fn in self._functions]
+
+    def matrix(self, docs: Sequence[dict]) -> np.ndarray:
+        """
+        Feature matrix of shape (n_features, n_docs).
+        """
+        rows = [self.row(d or {}) for d in docs]
+        return np.array(rows, dtype=np.int64).reshape(len(rows), len(self.specs)).T
+
+
+# --- 2. Compilation ---
+
+_OPS = {"eq": operator.eq, "ge": operator.ge, "lt": operator.lt}
+
+
+@dataclass(frozen=True)
+class Term:
+    """
+    Awards `points` and/or reports `gap` when every condition holds.
+    Conditions are (feature, op, value) triples.
+    """
+    points: float
+    gap: Optional[str]
+    conditions: Tuple[Tuple[FeatureSpec, str, int], ...]
+
+
+def _compile_section(section: dict) -> List[Term]:
+    try:
+        path = section["path"]
+        weight = float(section["weight"])
+    except KeyError as e:
+        raise RuleSetError(f"Section is missing {e}")
+
+    present = ("present", path)
+    terms = [Term(0.0, section.get("missing_gap"), ((present, "eq", 0),))]
+
+    for check in section.get("checks", []):
+        if "any" in check or "all" in check:
+            kind = "any" if "any" in check else "all"
+            feature = (kind, path, tuple(check[kind]))
+            terms.append(Term(weight * float(check.get("share", 1.0)), None,
+                              ((present, "eq", 1), (feature, "eq", 1))))
+            terms.append(Term(0.0, check.get("gap"),
+                              ((present, "eq", 1), (feature, "eq", 0))))
+        elif "count" in check:
+            feature = ("count", path, check["count"])
+            tiers = sorted(check.get("tiers", []), key=lambda t: t["min"], reverse=True)
+            upper = None
+            for tier in tiers:
+                conditions = [(present, "eq", 1), (feature, "ge", int(tier["min"]))]
+                if upper is not None:
+                    conditions.append((feature, "lt", upper))
+                terms.append(Term(weight * float(tier.get("share", 1.0)), tier.get("gap"),
+                                  tuple(conditions)))
+                upper = int(tier["min"])
+            below = [(present, "eq", 1)]
+            if upper is not None:
+                below.append((feature, "lt", upper))
+            terms.append(Term(0.0, check.get("gap"), tuple(below)))
+        else:
+            raise RuleSetError(f"Check in section '{path}' needs 'any', 'all' or 'count'")
+
+    # Terms that neither score nor report anything are dead weight
+    return [t for t in terms if t.points or t.gap]
+
+
+def rule_set_version(spec: dict) -> str:
+    """
+    Content-derived version: any edit to a rule set (weights, messages,
+    conditions) yields a new version, so it can't be forgotten.
+    """
+    canonical = json.dumps(spec, sort_keys=True, separators=(",", ":"))
+    return f"{spec.get('name', 'rules')}-{hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:10]}"
+
+
+class CompiledRuleSet:
+    def __init__(self, spec: dict):
+        self.name: str = spec.get("name", "rules")
+        self.version: str = rule_set_version(spec)
+        self.terms: List[Term] = []
+        for section in spec.get("sections", []):
+            self.terms.extend(_compile_section(section))
+        self.gap_messages: List[str] = [t.gap for t in self.terms if t.gap]
+        self.feature_specs: List[FeatureSpec] = list(dict.fromkeys(
+            feature for term in self.terms for feature, _, _ in term.conditions
+        ))
+        self.extractor = FeatureExtractor(self.feature_specs)
+
+    def evaluate_row(self, row: Sequence[int], extractor: FeatureExtractor) -> Tuple[float, List[str]]:
+        score = 0.0
+        gaps = []
+        index = extractor.index
+        for term in self.terms:
+            if all(_OPS[op](row[index[feature]], value) for feature, op, value in term.conditions):
+                score += term.points
+                if term.gap:
+                    gaps.append(term.gap)
+        return round(score, 2), gaps
+
+    def evaluate(self, data: dict) -> Tuple[float, List[str]]:
+        return self.evaluate_row(self.extractor.row(data), self.extractor)
+
+    def evaluate_matrix(self, features: np.ndarray, extractor: FeatureExtractor) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Column-wise evaluation over a (n_features, n_docs) matrix.
+        Returns (scores of shape (n,), gap mask of shape (len(gap_messages), n)).
+        """
+        n_docs = features.shape[1]
+        scores = np.zeros(n_docs, dtype=np.float64)
+        gap_rows = []
+        for term in self.terms:
+            mask = np.ones(n_docs, dtype=bool)
+            for feature, op, value in term.conditions:
+                mask &= _OPS[op](features[extractor.index[feature]], value)
+            if term.points:
+                scores += term.points * mask
+            if term.gap:
+                gap_rows.append(mask)
+        gaps = np.stack(gap_rows) if gap_rows else np.zeros((0, n_docs), dtype=bool)
+        return np.round(scores, 2), gaps
+
+
+def compile_rule_set(spec: dict) -> CompiledRuleSet:
+    return CompiledRuleSet(spec)
+
+
+def shared_extractor(rule_sets: Sequence[CompiledRuleSet]) -> FeatureExtractor:
+    return FeatureExtractor([spec for rs in rule_sets for spec in rs.feature_specs])
+
+
+def evaluate_rule_sets(
+    data: dict,
+    rule_sets: Sequence[CompiledRuleSet],
+    extractor: Optional[FeatureExtractor] = None
+) -> Dict[str, Tuple[str, float, List[str]]]:
+    """
+    Scores one document under several rule sets with a single feature
+    pass. Returns {name: (version, score, gaps)}.
+    """
+    extractor = extractor or shared_extractor(rule_sets)
+    row = extractor.row(data)
+    return {rs.name: (rs.version, *rs.evaluate_row(row, extractor)) for rs in rule_sets}
+
+
+def load_rule_sets(path: str) -> List[dict]:
+    """
+    Reads one rule set or a list of rule sets from a JSON file.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        loaded = json.load(f)
+    specs = loaded if isinstance(loaded, list) else [loaded]
+    if not specs:
+        raise RuleSetError(f"No rule sets defined in {path}")
+    return specs
@@ -0,0 +1,39 @@
+import re
+from typing import Optional
+
+# --- Configuration ---
+TEXT_INDEX_NAME = "contract_search"
+# Filename matches count for more than a party name mention
+TEXT_INDEX_WEIGHTS = {"filename": 3, "extracted_data.parties.legal_name": 1}
+
+
+def normalize_filename(filename: Optional[str]) -> Optional[str]:
+    """
+    Lowercased copy of the filename stored alongside it. Prefix queries
+    against this field are plain index range scans.
+    """
+    if filename is None:
+        return None
+    return filename.lower()
+
+
+def filename_prefix_filter(prefix: str) -> dict:
+    """
+    Case-insensitive "starts with" match that MongoDB can answer from the
+    filename_lower index. An anchored, case-sensitive regex on an
+    already-lowercased field becomes index bounds; the old unanchored
+    `$options: "i"` regex could only be answered by a full scan.
+    """
+    return {"filename_lower": {"$regex": f"^{re.escape(normalize_filename(prefix))}"}}
+
+
+def text_search_filter(terms: str) -> dict:
+    """
+    Full-text match over filenames and party legal names.
+    """
+    return {"$text": {"$search": terms}}
+
+
+# Projection/sort that expose and order by MongoDB's relevance score
+TEXT_SCORE_PROJECTION = {"relevance": {"$meta": "textScore"}}
+TEXT_SCORE_SORT = [("relevance", {"$meta": "textScore"})]
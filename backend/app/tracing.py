@@ -0,0 +1,213 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Sequence, Tuple
+
+from celery.signals import before_task_publish, task_postrun, task_prerun
+from opentelemetry import context, propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from pymongo import monitoring
+
+# --- Configuration ---
+# "otlp" sends spans to OTEL_EXPORTER_OTLP_ENDPOINT (e.g. a local Jaeger
+# or OpenTelemetry Collector), "jsonl" appends them to TRACE_FILE and
+# "none" (the default) turns tracing off.
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+TRACING_ENABLED = TRACING_EXPORTER in ("otlp", "jsonl")
+
+# Message headers that carry the trace context and publish time
+PUBLISHED_AT_HEADER = "published_at"
+TRACE_HEADERS = ("traceparent", "tracestate")
+
+tracer = trace.get_tracer("pactparser")
+
+
+# --- 1. Exporters ---
+
+class JsonLinesSpanExporter(SpanExporter):
+    """
+    Appends one JSON span per line. Each batch is a single O_APPEND
+    write, so the API and several workers can share one file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        data = "".join(span.to_json(indent=None) + "\n" for span in spans).encode("utf-8")
+        try:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            print(f"⚠️ Warning: Failed to write spans to {self.path}. {e}")
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+
+def _build_exporter() -> SpanExporter:
+    if TRACING_EXPORTER == "jsonl":
+        return JsonLinesSpanExporter(TRACE_FILE)
+    # Imported lazily: only needed when spans leave the process over OTLP
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    return OTLPSpanExporter()
+
+
+def setup_tracing(service_name: str):
+    """
+    Installs the process-wide tracer provider. Until this runs (or when
+    tracing is off) every span is a no-op.
+    """
+    if not TRACING_ENABLED or isinstance(trace.get_tracer_provider(), TracerProvider):
+        return
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(BatchSpanProcessor(_build_exporter()))
+    trace.set_tracer_provider(provider)
+    print(f"🔭 Tracing enabled for {service_name} ({TRACING_EXPORTER})")
+
+
+def current_trace_id() -> Optional[str]:
+    """
+    Hex id of the active trace, stored on contracts so a slow one can be
+    looked up in the trace backend.
+    """
+    span_context = trace.get_current_span().get_span_context()
+    return format(span_context.trace_id, "032x") if span_context.is_valid else None
+
+
+# --- 2. HTTP requests (API) ---
+
+@contextmanager
+def server_span(method: str, headers: Dict[str, str]):
+    """
+    Root span of an API request, continuing the caller's trace if it
+    sent a traceparent header. Named after the route once it is known.
+    """
+    parent = propagate.extract(headers)
+    with tracer.start_as_current_span(f"HTTP {method}", context=parent, kind=SpanKind.SERVER) as span:
+        yield span
+
+
+def name_server_span(span, method: str, route: str, status_code: int):
+    span.update_name(f"{method} {route}")
+    span.set_attribute("http.route", route)
+    span.set_attribute("http.status_code", status_code)
+    if status_code >= 500:
+        span.set_status(Status(StatusCode.ERROR))
+
+
+# --- 3. Celery propagation ---
+# The publisher injects its current context into the message headers;
+# the worker opens a span for the time the message sat in the queue and
+# one for the task itself, both children of the publisher's span.
+
+_active_tasks: Dict[str, Tuple[object, object]] = {}
+_active_lock = threading.Lock()
+
+
+@before_task_publish.connect
+def inject_trace_headers(headers=None, **kwargs):
+    if not TRACING_ENABLED or headers is None:
+        return
+    propagate.inject(headers)
+    headers[PUBLISHED_AT_HEADER] = time.time()
+
+
+def _task_name(task) -> str:
+    return task.name.rsplit(".", 1)[-1]
+
+
+@task_prerun.connect
+def start_task_span(task_id=None, task=None, **kwargs):
+    if not TRACING_ENABLED or task is None:
+        return
+    request = task.request
+    carrier = {key: request.get(key) for key in TRACE_HEADERS if request.get(key)}
+    parent = propagate.extract(carrier)
+    name = _task_name(task)
+    queue = (request.delivery_info or {}).get("routing_key")
+
+    # Publisher and worker clocks are compared here, so hosts must be in sync
+    published_at = request.get(PUBLISHED_AT_HEADER)
+    if published_at:
+        tracer.start_span(
+            f"queue wait {name}", context=parent, kind=SpanKind.CONSUMER,
+            start_time=int(float(published_at) * 1e9),
+            attributes={"messaging.destination": queue or ""}
+        ).end()
+
+    span = tracer.start_span(
+        f"task {name}", context=parent, kind=SpanKind.CONSUMER,
+        attributes={"celery.task_id": task_id or "", "celery.retries": request.retries or 0}
+    )
+    token = context.attach(trace.set_span_in_context(span))
+    with _active_lock:
+        _active_tasks[task_id] = (span, token)
+
+
+@task_postrun.connect
+def end_task_span(task_id=None, state=None, **kwargs):
+    with _active_lock:
+        span, token = _active_tasks.pop(task_id, (None, None))
+    if span is None:
+        return
+    span.set_attribute("celery.state", state or "")
+    span.end()
+    context.detach(token)
+
+
+# --- 4. MongoDB commands ---
+
+class MongoCommandTracer(monitoring.CommandListener):
+    """
+    One client span per MongoDB command, parented to whatever span is
+    current when the driver sends it (a pipeline stage, an API request).
+    """
+
+    def __init__(self):
+        self._spans = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        if not TRACING_ENABLED:
+            return
+        collection = event.command.get(event.command_name)
+        span = tracer.start_span(
+            f"mongo {event.command_name}", kind=SpanKind.CLIENT,
+            attributes={
+                "db.system": "mongodb",
+                "db.name": event.database_name,
+                "db.operation": event.command_name,
+                "db.mongodb.collection": collection if isinstance(collection, str) else "",
+            }
+        )
+        with self._lock:
+            self._spans[(event.request_id, event.connection_id)] = span
+
+    def _finish(self, event, error: Optional[str] = None):
+        with self._lock:
+            span = self._spans.pop((event.request_id, event.connection_id), None)
+        if span is None:
+            return
+        if error:
+            span.set_status(Status(StatusCode.ERROR, error))
+        span.end()
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event, str(event.failure))
+
+
+mongo_command_tracer = MongoCommandTracer()
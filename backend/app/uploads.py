@@ -0,0 +1,193 @@
+import os
+import hashlib
+import zipfile
+import zlib
+from typing import Dict, List, Tuple
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+# --- Configuration ---
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB per read/write
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(50 * 1024 * 1024)))
+PDF_MAGIC = b"%PDF"
+# Whole-request cap for batch uploads (many files and archives per request)
+MAX_BATCH_UPLOAD_BYTES = int(os.getenv("MAX_BATCH_UPLOAD_BYTES", str(1024 * 1024 * 1024)))
+# Room for multipart boundaries and part headers around a single file
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+# What zipfile raises for one unreadable member: corrupt data or CRC
+# mismatch, an unsupported compression method, or encryption
+ZIP_MEMBER_ERRORS = (zipfile.BadZipFile, zlib.error, EOFError, NotImplementedError, RuntimeError)
+
+
+class UploadTooLarge(Exception):
+    """The upload exceeded MAX_UPLOAD_BYTES."""
+
+
+class InvalidPdf(Exception):
+    """The upload does not start with the %PDF magic bytes."""
+
+
+async def save_upload_stream(
+    file: UploadFile,
+    dest_path: str,
+    max_bytes: int = MAX_UPLOAD_BYTES
+) -> Tuple[str, int]:
+    """
+    Streams an upload to `dest_path` in fixed-size chunks, so memory use
+    stays at one chunk no matter how big the file is. The SHA-256 and
+    byte count are computed on the way through.
+
+    Returns (sha256_hex, size_in_bytes). On any error the partial file
+    is removed before the exception is re-raised.
+    """
+    # Reject early when the client told us the size up front
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLarge(f"File exceeds the {max_bytes} byte limit.")
+
+    digest = hashlib.sha256()
+    size = 0
+    out = await run_in_threadpool(open, dest_path, "wb")
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            if size == 0 and not chunk.startswith(PDF_MAGIC):
+                raise InvalidPdf("File is not a PDF (missing %PDF header).")
+
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(f"File exceeds the {max_bytes} byte limit.")
+
+            digest.update(chunk)
+            await run_in_threadpool(out.write, chunk)
+
+        if size == 0:
+            raise InvalidPdf("Uploaded file is empty.")
+    except BaseException:
+        await run_in_threadpool(out.close)
+        await run_in_threadpool(_remove_quietly, dest_path)
+        raise
+
+    await run_in_threadpool(out.close)
+    return digest.hexdigest(), size
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class UploadSizeLimit:
+    """
+    ASGI middleware capping request bodies on the upload routes before
+    Starlette spools them to a temporary file. A Content-Length over the
+    limit is refused without reading the body; a body that runs past it
+    anyway (chunked transfer, wrong header) is cut off while it is read.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = None
+        if scope["type"] == "http" and scope["method"] == "POST":
+            limit = self.limits.get(scope["path"])
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        detail = f"Request body exceeds the {limit} byte limit."
+        declared = Headers(scope=scope).get("content-length", "")
+        if declared.isdigit() and int(declared) > limit:
+            await JSONResponse({"detail": detail}, status_code=413)(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+# --- Zip archives (batch uploads) ---
+
+ZIP_MAGIC = b"PK\x03\x04"
+MAX_BATCH_FILES = int(os.getenv("MAX_BATCH_FILES", "1000"))
+
+
+async def is_zip_upload(file: UploadFile) -> bool:
+    """
+    Zip archives are recognised by their magic bytes, not the extension.
+    """
+    head = await file.read(len(ZIP_MAGIC))
+    await file.seek(0)
+    return head == ZIP_MAGIC
+
+
+def save_zip_member(
+    archive: zipfile.ZipFile,
+    member: zipfile.ZipInfo,
+    dest_path: str,
+    max_bytes: int = MAX_UPLOAD_BYTES
+) -> Tuple[str, int]:
+    """
+    Blocking counterpart of save_upload_stream for one archive member.
+    Run it in a threadpool. Limits are enforced on the decompressed
+    bytes, so a zip bomb is cut off after max_bytes.
+    """
+    if member.file_size > max_bytes:
+        raise UploadTooLarge(f"File exceeds the {max_bytes} byte limit.")
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with archive.open(member) as src, open(dest_path, "wb") as out:
+            while True:
+                chunk = src.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                if size == 0 and not chunk.startswith(PDF_MAGIC):
+                    raise InvalidPdf("File is not a PDF (missing %PDF header).")
+
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"File exceeds the {max_bytes} byte limit.")
+
+                digest.update(chunk)
+                out.write(chunk)
+
+        if size == 0:
+            raise InvalidPdf("Uploaded file is empty.")
+    except BaseException:
+        _remove_quietly(dest_path)
+        raise
+
+    return digest.hexdigest(), size
+
+
+def list_zip_pdfs(archive: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+    """
+    Returns the PDF members of an archive, skipping folders and
+    macOS resource-fork entries.
+    """
+    return [
+        m for m in archive.infolist()
+        if not m.is_dir()
+        and m.filename.lower().endswith(".pdf")
+        and not os.path.basename(m.filename).startswith("._")
+    ]
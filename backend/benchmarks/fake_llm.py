@@ -0,0 +1,189 @@
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+# --- Canned extraction ---
+# A complete ExtractedContractData payload, so scoring does real work
+# instead of short-circuiting on empty sections.
+CANNED_EXTRACTION = {
+    "parties": [
+        {
+            "legal_name": "Northwind Analytics, Inc.",
+            "role": "vendor",
+            "registration_details": "Federal Tax ID: 12-3456789",
+            "address": "500 Market Street, San Francisco, CA 94105",
+            "signatories": [{"name": "Dana Reyes", "role": "VP of Sales"}]
+        },
+        {
+            "legal_name": "Contoso Retail LLC",
+            "role": "customer",
+            "registration_details": "Delaware File No. 7654321",
+            "address": "12 Harbor Way, Boston, MA 02110",
+            "signatories": [{"name": "Sam Patel", "role": "CFO"}]
+        }
+    ],
+    "account_info": {
+        "account_number": "ACC-009812",
+        "billing_contact_name": "Lee Morgan",
+        "billing_contact_email": "billing@contoso.example",
+        "billing_contact_phone": "+1 617 555 0100",
+        "technical_contact_name": "Ari Kim",
+        "technical_contact_email": "it@contoso.example",
+        "technical_contact_phone": "+1 617 555 0101"
+    },
+    "financial_details": {
+        "total_contract_value": 288000.0,
+        "monthly_recurring_revenue": 11500.0,
+        "total_one_time_fees": 12000.0,
+        "currency": "USD",
+        "tax_information": "Fees exclude applicable sales tax",
+        "line_items": [
+            {"description": "Platform subscription", "quantity": 1, "unit_price": 11500.0,
+             "total": 11500.0, "item_type": "recurring"},
+            {"description": "Implementation", "quantity": 1, "unit_price": 12000.0,
+             "total": 12000.0, "item_type": "one-time"}
+        ]
+    },
+    "payment_structure": {
+        "payment_terms": "Net 30",
+        "payment_schedule": "Monthly recurring billing",
+        "due_dates": "1st of each month",
+        "payment_method": "ACH transfer",
+        "late_payment_clause": "1.5% monthly interest on overdue amounts",
+        "banking_details": {
+            "bank_name": "First Harbor Bank",
+            "account_number": "000123456789",
+            "routing_number": "011000015"
+        }
+    },
+    "revenue_classification": {
+        "contract_type": "both",
+        "billing_cycle": "Monthly",
+        "renewal_terms": "Renews for successive 12 month terms unless terminated",
+        "auto_renewal": True
+    },
+    "service_level_agreements": {
+        "sla_details": [
+            {"metric": "Uptime", "commitment": "99.9%"},
+            {"metric": "Response Time", "commitment": "1 hour for P1 incidents"}
+        ],
+        "penalty_clauses": "5% service credit per 0.1% below the uptime commitment",
+        "remedies": "Service credits applied to the next invoice",
+        "support_terms": "24/7 support"
+    },
+    "effective_date": "2025-01-01",
+    "term_length": "24 months",
+    "governing_law": "State of California"
+}
+
+
+class FakeLLMServer:
+    """
+    A local stand-in for the Groq chat completions API. It answers every
+    request with the same canned JSON after a simulated delay of
+    `latency_ms` plus `ms_per_1k_tokens` per thousand prompt tokens,
+    with up to `jitter` (a fraction) of random spread.
+
+    Point the LLM client at it with GROQ_API_BASE=<server.base_url>;
+    everything else (prompt, rate limiter, HTTP pool, JSON parser) runs
+    exactly as in production.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 800,
+        ms_per_1k_tokens: float = 0,
+        jitter: float = 0.1,
+        response: Optional[dict] = None,
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        self.latency_ms = latency_ms
+        self.ms_per_1k_tokens = ms_per_1k_tokens
+        self.jitter = jitter
+        self.content = json.dumps(response or CANNED_EXTRACTION)
+        self.call_seconds: List[float] = []
+        self._calls_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def delay_for(self, prompt_tokens: int) -> float:
+        delay = self.latency_ms + self.ms_per_1k_tokens * prompt_tokens / 1000
+        delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        return max(0.0, delay) / 1000
+
+    def completion(self, body: dict) -> dict:
+        # Same rough 4-characters-per-token estimate the chunker uses
+        prompt_chars = sum(len(m.get("content") or "") for m in body.get("messages", []))
+        prompt_tokens = prompt_chars // 4
+        completion_tokens = len(self.content) // 4
+
+        started = time.perf_counter()
+        time.sleep(self.delay_for(prompt_tokens))
+        with self._calls_lock:
+            self.call_seconds.append(time.perf_counter() - started)
+
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake-llm"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": self.content},
+                "logprobs": None,
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                payload = json.dumps(server.completion(body)).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FakeLLMServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def reset_stats(self):
+        with self._calls_lock:
+            self.call_seconds = []
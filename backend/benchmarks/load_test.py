@@ -0,0 +1,512 @@
+import argparse
+import asyncio
+import copy
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.fake_llm import CANNED_EXTRACTION
+from benchmarks.stats import git_revision, summarize
+from benchmarks.synthetic_pdf import build_pdf, contract_pages
+
+# --- Configuration ---
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+LOAD_DATABASE_NAME = "pactparser_load"
+RESULT_SCHEMA_VERSION = 1
+SEED_BATCH_SIZE = 10_000
+# Ids sampled from the seeded data for the detail and status endpoints
+ID_SAMPLE_SIZE = 5_000
+
+# Relative weight of each request type in the traffic mix
+DEFAULT_MIX = {
+    "list": 25,
+    "list_cursor": 10,
+    "list_status": 10,
+    "list_filename": 5,
+    "detail": 25,
+    "status": 20,
+    "upload": 5,
+}
+
+# Latency objectives per request type, in ms, plus the allowed error rate
+DEFAULT_SLO = {
+    "list": {"p95_ms": 100, "p99_ms": 250},
+    "list_cursor": {"p95_ms": 100, "p99_ms": 250},
+    "list_status": {"p95_ms": 120, "p99_ms": 300},
+    "list_filename": {"p95_ms": 120, "p99_ms": 300},
+    "detail": {"p95_ms": 50, "p99_ms": 150},
+    "status": {"p95_ms": 30, "p99_ms": 100},
+    "upload": {"p95_ms": 250, "p99_ms": 600},
+    "error_rate": 0.01,
+}
+
+STATUS_WEIGHTS = {"completed": 85, "failed": 5, "processing": 5, "pending": 5}
+COMPANY_NAMES = (
+    "Northwind", "Contoso", "Fabrikam", "Tailspin", "Wingtip", "Litware", "Adventure Works",
+    "Proseware", "Woodgrove", "Lucerne", "Alpine Ski", "Coho Vineyard", "Humongous",
+    "Margie's Travel", "Trey Research", "Blue Yonder", "Fourth Coffee", "Graphic Design",
+)
+DOC_KINDS = ("msa", "sow", "order-form", "renewal", "nda", "license")
+
+
+def _configure_environment(args):
+    os.environ["MONGO_DATABASE_NAME"] = args.database
+    if args.mongo_url:
+        os.environ["MONGO_CONNECTION_STRING"] = args.mongo_url
+    if args.redis_url:
+        os.environ["REDIS_CONNECTION_STRING"] = args.redis_url
+
+
+def _guard_database(name: str):
+    if name == "pactparser_db":
+        raise SystemExit("Refusing to load-test against the application database.")
+
+
+# --- Seeding ---
+
+def _contract_templates() -> Dict[str, dict]:
+    """
+    One validated ContractDB document per status. Seeded documents are
+    shallow copies of these with their own ids, names and dates, which
+    keeps seeding millions of documents cheap.
+    """
+    from app.models import ContractDB, ContractStatus
+    from app.scoring import score_contract
+
+    scoring = score_contract(copy.deepcopy(CANNED_EXTRACTION))
+    templates = {}
+    for status in (ContractStatus.COMPLETED, ContractStatus.FAILED,
+                   ContractStatus.PROCESSING, ContractStatus.PENDING):
+        fields = {"filename": "template.pdf", "storage_path": "", "status": status}
+        if status == ContractStatus.COMPLETED:
+            fields.update(extracted_data=CANNED_EXTRACTION, progress_percentage=100, **scoring)
+        elif status == ContractStatus.FAILED:
+            fields.update(error_message="Failed to parse text with LLM: timed out")
+        elif status == ContractStatus.PROCESSING:
+            fields.update(progress_percentage=30)
+        templates[status] = ContractDB(**fields).model_dump()
+    return templates
+
+
+def _party_variants(rng: random.Random) -> List[dict]:
+    variants = []
+    for name in COMPANY_NAMES:
+        data = copy.deepcopy(CANNED_EXTRACTION)
+        data["parties"][1]["legal_name"] = f"{name} {rng.choice(('Inc.', 'LLC', 'Ltd.', 'GmbH'))}"
+        variants.append(data)
+    return variants
+
+
+def synthetic_contracts(count: int, seed: int = 0, days: int = 30):
+    """
+    Yields `count` ContractDB-shaped documents with a realistic status
+    mix, varied filenames and party names (for prefix and text search)
+    and created_at spread over the last `days` days.
+    """
+    rng = random.Random(seed)
+    templates = _contract_templates()
+    variants = _party_variants(rng)
+    statuses = list(STATUS_WEIGHTS)
+    weights = list(STATUS_WEIGHTS.values())
+    now = datetime.now(timezone.utc)
+    span = days * 24 * 3600
+
+    for i in range(count):
+        status = rng.choices(statuses, weights)[0]
+        doc = dict(templates[status])
+        company = rng.choice(COMPANY_NAMES)
+        filename = f"{company} {rng.choice(DOC_KINDS)} {i:07d}.pdf"
+        created_at = now - timedelta(seconds=rng.uniform(0, span))
+        doc.update(
+            contract_id=str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            filename=filename,
+            filename_lower=filename.lower(),
+            storage_path=f"uploads/seed-{i:07d}.pdf",
+            file_hash=f"{rng.getrandbits(256):064x}",
+            file_size=rng.randint(20_000, 5_000_000),
+            tenant_id=f"tenant-{rng.randint(1, 50)}",
+            created_at=created_at,
+            updated_at=created_at,
+        )
+        if status == "completed":
+            doc["extracted_data"] = rng.choice(variants)
+            doc["confidence_score"] = round(rng.uniform(40, 100), 1)
+            doc["finished_at"] = created_at + timedelta(seconds=rng.uniform(5, 120))
+        yield doc
+
+
+def seed_database(args) -> int:
+    """
+    Drops the load-test database, bulk inserts the synthetic contracts,
+    then builds the indexes and stats rollups the API expects.
+    """
+    _configure_environment(args)
+    from app.database import DATABASE_NAME, create_indexes, get_db_sync
+    from app.rollups import rebuild_rollups
+
+    _guard_database(DATABASE_NAME)
+    db = get_db_sync()
+    db.client.drop_database(DATABASE_NAME)
+
+    started = time.perf_counter()
+    batch, inserted = [], 0
+    for doc in synthetic_contracts(args.contracts, seed=args.seed):
+        batch.append(doc)
+        if len(batch) == SEED_BATCH_SIZE:
+            db.contracts.insert_many(batch, ordered=False)
+            inserted += len(batch)
+            batch = []
+            print(f"  {inserted:,} / {args.contracts:,}", end="\r", flush=True)
+    if batch:
+        db.contracts.insert_many(batch, ordered=False)
+        inserted += len(batch)
+
+    asyncio.run(create_indexes())
+    rebuild_rollups(db)
+    print(f"Seeded {inserted:,} contracts into {DATABASE_NAME} "
+          f"in {time.perf_counter() - started:.1f}s")
+    return inserted
+
+
+# --- API under test ---
+
+class APIServer:
+    """
+    Runs the API in a child process (so it doesn't share an event loop
+    with the load generator) against the load-test database, with the
+    Celery broker replaced by an in-memory one: uploads publish their
+    pipeline tasks, and nothing ever consumes them.
+    """
+
+    def __init__(self, port: int, database: str, workers: int = 1):
+        self.port = port
+        self.base_url = f"http://127.0.0.1:{port}"
+        self.workdir = tempfile.mkdtemp(prefix="pactparser-load-")
+        env = {
+            **os.environ,
+            "PYTHONPATH": str(BACKEND_DIR),
+            "MONGO_DATABASE_NAME": database,
+            "CELERY_BROKER_URL": "memory://",
+        }
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+             "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+             "--no-access-log"],
+            cwd=self.workdir,  # uploads land in a throwaway directory
+            env=env
+        )
+
+    async def wait_ready(self, timeout: float = 30):
+        deadline = time.monotonic() + timeout
+        async with httpx.AsyncClient(base_url=self.base_url) as client:
+            while time.monotonic() < deadline:
+                if self.process.poll() is not None:
+                    raise SystemExit(f"API exited with code {self.process.returncode}")
+                try:
+                    if (await client.get("/contracts", params={"page_size": 1})).status_code == 200:
+                        return
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.25)
+        raise SystemExit(f"API did not become ready within {timeout}s")
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+# --- Traffic ---
+
+class TrafficMix:
+    """
+    Builds the requests of each type from ids sampled out of the seeded
+    data. Cursors are harvested from list responses, so cursor requests
+    page at varying depths like real clients do.
+    """
+
+    def __init__(self, completed_ids: List[str], all_ids: List[str], rng: random.Random):
+        self.completed_ids = completed_ids or all_ids
+        self.all_ids = all_ids
+        self.rng = rng
+        self.cursors = deque(maxlen=1000)
+        self.uploads = [
+            build_pdf(contract_pages(1, seed=seed)) for seed in range(8)
+        ]
+
+    def request(self, kind: str) -> dict:
+        rng = self.rng
+        if kind == "list":
+            return {"method": "GET", "url": "/contracts", "params": {"page_size": 20}}
+        if kind == "list_cursor":
+            if not self.cursors:
+                return self.request("list")
+            cursor = rng.choice(self.cursors)
+            return {"method": "GET", "url": "/contracts", "params": {"page_size": 20, "cursor": cursor}}
+        if kind == "list_status":
+            status = rng.choices(list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values()))[0]
+            return {"method": "GET", "url": "/contracts", "params": {"status": status, "page_size": 20}}
+        if kind == "list_filename":
+            prefix = rng.choice(COMPANY_NAMES)[:rng.randint(2, 6)]
+            return {"method": "GET", "url": "/contracts", "params": {"filename": prefix, "page_size": 20}}
+        if kind == "detail":
+            return {"method": "GET", "url": f"/contracts/{rng.choice(self.completed_ids)}"}
+        if kind == "status":
+            return {"method": "GET", "url": f"/contracts/{rng.choice(self.all_ids)}/status"}
+        if kind == "upload":
+            body = rng.choice(self.uploads)
+            return {"method": "POST", "url": "/contracts/upload",
+                    "files": {"file": (f"load-{uuid.uuid4().hex[:8]}.pdf", body, "application/pdf")}}
+        raise ValueError(f"Unknown request type: {kind}")
+
+    def observe(self, kind: str, response: httpx.Response):
+        if kind.startswith("list") and response.status_code == 200:
+            cursor = response.json().get("next_cursor")
+            if cursor:
+                self.cursors.append(cursor)
+
+
+def _sample_ids(args):
+    """
+    Random contract ids from the seeded database, split into completed
+    ones (for the detail endpoint) and any status (for /status).
+    """
+    _configure_environment(args)
+    from app.database import DATABASE_NAME, get_db_sync
+    from app.models import ContractStatus
+
+    _guard_database(DATABASE_NAME)
+    db = get_db_sync()
+    pipeline = [{"$sample": {"size": ID_SAMPLE_SIZE}}, {"$project": {"_id": 0, "contract_id": 1, "status": 1}}]
+    docs = list(db.contracts.aggregate(pipeline))
+    if not docs:
+        raise SystemExit(f"{DATABASE_NAME} is empty; run `python -m benchmarks.load_test seed` first.")
+    completed = [d["contract_id"] for d in docs if d.get("status") == ContractStatus.COMPLETED]
+    return completed, [d["contract_id"] for d in docs]
+
+
+async def drive_load(base_url: str, mix: Dict[str, int], traffic: TrafficMix, rps: float,
+                     duration: float, warmup: float, max_in_flight: int) -> dict:
+    """
+    Open-loop load: requests are scheduled at a fixed rate whether or not
+    earlier ones have finished, and latency is measured from the scheduled
+    start, so a slow server can't hide queueing delay by slowing the
+    generator down. Requests that would exceed `max_in_flight` are counted
+    as dropped instead of being sent late.
+    """
+    kinds = list(mix)
+    weights = list(mix.values())
+    samples: Dict[str, List[float]] = {kind: [] for kind in kinds}
+    errors: Dict[str, int] = {kind: 0 for kind in kinds}
+    codes: Dict[str, Dict[str, int]] = {kind: {} for kind in kinds}
+    dropped = 0
+    in_flight = set()
+
+    limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        measure_from = start + warmup
+        total = int((warmup + duration) * rps)
+
+        async def send(kind: str, scheduled: float):
+            spec = traffic.request(kind)
+            method = spec.pop("method")
+            try:
+                response = await client.request(method, **spec)
+                ok = response.status_code < 400
+                traffic.observe(kind, response)
+                code = str(response.status_code)
+            except httpx.HTTPError as e:
+                ok, code = False, type(e).__name__
+            if scheduled < measure_from:
+                return
+            samples[kind].append(loop.time() - scheduled)
+            codes[kind][code] = codes[kind].get(code, 0) + 1
+            if not ok:
+                errors[kind] += 1
+
+        for i in range(total):
+            scheduled = start + i / rps
+            delay = scheduled - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(in_flight) >= max_in_flight:
+                if scheduled >= measure_from:
+                    dropped += 1
+                continue
+            task = asyncio.create_task(send(traffic.rng.choices(kinds, weights)[0], scheduled))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        if in_flight:
+            await asyncio.gather(*in_flight)
+        elapsed = loop.time() - measure_from
+
+    sent = sum(len(v) for v in samples.values())
+    return {
+        "target_rps": rps,
+        "achieved_rps": round(sent / elapsed, 2) if elapsed > 0 else None,
+        "duration_seconds": duration,
+        "requests": sent,
+        "dropped": dropped,
+        "errors": sum(errors.values()),
+        "endpoints": {
+            kind: {**summarize(samples[kind]), "errors": errors[kind], "status_codes": codes[kind]}
+            for kind in kinds
+        }
+    }
+
+
+# --- SLO checks ---
+
+def check_slo(run: dict, slo: dict) -> List[str]:
+    """
+    Returns a description of every objective the run missed.
+    """
+    breaches = []
+    for kind, result in run["endpoints"].items():
+        for metric, limit in slo.get(kind, {}).items():
+            if result["count"] and result.get(metric, 0) > limit:
+                breaches.append(f"{kind} {metric} {result[metric]} > {limit}")
+    attempted = run["requests"] + run["dropped"]
+    error_rate = (run["errors"] + run["dropped"]) / attempted if attempted else 0.0
+    if "error_rate" in slo and error_rate > slo["error_rate"]:
+        breaches.append(f"error rate {error_rate:.4f} > {slo['error_rate']} "
+                        f"({run['errors']} errors, {run['dropped']} dropped)")
+    return breaches
+
+
+def print_report(result: dict):
+    run = result["run"]
+    git = result["git"]
+    print(f"API load test @ {git.get('commit', 'unknown')[:12]}{' (dirty)' if git.get('dirty') else ''}: "
+          f"{run['achieved_rps']} of {run['target_rps']} rps over {run['duration_seconds']}s, "
+          f"{run['requests']} requests, {run['errors']} errors, {run['dropped']} dropped")
+    print(f"  {'endpoint':<16}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for kind, s in run["endpoints"].items():
+        print(f"  {kind:<16}{s['count']:>8}{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}{s['errors']:>8}")
+    if result["slo_breaches"]:
+        print("\nSLO breaches:")
+        for breach in result["slo_breaches"]:
+            print(f"  ✗ {breach}")
+    else:
+        print("\nAll SLOs met.")
+
+
+async def _run(args, mix: Dict[str, int], slo: dict) -> dict:
+    started_at = datetime.now(timezone.utc)
+    completed_ids, all_ids = _sample_ids(args)
+    traffic = TrafficMix(completed_ids, all_ids, random.Random(args.seed))
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server = APIServer(args.port, args.database, args.api_workers)
+        base_url = server.base_url
+    try:
+        if server:
+            await server.wait_ready()
+        run = await drive_load(base_url, mix, traffic, args.rps, args.duration,
+                               args.warmup, args.max_in_flight)
+    finally:
+        if server:
+            server.stop()
+
+    return {
+        "schema_version": RESULT_SCHEMA_VERSION,
+        "benchmark": "api_load",
+        "started_at": started_at.isoformat(),
+        "git": git_revision(),
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "config": {
+            "rps": args.rps,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "max_in_flight": args.max_in_flight,
+            "mix": mix,
+            "seed": args.seed,
+            "api_workers": args.api_workers if server else None,
+        },
+        "slo": slo,
+        "run": run,
+        "slo_breaches": check_slo(run, slo)
+    }
+
+
+# --- CLI ---
+
+def _parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        kind, _, weight = part.partition("=")
+        if kind.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown request type {kind!r}")
+        mix[kind.strip()] = int(weight)
+    return {kind: weight for kind, weight in mix.items() if weight > 0}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.load_test",
+        description="Seeds a local MongoDB with synthetic contracts and drives mixed HTTP "
+                    "traffic at the API, checking per-endpoint latency SLOs. Needs MongoDB "
+                    "and Redis; the Celery broker is in-memory, so no worker or LLM is used."
+    )
+    parser.add_argument("--database", default=LOAD_DATABASE_NAME)
+    parser.add_argument("--mongo-url", help="Defaults to MONGO_CONNECTION_STRING")
+    parser.add_argument("--redis-url", help="Defaults to REDIS_CONNECTION_STRING")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for data and traffic")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    seed = sub.add_parser("seed", help="Drop the load-test database and fill it with synthetic contracts")
+    seed.add_argument("--contracts", type=int, default=100_000)
+
+    run = sub.add_parser("run", help="Drive traffic and check SLOs (exits 1 on a breach)")
+    run.add_argument("--rps", type=float, default=100)
+    run.add_argument("--duration", type=float, default=60, help="Measured seconds")
+    run.add_argument("--warmup", type=float, default=5, help="Unmeasured seconds before measuring")
+    run.add_argument("--mix", type=_parse_mix, default=DEFAULT_MIX,
+                     help="Weights per request type, e.g. list=30,detail=50,upload=5")
+    run.add_argument("--slo", help="JSON file overriding the default SLO thresholds")
+    run.add_argument("--max-in-flight", type=int, default=256)
+    run.add_argument("--base-url", help="Target an already running API instead of starting one")
+    run.add_argument("--port", type=int, default=8765)
+    run.add_argument("--api-workers", type=int, default=1)
+    run.add_argument("--output", default="api-load.json")
+
+    args = parser.parse_args(argv)
+    if args.command == "seed":
+        seed_database(args)
+        return
+
+    slo = {**DEFAULT_SLO, **(json.loads(Path(args.slo).read_text()) if args.slo else {})}
+    result = asyncio.run(_run(args, args.mix, slo))
+    Path(args.output).write_text(json.dumps(result, indent=2))
+    print_report(result)
+    print(f"Results written to {args.output}")
+    if result["slo_breaches"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
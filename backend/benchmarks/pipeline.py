@@ -0,0 +1,393 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks.fake_llm import FakeLLMServer
+from benchmarks.stats import PeakRSSSampler, child_peak_rss_bytes, git_revision, summarize
+from benchmarks.synthetic_pdf import generate_contract_pdf
+
+# --- Configuration ---
+SAMPLES_DIR = Path(__file__).resolve().parents[2] / "samples"
+BENCH_DATABASE_NAME = "pactparser_bench"
+RESULT_SCHEMA_VERSION = 1
+MB = 1024 * 1024
+
+
+def _configure_environment(args, llm: FakeLLMServer):
+    """
+    Must run before any app module is imported: the app reads its
+    configuration from the environment at import time.
+    """
+    os.environ["GROQ_API_BASE"] = llm.base_url
+    os.environ.setdefault("GROQ_API_KEY", "benchmark-fake-key")
+    # The fake LLM has no quota; keep the Redis limiter out of the numbers
+    os.environ["GROQ_RPM_LIMIT"] = str(args.rpm_limit)
+    os.environ["GROQ_TPM_LIMIT"] = str(args.tpm_limit)
+    os.environ["MONGO_DATABASE_NAME"] = args.database
+    if args.mongo_url:
+        os.environ["MONGO_CONNECTION_STRING"] = args.mongo_url
+    if args.redis_url:
+        os.environ["REDIS_CONNECTION_STRING"] = args.redis_url
+
+
+# --- Documents ---
+
+def _prepare_templates(args, workdir: Path) -> List[dict]:
+    templates = []
+    if not args.no_samples:
+        for path in sorted(SAMPLES_DIR.glob("*.pdf")):
+            templates.append({"name": path.name, "path": str(path)})
+    for pages in args.pages:
+        path = workdir / f"synthetic-{pages}p.pdf"
+        generate_contract_pdf(str(path), pages, seed=pages)
+        templates.append({"name": path.name, "path": str(path), "pages": pages})
+    return templates
+
+
+def _job_copy(template: dict, workdir: Path, cold: bool) -> str:
+    """
+    Cold runs give every job unique bytes (a PDF comment after %%EOF),
+    so no job is served from the extraction cache or stored page text.
+    """
+    if not cold:
+        return template["path"]
+    path = workdir / f"{uuid.uuid4().hex}-{template['name']}"
+    shutil.copyfile(template["path"], path)
+    with open(path, "ab") as f:
+        f.write(f"%benchmark {path.stem}\n".encode("ascii"))
+    return str(path)
+
+
+# --- Pipeline instrumentation ---
+
+class StageTimer:
+    """
+    Records every stage task's wall time per contract, from the moment
+    the task is applied until it returns (lock, guards and progress
+    writes included, as on a worker).
+    """
+
+    def __init__(self, stages):
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self.stages = tuple(stages)
+
+    def record(self, contract_id: str, stage: str, seconds: float):
+        with self._lock:
+            self.timings.setdefault(contract_id, {})[stage] = seconds
+
+    def reset(self):
+        with self._lock:
+            self.timings = {}
+
+
+def _stage_name(signature) -> str:
+    return signature.task.rsplit(".", 1)[-1]
+
+
+def _run_chain(ref: dict, timer: StageTimer):
+    """
+    Applies the production chain eagerly, stage task by stage task, the
+    way a worker would: each stage gets the previous stage's result and
+    the chain stops at the first one that doesn't succeed (a stage that
+    fails or skips raises Ignore, so it has no result or callbacks).
+    """
+    from app.routing import LANE_STANDARD, pipeline_signature
+
+    result = None
+    for signature in pipeline_signature(ref, LANE_STANDARD, 0).tasks:
+        args = (result,) if result is not None else ()
+        started = time.perf_counter()
+        outcome = signature.clone(args).apply()
+        timer.record(ref["contract_id"], _stage_name(signature), time.perf_counter() - started)
+        if not outcome.successful():
+            return
+        result = outcome.result
+
+
+def _run_level(templates: List[dict], concurrency: int, args, workdir: Path,
+               timer: StageTimer, llm: FakeLLMServer) -> dict:
+    # Imported late: see _configure_environment
+    from app.database import get_db_sync
+    from app.extraction_cache import hash_file
+    from app.models import ContractDB, ContractStatus
+
+    db = get_db_sync()
+    jobs = []
+    for _ in range(args.repeats):
+        for template in templates:
+            path = _job_copy(template, workdir, cold=not args.warm)
+            contract = ContractDB(
+                filename=template["name"],
+                filename_lower=template["name"].lower(),
+                storage_path=path,
+                file_hash=hash_file(path),
+                file_size=os.path.getsize(path)
+            )
+            db.contracts.insert_one(contract.model_dump())
+            jobs.append((contract, template))
+
+    def run(job):
+        contract, _ = job
+        started = time.perf_counter()
+        _run_chain({
+            "contract_id": contract.contract_id,
+            "file_path": contract.storage_path,
+            "file_hash": contract.file_hash,
+            "tenant_id": contract.tenant_id
+        }, timer)
+        return time.perf_counter() - started
+
+    timer.reset()
+    llm.reset_stats()
+    sampler = PeakRSSSampler().start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        totals = list(pool.map(run, jobs))
+    wall = time.perf_counter() - started
+    peak_rss = sampler.stop()
+
+    ids = [contract.contract_id for contract, _ in jobs]
+    completed = {
+        doc["contract_id"]
+        for doc in db.contracts.find(
+            {"contract_id": {"$in": ids}, "status": ContractStatus.COMPLETED},
+            {"_id": 0, "contract_id": 1}
+        )
+    }
+    page_counts = {
+        doc["_id"]: doc.get("page_count")
+        for doc in db.page_texts.find(
+            {"_id": {"$in": [contract.file_hash for contract, _ in jobs]}},
+            {"page_count": 1}
+        )
+    }
+
+    stage_seconds = {name: [] for name in timer.stages}
+    by_pages: Dict[str, List[float]] = {}
+    pages_done = 0
+    for (contract, template), total in zip(jobs, totals):
+        if contract.contract_id not in completed:
+            continue
+        for name, seconds in timer.timings.get(contract.contract_id, {}).items():
+            stage_seconds[name].append(seconds)
+        pages = template.get("pages") or page_counts.get(contract.file_hash) or 0
+        pages_done += pages
+        by_pages.setdefault(str(pages), []).append(total)
+
+    return {
+        "concurrency": concurrency,
+        "documents": len(jobs),
+        "failed": len(jobs) - len(completed),
+        "wall_seconds": round(wall, 3),
+        "docs_per_second": round(len(completed) / wall, 3) if wall else None,
+        "pages_per_second": round(pages_done / wall, 3) if wall else None,
+        "peak_rss_mb": round(peak_rss / MB, 1),
+        "stages": {
+            **{name: summarize(values) for name, values in stage_seconds.items()},
+            "total": summarize([
+                total for (contract, _), total in zip(jobs, totals)
+                if contract.contract_id in completed
+            ])
+        },
+        "llm_calls": summarize(llm.call_seconds),
+        "total_by_pages": {
+            pages: summarize(by_pages[pages]) for pages in sorted(by_pages, key=int)
+        }
+    }
+
+
+def run_benchmark(args) -> dict:
+    started_at = datetime.now(timezone.utc)
+    llm = FakeLLMServer(
+        latency_ms=args.llm_latency_ms,
+        ms_per_1k_tokens=args.llm_ms_per_1k_tokens,
+        jitter=args.llm_jitter,
+        response=json.loads(Path(args.llm_response).read_text()) if args.llm_response else None
+    ).start()
+    _configure_environment(args, llm)
+
+    from app.database import DATABASE_NAME, get_db_sync
+    from app.routing import LANE_STANDARD, pipeline_signature
+
+    if DATABASE_NAME == "pactparser_db":
+        raise SystemExit("Refusing to benchmark against the application database.")
+    db = get_db_sync()
+    db.client.drop_database(DATABASE_NAME)
+
+    # Registers the stage tasks with the Celery app
+    import app.celery_worker
+
+    timer = StageTimer(_stage_name(sig) for sig in pipeline_signature({}, LANE_STANDARD, 0).tasks)
+
+    workdir = Path(tempfile.mkdtemp(prefix="pactparser-bench-"))
+    log = sys.stdout if args.verbose else open(os.devnull, "w")
+    try:
+        templates = _prepare_templates(args, workdir)
+        if not templates:
+            raise SystemExit("No documents to benchmark: add --pages or PDFs in samples/.")
+
+        runs = []
+        with contextlib.redirect_stdout(log):
+            # One throwaway document builds the LLM chain and opens the pools
+            smallest = min(templates, key=lambda t: os.path.getsize(t["path"]))
+            for _ in range(args.warmup):
+                _run_level([smallest], 1, _single_pass(args), workdir, timer, llm)
+            for concurrency in args.concurrency:
+                runs.append(_run_level(templates, concurrency, args, workdir, timer, llm))
+    finally:
+        if log is not sys.stdout:
+            log.close()
+        llm.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "schema_version": RESULT_SCHEMA_VERSION,
+        "benchmark": "pipeline",
+        "started_at": started_at.isoformat(),
+        "git": git_revision(),
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "config": {
+            "pages": args.pages,
+            "samples": not args.no_samples,
+            "concurrency": args.concurrency,
+            "repeats": args.repeats,
+            "cache": "warm" if args.warm else "cold",
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_ms_per_1k_tokens": args.llm_ms_per_1k_tokens,
+            "llm_jitter": args.llm_jitter
+        },
+        "documents": [{"name": t["name"], "pages": t.get("pages")} for t in templates],
+        "runs": runs,
+        "peak_child_rss_mb": round(child_peak_rss_bytes() / MB, 1)
+    }
+
+
+def _single_pass(args):
+    return argparse.Namespace(**{**vars(args), "repeats": 1})
+
+
+# --- Reporting ---
+
+def print_report(result: dict):
+    git = result["git"]
+    print(f"Pipeline benchmark @ {git.get('commit', 'unknown')[:12]}"
+          f"{' (dirty)' if git.get('dirty') else ''}, cache {result['config']['cache']}")
+    for run in result["runs"]:
+        print(f"\nconcurrency {run['concurrency']}: {run['documents']} docs, "
+              f"{run['failed']} failed, {run['docs_per_second']} docs/s, "
+              f"{run['pages_per_second']} pages/s, peak RSS {run['peak_rss_mb']} MB")
+        print(f"  {'stage':<24}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        for name, s in {**run["stages"], "llm call": run["llm_calls"]}.items():
+            if s["count"]:
+                print(f"  {name:<24}{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}{s['max_ms']:>10}")
+    print(f"\npeak child process RSS {result['peak_child_rss_mb']} MB")
+
+
+def compare_results(base: dict, head: dict, max_regression: Optional[float]) -> bool:
+    """
+    Prints throughput and stage latency changes per concurrency level.
+    Returns False if any change is worse than `max_regression` percent.
+    """
+    def change(old, new):
+        return (new - old) / old * 100 if old else 0.0
+
+    ok = True
+    print(f"base {base['git'].get('commit', '?')[:12]} -> head {head['git'].get('commit', '?')[:12]}")
+    head_runs = {run["concurrency"]: run for run in head["runs"]}
+    for old in base["runs"]:
+        new = head_runs.get(old["concurrency"])
+        if new is None:
+            continue
+        delta = change(old["docs_per_second"], new["docs_per_second"])
+        print(f"\nconcurrency {old['concurrency']}: docs/s {old['docs_per_second']} -> "
+              f"{new['docs_per_second']} ({delta:+.1f}%)")
+        if max_regression is not None and -delta > max_regression:
+            ok = False
+        for name, s in old["stages"].items():
+            n = new["stages"].get(name)
+            if not n or not s["count"] or not n["count"]:
+                continue
+            p95 = change(s["p95_ms"], n["p95_ms"])
+            print(f"  {name:<24} p50 {s['p50_ms']} -> {n['p50_ms']} ms, "
+                  f"p95 {s['p95_ms']} -> {n['p95_ms']} ms ({p95:+.1f}%)")
+            if max_regression is not None and p95 > max_regression:
+                ok = False
+    return ok
+
+
+# --- CLI ---
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.pipeline",
+        description="Offline end-to-end benchmark of the stage task chain against a local fake LLM. "
+                    "Needs MongoDB and Redis (docker compose up mongo redis)."
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run the benchmark and write a JSON result")
+    run.add_argument("--pages", type=_int_list, default=[1, 10, 100],
+                     help="Synthetic contract sizes in pages, 1 to 1000 (default: 1,10,100)")
+    run.add_argument("--no-samples", action="store_true", help="Skip the PDFs in samples/")
+    run.add_argument("--concurrency", type=_int_list, default=[1, 4, 8],
+                     help="Worker concurrencies to measure (default: 1,4,8)")
+    run.add_argument("--repeats", type=int, default=2, help="Times each document is processed per level")
+    run.add_argument("--warmup", type=int, default=1, help="Throwaway documents before measuring")
+    run.add_argument("--warm", action="store_true",
+                     help="Reuse identical bytes so repeats hit the extraction cache")
+    run.add_argument("--llm-latency-ms", type=float, default=800)
+    run.add_argument("--llm-ms-per-1k-tokens", type=float, default=20)
+    run.add_argument("--llm-jitter", type=float, default=0.1, help="Random latency spread, as a fraction")
+    run.add_argument("--llm-response", help="JSON file to answer with instead of the canned extraction")
+    run.add_argument("--rpm-limit", type=int, default=1_000_000)
+    run.add_argument("--tpm-limit", type=int, default=1_000_000_000)
+    run.add_argument("--database", default=BENCH_DATABASE_NAME, help="MongoDB database to use (dropped first)")
+    run.add_argument("--mongo-url", help="Defaults to MONGO_CONNECTION_STRING")
+    run.add_argument("--redis-url", help="Defaults to REDIS_CONNECTION_STRING")
+    run.add_argument("--output", default="pipeline-benchmark.json")
+    run.add_argument("--verbose", action="store_true", help="Show pipeline logs")
+
+    cmp = sub.add_parser("compare", help="Compare two JSON results")
+    cmp.add_argument("base")
+    cmp.add_argument("head")
+    cmp.add_argument("--max-regression", type=float,
+                     help="Exit non-zero if docs/s drops or a stage p95 grows by more than this percent")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        if any(p < 1 or p > 1000 for p in args.pages):
+            parser.error("--pages must be between 1 and 1000")
+        result = run_benchmark(args)
+        Path(args.output).write_text(json.dumps(result, indent=2))
+        print_report(result)
+        print(f"Results written to {args.output}")
+    else:
+        base = json.loads(Path(args.base).read_text())
+        head = json.loads(Path(args.head).read_text())
+        if not compare_results(base, head, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import os
+import subprocess
+import threading
+from typing import Dict, List, Optional
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """
+    Linear-interpolated percentile (q in 0..100) of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    fraction = position - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+def summarize(seconds: List[float]) -> Dict[str, float]:
+    """
+    Count, mean, percentiles and max of a list of durations, in milliseconds.
+    """
+    values = sorted(seconds)
+    summary = {"count": len(values)}
+    summary["mean_ms"] = round(sum(values) / len(values) * 1000, 2) if values else 0.0
+    for q in PERCENTILES:
+        summary[f"p{q}_ms"] = round(percentile(values, q) * 1000, 2)
+    summary["max_ms"] = round(values[-1] * 1000, 2) if values else 0.0
+    return summary
+
+
+# --- Memory ---
+
+def _rss_bytes() -> int:
+    """
+    Current resident set size. Falls back to the process high-water
+    mark where /proc is not available.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def child_peak_rss_bytes() -> int:
+    """
+    Largest RSS of any terminated child process (the PDF extraction
+    workers), over the whole run.
+    """
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * 1024
+    except ImportError:
+        return 0
+
+
+class PeakRSSSampler:
+    """
+    Polls this process's RSS on a background thread and keeps the peak.
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _poll(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _rss_bytes())
+            self._stop.wait(self.interval)
+
+    def start(self) -> "PeakRSSSampler":
+        self.peak = _rss_bytes()
+        self._thread = threading.Thread(target=self._poll, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> int:
+        self._stop.set()
+        self._thread.join()
+        return max(self.peak, _rss_bytes())
+
+
+# --- Provenance ---
+
+def git_revision() -> dict:
+    """
+    The commit being measured, so results can be compared across commits.
+    """
+    def git(*args) -> Optional[str]:
+        try:
+            return subprocess.run(
+                ["git", *args], capture_output=True, text=True, check=True, timeout=10
+            ).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+    commit = git("rev-parse", "HEAD")
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {"commit": commit or "unknown", "dirty": bool(status)}
@@ -0,0 +1,115 @@
+import random
+from typing import List
+
+# --- Page layout (US Letter, 10pt Helvetica) ---
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+LINES_PER_PAGE = 48
+LINE_HEIGHT = 14
+FONT_SIZE = 10
+
+CLAUSES = (
+    "Payment Terms. Customer shall pay all invoices Net 30 by ACH transfer to First Harbor Bank.",
+    "Late Payment. Overdue amounts accrue interest at 1.5% per month until paid in full.",
+    "Fees. The monthly subscription fee is USD 11,500 billed monthly in advance.",
+    "Implementation. A one-time implementation fee of USD 12,000 is due on signature.",
+    "Service Levels. Vendor will maintain 99.9% monthly uptime for the production platform.",
+    "Support. Vendor provides 24/7 support with a 1 hour response time for P1 incidents.",
+    "Service Credits. Each 0.1% below the uptime commitment earns a 5% service credit.",
+    "Term. This Agreement starts on the Effective Date and continues for 24 months.",
+    "Renewal. The Agreement renews for successive 12 month terms unless terminated.",
+    "Termination. Either party may terminate for material breach on 30 days written notice.",
+    "Confidentiality. Each party shall protect the other's Confidential Information.",
+    "Governing Law. This Agreement is governed by the laws of the State of California.",
+    "Taxes. Fees exclude sales, use and similar taxes, which Customer shall pay.",
+    "Limitation of Liability. Liability is capped at the fees paid in the prior 12 months.",
+)
+
+HEADER = (
+    "MASTER SERVICES AGREEMENT",
+    "This Agreement is entered into as of January 1, 2025 between Northwind Analytics, Inc.",
+    "(Federal Tax ID 12-3456789), 500 Market Street, San Francisco, CA 94105 (Vendor), and",
+    "Contoso Retail LLC, 12 Harbor Way, Boston, MA 02110 (Customer). Account ACC-009812.",
+    "Billing contact: Lee Morgan, billing@contoso.example. Technical contact: Ari Kim.",
+)
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def contract_pages(page_count: int, seed: int = 0) -> List[List[str]]:
+    """
+    Returns the text lines of a contract with `page_count` pages. The
+    clauses are shuffled per seed, so different seeds give different
+    bytes (and file hashes) for the same size.
+    """
+    rng = random.Random(seed)
+    pages = []
+    for page_number in range(page_count):
+        lines = list(HEADER) if page_number == 0 else []
+        section = 1
+        while len(lines) < LINES_PER_PAGE - 1:
+            lines.append(f"{page_number + 1}.{section} {rng.choice(CLAUSES)}")
+            section += 1
+        lines.append(f"Page {page_number + 1} of {page_count} - reference {seed}")
+        pages.append(lines)
+    return pages
+
+
+def _content_stream(lines: List[str]) -> bytes:
+    ops = [f"BT /F1 {FONT_SIZE} Tf {LINE_HEIGHT} TL 50 {PAGE_HEIGHT - 50} Td"]
+    ops.extend(f"({_escape(line)}) Tj T*" for line in lines)
+    ops.append("ET")
+    return "\n".join(ops).encode("latin-1", errors="replace")
+
+
+def build_pdf(pages: List[List[str]]) -> bytes:
+    """
+    Writes a minimal, valid PDF: one content stream per page and a
+    shared standard font, with a correct xref table so readers don't
+    fall back to reconstructing it.
+    """
+    # Object numbers: 1 catalog, 2 page tree, 3 font, then page/content pairs
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: (f"<< /Type /Pages /Count {len(pages)} /Kids ["
+            + " ".join(f"{pid} 0 R" for pid in page_ids) + "] >>").encode("ascii"),
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    }
+    for pid, lines in zip(page_ids, pages):
+        stream = _content_stream(lines)
+        objects[pid] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {pid + 1} 0 R >>"
+        ).encode("ascii")
+        objects[pid + 1] = (
+            f"<< /Length {len(stream)} >>\nstream\n".encode("ascii") + stream + b"\nendstream"
+        )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(out)
+        out += f"{number} 0 obj\n".encode("ascii") + objects[number] + b"\nendobj\n"
+
+    xref_offset = len(out)
+    size = len(objects) + 1
+    out += f"xref\n0 {size}\n0000000000 65535 f \n".encode("ascii")
+    for number in range(1, size):
+        out += f"{offsets[number]:010d} 00000 n \n".encode("ascii")
+    out += (f"trailer\n<< /Size {size} /Root 1 0 R >>\n"
+            f"startxref\n{xref_offset}\n%%EOF\n").encode("ascii")
+    return bytes(out)
+
+
+def generate_contract_pdf(path: str, page_count: int, seed: int = 0) -> str:
+    """
+    Writes a synthetic contract of `page_count` pages (1 to 1000 in the
+    benchmarks) to `path` and returns the path.
+    """
+    if page_count < 1:
+        raise ValueError("page_count must be at least 1")
+    with open(path, "wb") as f:
+        f.write(build_pdf(contract_pages(page_count, seed)))
+    return path
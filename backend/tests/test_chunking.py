@@ -0,0 +1,80 @@
+from app.chunking import (
+    PAGE_SEPARATOR,
+    CHARS_PER_TOKEN,
+    merge_extractions,
+    split_into_chunks
+)
+
+
+def _pages(*pages):
+    return "".join(f"{page}{PAGE_SEPARATOR}" for page in pages)
+
+
+# --- Splitting ---
+
+def test_small_text_is_one_chunk():
+    assert split_into_chunks(_pages("a" * 10, "b" * 10), max_tokens=100) == [
+        f"{'a' * 10}{PAGE_SEPARATOR}{'b' * 10}"
+    ]
+
+
+def test_pages_are_packed_in_order_within_budget():
+    pages = [c * 40 for c in "abcde"]
+    chunks = split_into_chunks(_pages(*pages), max_tokens=100 // CHARS_PER_TOKEN)
+
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert [p for chunk in chunks for p in chunk.split(PAGE_SEPARATOR)] == pages
+
+
+def test_oversized_page_is_cut_on_paragraphs():
+    page = "\n\n".join(["x" * 30] * 4)
+    chunks = split_into_chunks(_pages("intro", page), max_tokens=64 // CHARS_PER_TOKEN)
+
+    assert chunks[0] == "intro"
+    assert all(len(chunk) <= 64 for chunk in chunks)
+    assert "".join(chunks[1:]).replace("\n\n", "") == "x" * 120
+
+
+def test_blank_pages_are_dropped():
+    assert split_into_chunks(_pages("a", "   ", "b"), max_tokens=100) == [f"a{PAGE_SEPARATOR}b"]
+
+
+# --- Merging ---
+
+def test_earlier_chunk_wins_for_scalars_and_later_fills_gaps():
+    merged = merge_extractions([
+        {"financial_details": {"total_contract_value": 100, "currency": None}},
+        {"financial_details": {"total_contract_value": 999, "currency": "USD"}},
+    ])
+    assert merged == {"financial_details": {"total_contract_value": 100, "currency": "USD"}}
+
+
+def test_parties_are_deduped_by_normalized_legal_name_and_merged():
+    merged = merge_extractions([
+        {"parties": [{"legal_name": "Acme  Corp", "role": None}]},
+        {"parties": [{"legal_name": "acme corp", "role": "Vendor"}, {"legal_name": "Globex", "role": "Client"}]},
+    ])
+    assert merged["parties"] == [
+        {"legal_name": "Acme  Corp", "role": "Vendor"},
+        {"legal_name": "Globex", "role": "Client"},
+    ]
+
+
+def test_line_items_dedupe_on_their_identifying_fields():
+    item = {"description": "Licence", "quantity": 2, "unit_price": 10, "total": 20}
+    merged = merge_extractions([
+        {"financial_details": {"line_items": [item]}},
+        {"financial_details": {"line_items": [dict(item, description="LICENCE "), dict(item, quantity=3)]}},
+    ])
+    assert merged["financial_details"]["line_items"] == [item, dict(item, quantity=3)]
+
+
+def test_unknown_lists_dedupe_on_full_content():
+    merged = merge_extractions([{"notes": ["a", {"k": 1}]}, {"notes": [{"k": 1}, "b"]}])
+    assert merged["notes"] == ["a", {"k": 1}, "b"]
+
+
+def test_merge_ignores_failed_chunks():
+    assert merge_extractions([None, {"parties": []}, "oops", {"parties": [{"legal_name": "A"}]}]) == {
+        "parties": [{"legal_name": "A"}]
+    }
@@ -0,0 +1,38 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.pagination import InvalidCursor, after_cursor_filter, decode_cursor, encode_cursor
+
+CREATED_AT = datetime(2025, 3, 1, 12, 30, 15, 123000, tzinfo=timezone.utc)
+
+
+def test_cursor_round_trips():
+    token = encode_cursor({"created_at": CREATED_AT, "contract_id": "c-42", "filename": "x.pdf"})
+    assert decode_cursor(token) == (CREATED_AT, "c-42")
+
+
+def test_cursor_is_url_safe_without_padding():
+    token = encode_cursor({"created_at": CREATED_AT, "contract_id": "a" * 37})
+    assert "=" not in token
+    assert all(c.isalnum() or c in "-_" for c in token)
+
+
+def test_naive_datetimes_round_trip():
+    naive = CREATED_AT.replace(tzinfo=None)
+    token = encode_cursor({"created_at": naive, "contract_id": "c"})
+    assert decode_cursor(token) == (naive, "c")
+
+
+@pytest.mark.parametrize("token", ["", "not-base64!", "e30", "eyJ0IjoxfQ"])
+def test_garbage_cursors_are_rejected(token):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(token)
+
+
+def test_after_cursor_filter_is_strictly_after_in_list_order():
+    token = encode_cursor({"created_at": CREATED_AT, "contract_id": "c-42"})
+    assert after_cursor_filter(token) == {"$or": [
+        {"created_at": {"$lt": CREATED_AT}},
+        {"created_at": CREATED_AT, "contract_id": {"$lt": "c-42"}}
+    ]}
@@ -0,0 +1,71 @@
+import pytest
+
+from app import response_cache
+from app.response_cache import CompletedContractCache, etag_matches, make_etag
+
+ETAG = make_etag(b'{"contract_id":"c1"}')
+
+
+def test_etag_is_strong_and_content_derived():
+    assert ETAG.startswith('"') and ETAG.endswith('"')
+    assert make_etag(b'{"contract_id":"c1"}') == ETAG
+    assert make_etag(b'{"contract_id":"c2"}') != ETAG
+
+
+@pytest.mark.parametrize("header, matches", [
+    (None, False),
+    ("", False),
+    ("*", True),
+    (ETAG, True),
+    (f"W/{ETAG}", True),
+    (f'"other", {ETAG}', True),
+    (f' "other" ,W/{ETAG} ', True),
+    ('"other"', False),
+    (ETAG.strip('"'), False),
+])
+def test_if_none_match(header, matches):
+    assert etag_matches(header, ETAG) is matches
+
+
+def test_cache_evicts_least_recently_used():
+    cache = CompletedContractCache(max_entries=2)
+    cache.put("a", b"a", "ea")
+    cache.put("b", b"b", "eb")
+    assert cache.get("a") == (b"a", "ea")
+    cache.put("c", b"c", "ec")
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+
+def test_entries_expire_after_max_age(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, "monotonic", lambda: now[0])
+    cache = CompletedContractCache(max_age=60)
+    cache.put("a", b"a", "ea")
+    now[0] += 59
+    assert cache.get("a") is not None
+    now[0] += 2
+    assert cache.get("a") is None
+
+
+def test_put_is_dropped_when_an_eviction_raced_the_read():
+    cache = CompletedContractCache()
+    generation = cache.generation
+    cache.invalidate("other")
+    cache.put("a", b"stale", "e", generation)
+    assert cache.get("a") is None
+
+    generation = cache.generation
+    cache.put("a", b"fresh", "e", generation)
+    assert cache.get("a") == (b"fresh", "e")
+
+    generation = cache.generation
+    cache.clear()
+    cache.put("a", b"stale", "e", generation)
+    assert cache.get("a") is None
+
+
+def test_zero_size_cache_stores_nothing():
+    cache = CompletedContractCache(max_entries=0)
+    cache.put("a", b"a", "ea")
+    assert cache.get("a") is None
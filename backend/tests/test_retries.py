@@ -0,0 +1,124 @@
+import random
+
+import httpx
+import pytest
+import redis
+
+from app import retries
+from app.rate_limiter import RateLimitTimeout
+from app.retries import (
+    LOCK_ACQUIRED,
+    LOCK_BUSY,
+    STAGE_DONE,
+    StageLock,
+    backoff_delay,
+    is_retryable
+)
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def client():
+    pytest.importorskip("lupa")
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+def lock(client, task_id="task-1", attempt=0, run_id="run-1", stage="run_llm_extract"):
+    return StageLock("c1", stage, run_id=run_id, task_id=task_id, attempt=attempt, ttl=60, client=client)
+
+
+# --- Retry policy ---
+
+def test_backoff_is_jittered_under_an_exponential_ceiling(monkeypatch):
+    monkeypatch.setattr(retries, "RETRY_BACKOFF_BASE_SECONDS", 2.0)
+    monkeypatch.setattr(retries, "RETRY_BACKOFF_MAX_SECONDS", 30.0)
+    rng = random.Random(1)
+    monkeypatch.setattr(retries.random, "uniform", rng.uniform)
+
+    for attempt, ceiling in [(0, 2), (1, 4), (3, 16), (4, 30), (10, 30)]:
+        delays = [backoff_delay(attempt) for _ in range(200)]
+        assert all(0 <= d <= ceiling for d in delays)
+        assert max(delays) > ceiling * 0.8
+
+
+def test_transient_errors_are_found_through_wrappers():
+    try:
+        try:
+            raise httpx.ReadTimeout("slow")
+        except httpx.ReadTimeout as e:
+            raise Exception("Failed to parse text with LLM") from e
+    except Exception as wrapped:
+        assert is_retryable(wrapped)
+
+    assert is_retryable(RateLimitTimeout("budget"))
+    assert is_retryable(redis.exceptions.ConnectionError("down"))
+
+
+def test_permanent_errors_are_not_retried():
+    assert not is_retryable(ValueError("Could not read PDF"))
+    assert not is_retryable(None)
+
+
+# --- Stage lock ---
+
+def test_first_execution_acquires(client):
+    assert lock(client).acquire() == LOCK_ACQUIRED
+
+
+def test_redelivered_message_is_refused_while_the_original_runs(client):
+    original = lock(client)
+    assert original.acquire() == LOCK_ACQUIRED
+    assert lock(client).acquire() == LOCK_BUSY
+
+
+def test_another_task_for_the_same_stage_is_refused(client):
+    assert lock(client).acquire() == LOCK_ACQUIRED
+    assert lock(client, task_id="task-2").acquire() == LOCK_BUSY
+
+
+def test_a_retry_takes_over_from_the_attempt_that_scheduled_it(client):
+    assert lock(client, attempt=0).acquire() == LOCK_ACQUIRED
+    assert lock(client, attempt=1).acquire() == LOCK_ACQUIRED
+    # ...and the superseded attempt can't take it back
+    assert lock(client, attempt=0).acquire() == LOCK_BUSY
+
+
+def test_release_only_deletes_our_own_lock(client):
+    first = lock(client, attempt=0)
+    first.acquire()
+    retry = lock(client, attempt=1)
+    retry.acquire()
+    first.release()
+    assert lock(client, task_id="task-2").acquire() == LOCK_BUSY
+
+
+def test_finished_stage_drops_late_duplicates_of_the_same_run(client):
+    original = lock(client)
+    original.acquire()
+    original.release(done=True)
+    assert lock(client).acquire() == STAGE_DONE
+    assert lock(client, attempt=3).acquire() == STAGE_DONE
+    assert lock(client, run_id="run-2", task_id="task-9").acquire() == LOCK_ACQUIRED
+
+
+def test_failed_stage_can_run_again(client):
+    original = lock(client)
+    original.acquire()
+    original.release(done=False)
+    assert lock(client, task_id="task-2").acquire() == LOCK_ACQUIRED
+
+
+def test_stages_are_locked_independently(client):
+    assert lock(client, stage="run_extract_text").acquire() == LOCK_ACQUIRED
+    assert lock(client, stage="run_llm_extract").acquire() == LOCK_ACQUIRED
+
+
+class _Unreachable:
+    def eval(self, *args):
+        raise redis.exceptions.ConnectionError("Connection refused")
+
+
+def test_redis_outage_lets_the_stage_run():
+    assert lock(_Unreachable()).acquire() == LOCK_ACQUIRED
+    lock(_Unreachable()).release(done=True)
@@ -0,0 +1,142 @@
+import random
+from collections import Counter
+from datetime import datetime, timezone
+
+import pytest
+
+from app.models import ContractStatus
+from app.rollups import (
+    CRITICAL_GAP_PREFIX,
+    IN_PROGRESS,
+    contribution,
+    gap_key,
+    record_transition,
+    rollup_update,
+    score_bucket,
+    summarize_rollups
+)
+
+PENDING = {"status": ContractStatus.PENDING}
+PROCESSING = {"status": ContractStatus.PROCESSING}
+FAILED = {"status": ContractStatus.FAILED}
+
+
+def completed(score, gaps=()):
+    return {"status": ContractStatus.COMPLETED, "confidence_score": score, "gap_analysis": list(gaps)}
+
+
+@pytest.mark.parametrize("score, bucket", [(0, "b00"), (9.99, "b00"), (10, "b10"), (95, "b90"), (100, "b90"), (-1, "b00")])
+def test_score_buckets(score, bucket):
+    assert score_bucket(score) == bucket
+
+
+def test_queued_and_processing_count_as_one_bucket():
+    assert rollup_update(PENDING, PROCESSING) is None
+
+
+def test_completion_moves_status_and_adds_score_and_gaps():
+    update = rollup_update(PROCESSING, completed(72.5, ["Missing detailed line items."]))
+    key = gap_key("Missing detailed line items.")
+    assert update["$inc"] == {
+        f"status_counts.{IN_PROGRESS}": -1,
+        "status_counts.completed": 1,
+        "score_histogram.b70": 1,
+        "score_sum": 72.5,
+        "scored_count": 1,
+        f"gap_counts.{key}": 1,
+    }
+    assert update["$set"] == {f"gap_labels.{key}": "Missing detailed line items."}
+
+
+def test_rescoring_moves_only_what_changed():
+    update = rollup_update(completed(40, ["a", "b"]), completed(85, ["b", "c"]))
+    assert update["$inc"] == {
+        "score_histogram.b40": -1,
+        "score_histogram.b80": 1,
+        "score_sum": 45,
+        f"gap_counts.{gap_key('a')}": -1,
+        f"gap_counts.{gap_key('c')}": 1,
+    }
+
+
+def test_critical_parse_errors_are_counted_as_one_gap():
+    doc = completed(0.0, [f"{CRITICAL_GAP_PREFIX}: Invalid data structure from LLM. details"])
+    assert f"gap_counts.{gap_key(CRITICAL_GAP_PREFIX)}" in contribution(doc)
+
+
+def test_missing_contract_contributes_nothing():
+    assert contribution(None) == {}
+    assert rollup_update(None, None) is None
+
+
+def test_deltas_sum_to_the_final_states():
+    """
+    Applying every transition's delta must leave the same totals as
+    counting the contracts' final states from scratch.
+    """
+    rng = random.Random(7)
+    states = [PENDING, PROCESSING, FAILED] + [
+        completed(rng.uniform(0, 100), rng.sample(["a", "b", "c", "d"], rng.randint(0, 3)))
+        for _ in range(20)
+    ]
+    totals = Counter()
+    final = []
+    for _ in range(200):
+        current = PENDING
+        totals.update(contribution(current))
+        for _ in range(rng.randint(1, 5)):
+            nxt = rng.choice(states)
+            update = rollup_update(current, nxt) or {}
+            totals.update(update.get("$inc", {}))
+            current = nxt
+        final.append(current)
+
+    expected = Counter()
+    for doc in final:
+        expected.update(contribution(doc))
+    assert {k: round(v, 6) for k, v in totals.items() if round(v, 6)} == \
+           {k: round(v, 6) for k, v in expected.items() if round(v, 6)}
+
+
+class _Collection:
+    def __init__(self, calls, name):
+        self.calls, self.name = calls, name
+
+    def update_one(self, query, update, upsert=False):
+        self.calls.append((self.name, query, update))
+
+
+class _Db:
+    def __init__(self):
+        self.calls = []
+
+    def __getitem__(self, name):
+        return _Collection(self.calls, name)
+
+
+def test_hourly_throughput_counts_only_moves_into_a_terminal_state():
+    now = datetime(2025, 5, 1, 14, 37, tzinfo=timezone.utc)
+    db = _Db()
+    record_transition(db, PROCESSING, completed(50), now)
+    hourly = [c for c in db.calls if c[0] == "contract_stats_hourly"]
+    assert hourly == [("contract_stats_hourly", {"_id": now.replace(minute=0)}, {"$inc": {"completed": 1}})]
+
+    db = _Db()
+    record_transition(db, completed(50), completed(60), now)
+    assert [c for c in db.calls if c[0] == "contract_stats_hourly"] == []
+
+
+def test_summary_shapes_the_totals():
+    summary = summarize_rollups({
+        "status_counts": {"completed": 2, "failed": 1},
+        "score_histogram": {"b50": 1, "b90": 1},
+        "score_sum": 150.0,
+        "scored_count": 2,
+        "gap_counts": {"k1": 2, "k2": 0},
+        "gap_labels": {"k1": "Missing SLA"},
+    }, [])
+    assert summary["total_count"] == 3
+    assert summary["status_counts"] == {IN_PROGRESS: 0, "completed": 2, "failed": 1}
+    assert summary["average_score"] == 75.0
+    assert [b["count"] for b in summary["score_histogram"]] == [0, 0, 0, 0, 0, 1, 0, 0, 0, 1]
+    assert summary["gap_counts"] == [{"message": "Missing SLA", "count": 2}]
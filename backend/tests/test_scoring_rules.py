@@ -0,0 +1,189 @@
+import random
+
+import numpy as np
+import pytest
+
+from app.models import ExtractedContractData
+from app.rescoring import score_batch
+from app.scoring import (
+    DEFAULT_RULE_SET,
+    PRIMARY_RULE_SET,
+    WEIGHTS,
+    calculate_score_and_gaps,
+    score_contract,
+    validate_extracted_data
+)
+from app.scoring_rules import RuleSetError, compile_rule_set, rule_set_version
+
+
+def legacy_score_and_gaps(data: dict):
+    """
+    The hand-written scorer the default rule set replaced, kept here as
+    the reference the compiled rules must reproduce.
+    """
+    score = 0.0
+    gaps = []
+    try:
+        parsed = ExtractedContractData(**data)
+    except Exception as e:
+        return 0.0, [f"Critical parse error: Invalid data structure from LLM. {e}"]
+
+    if parsed.financial_details:
+        fin = parsed.financial_details
+        if fin.total_contract_value or fin.monthly_recurring_revenue:
+            score += WEIGHTS["financial"] * 0.5
+        else:
+            gaps.append("Missing Total Contract Value or MRR.")
+        if fin.line_items:
+            score += WEIGHTS["financial"] * 0.5
+        else:
+            gaps.append("Missing detailed line items.")
+    else:
+        gaps.append("Missing all financial details.")
+
+    if parsed.parties:
+        valid_parties = [p for p in parsed.parties if p.legal_name]
+        if len(valid_parties) >= 2:
+            score += WEIGHTS["party"]
+        elif len(valid_parties) == 1:
+            score += WEIGHTS["party"] * 0.5
+            gaps.append("Only one party was clearly identified with a legal name.")
+        else:
+            gaps.append("Failed to identify any parties with a legal name.")
+    else:
+        gaps.append("Failed to identify any contract parties.")
+
+    if parsed.payment_structure:
+        pay = parsed.payment_structure
+        if pay.payment_terms:
+            score += WEIGHTS["payment"] * 0.5
+        else:
+            gaps.append("Missing payment terms (e.g., Net 30).")
+        if pay.payment_schedule or pay.due_dates:
+            score += WEIGHTS["payment"] * 0.5
+        else:
+            gaps.append("Missing payment schedule or due dates.")
+    else:
+        gaps.append("Missing all payment structure details.")
+
+    if parsed.service_level_agreements:
+        sla = parsed.service_level_agreements
+        if sla.sla_details or sla.penalty_clauses:
+            score += WEIGHTS["sla"]
+        else:
+            gaps.append("SLA section found, but no specific metrics or penalties defined.")
+    else:
+        gaps.append("Missing Service Level Agreement (SLA) section.")
+
+    if parsed.account_info:
+        acct = parsed.account_info
+        if acct.billing_contact_name or acct.billing_contact_email:
+            score += WEIGHTS["contact"]
+        else:
+            gaps.append("Missing billing contact details (name or email).")
+    else:
+        gaps.append("Missing all account and contact information.")
+
+    return round(score, 2), gaps
+
+
+def _maybe(rng, *values):
+    return rng.choice((None,) + values)
+
+
+def random_document(rng: random.Random) -> dict:
+    """
+    Documents mixing missing sections, empty ones and falsy values
+    (0, "", []) that the existence checks have to treat as missing.
+    """
+    doc = {}
+    if rng.random() < 0.8:
+        doc["financial_details"] = {
+            "total_contract_value": _maybe(rng, 0, 1200.5, "3000"),
+            "monthly_recurring_revenue": _maybe(rng, 0, 99),
+            "line_items": rng.choice([[], [{"description": "Licence", "total": 10}], None]),
+        }
+    if rng.random() < 0.8:
+        doc["parties"] = [
+            {"legal_name": _maybe(rng, "", "Acme Corp", "Globex"), "role": _maybe(rng, "vendor")}
+            for _ in range(rng.randint(0, 3))
+        ]
+    if rng.random() < 0.8:
+        doc["payment_structure"] = {
+            "payment_terms": _maybe(rng, "", "Net 30"),
+            "payment_schedule": _maybe(rng, "Monthly"),
+            "due_dates": _maybe(rng, "", "1st of month"),
+        }
+    if rng.random() < 0.8:
+        doc["service_level_agreements"] = {
+            "sla_details": rng.choice([[], [{"metric": "Uptime", "commitment": "99.9%"}]]),
+            "penalty_clauses": _maybe(rng, "", "Service credits"),
+        }
+    if rng.random() < 0.8:
+        doc["account_info"] = {
+            "billing_contact_name": _maybe(rng, "", "Jo"),
+            "billing_contact_email": _maybe(rng, "jo@example.com"),
+        }
+    return doc
+
+
+DOCUMENTS = [random_document(random.Random(seed)) for seed in range(400)] + [
+    {},
+    {"financial_details": {}, "payment_structure": {}, "service_level_agreements": {}, "account_info": {}},
+    {"parties": "not a list"},
+]
+
+
+@pytest.mark.parametrize("doc", DOCUMENTS)
+def test_default_rule_set_matches_legacy_scorer(doc):
+    assert calculate_score_and_gaps(doc) == legacy_score_and_gaps(doc)
+
+
+def test_vectorized_scores_match_per_document_scores():
+    valid = []
+    for doc in DOCUMENTS:
+        normalized, error = validate_extracted_data(doc)
+        if error is None:
+            valid.append((doc, normalized))
+
+    scores, gap_matrix = score_batch([n for _, n in valid])[PRIMARY_RULE_SET.name]
+    messages = np.array(PRIMARY_RULE_SET.gap_messages, dtype=object)
+    for i, (doc, _) in enumerate(valid):
+        fields = score_contract(doc)
+        assert float(scores[i]) == fields["confidence_score"]
+        assert list(messages[gap_matrix[:, i]]) == fields["gap_analysis"]
+
+
+def test_invalid_documents_get_a_critical_parse_error():
+    fields = score_contract({"parties": "not a list"})
+    assert fields["confidence_score"] == 0.0
+    assert fields["gap_analysis"][0].startswith("Critical parse error")
+
+
+def test_version_changes_with_any_edit():
+    edited = {**DEFAULT_RULE_SET, "sections": DEFAULT_RULE_SET["sections"][:-1]}
+    assert rule_set_version(DEFAULT_RULE_SET) == PRIMARY_RULE_SET.version
+    assert rule_set_version(edited) != PRIMARY_RULE_SET.version
+
+
+def test_count_tiers_award_the_highest_matching_share():
+    rules = compile_rule_set({"name": "parties", "sections": [{
+        "path": "parties", "weight": 10, "missing_gap": "none",
+        "checks": [{"count": "legal_name",
+                    "tiers": [{"min": 1, "share": 0.5, "gap": "one"}, {"min": 3, "share": 1.0}],
+                    "gap": "zero"}],
+    }]})
+    named = [{"legal_name": n} for n in "abcd"]
+    assert rules.evaluate({"parties": named}) == (10.0, [])
+    assert rules.evaluate({"parties": named[:2]}) == (5.0, ["one"])
+    assert rules.evaluate({"parties": [{"legal_name": ""}]}) == (0.0, ["zero"])
+    assert rules.evaluate({}) == (0.0, ["none"])
+
+
+@pytest.mark.parametrize("section", [
+    {"weight": 10},
+    {"path": "parties", "weight": 10, "checks": [{"share": 1.0}]},
+])
+def test_malformed_rule_sets_are_rejected(section):
+    with pytest.raises(RuleSetError):
+        compile_rule_set({"name": "bad", "sections": [section]})
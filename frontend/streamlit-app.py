@@ -2,11 +2,12 @@ import streamlit as st
 import requests
 import time
 import os
+import json
 import pandas as pd
 
 # --- Configuration ---
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
-POLL_INTERVAL = 3  # Seconds
+STREAM_READ_TIMEOUT = 60  # Seconds; the API sends a keepalive every 15s
 
 st.set_page_config(page_title="PactParser", layout="wide")
 
@@ -15,10 +16,20 @@ st.set_page_config(page_title="PactParser", layout="wide")
 def show_contract_details(contract_id: str, filename: str):
     """Shows the floating pop-up with contract details."""
     try:
-        data_response = requests.get(f"{API_BASE_URL}/contracts/{contract_id}")
+        # Revalidate with the ETag of the copy we already have; a 304
+        # means the contract is unchanged and skips the JSON download.
+        cache = st.session_state.setdefault("contract_cache", {})
+        cached = cache.get(contract_id)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        data_response = requests.get(f"{API_BASE_URL}/contracts/{contract_id}", headers=headers)
         
-        if data_response.status_code == 200:
-            full_data = data_response.json()
+        if data_response.status_code in (200, 304):
+            if data_response.status_code == 304:
+                full_data = cached[1]
+            else:
+                full_data = data_response.json()
+                if data_response.headers.get("ETag"):
+                    cache[contract_id] = (data_response.headers["ETag"], full_data)
             col1, col2 = st.columns(2)
             with col1:
                 st.metric("Confidence Score", f"{full_data.get('confidence_score', 0):.0f} / 100")
@@ -113,34 +124,40 @@ with st.sidebar:
         progress_bar = st.progress(0)
 
         try:
-            while True:
-                status_response = requests.get(f"{API_BASE_URL}/contracts/{contract_id}/status")
-                if status_response.status_code != 200:
+            # Server-Sent Events: the API pushes every stage transition,
+            # so there is no polling loop hitting the backend.
+            with requests.get(
+                f"{API_BASE_URL}/contracts/{contract_id}/events",
+                stream=True,
+                timeout=(5, STREAM_READ_TIMEOUT)
+            ) as stream:
+                if stream.status_code != 200:
                     status_placeholder.error("Error checking status.")
                     del st.session_state["processing_id"]
-                    break
-                    
-                status_data = status_response.json()
-                progress = status_data["progress_percentage"]
-                progress_bar.progress(progress, text=f"{status_data['status']}... ({progress}%)")
-
-                if status_data["status"] == "completed":
-                    status_placeholder.success("✅ Processing Complete! Refreshing...")
-                    del st.session_state["processing_id"]
-                    time.sleep(2)
-                    st.rerun() # This is now safe
-                    break
-                
-                if status_data["status"] == "failed":
-                    status_placeholder.error(f"❌ Processing Failed: {status_data['error_message']}")
-                    del st.session_state["processing_id"]
-                    break
-                
-                time.sleep(POLL_INTERVAL)
+                else:
+                    for line in stream.iter_lines(decode_unicode=True):
+                        if not line or not line.startswith("data: "):
+                            continue  # blank separators and keepalive comments
+
+                        status_data = json.loads(line[len("data: "):])
+                        progress = status_data["progress_percentage"]
+                        progress_bar.progress(progress, text=f"{status_data['status']}... ({progress}%)")
+
+                        if status_data["status"] == "completed":
+                            status_placeholder.success("✅ Processing Complete! Refreshing...")
+                            del st.session_state["processing_id"]
+                            time.sleep(2)
+                            st.rerun() # This is now safe
+                            break
+                        
+                        if status_data["status"] == "failed":
+                            status_placeholder.error(f"❌ Processing Failed: {status_data['error_message']}")
+                            del st.session_state["processing_id"]
+                            break
         except Exception:
             if "processing_id" in st.session_state:
                 del st.session_state["processing_id"]
-            st.error("Polling failed.")
+            st.error("Status stream failed.")
 
 
 st.title("Contract Dashboard")